@@ -1,18 +1,33 @@
 from __future__ import annotations
 
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yaml
-from dotenv import load_dotenv
 
-load_dotenv()
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CONFIG_PATH = ROOT_DIR / "config.yaml"
 
-CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.yaml"
 
+def load_env() -> None:
+    """Load .env into the environment (variables already set win)."""
+    from dotenv import load_dotenv
 
-def load_config() -> dict:
-    with open(CONFIG_PATH) as f:
+    load_dotenv()
+
+
+def cache_dir() -> Path:
+    """Local state (API caches, snapshots, run reports); never committed.
+    CACHE_DIR may be set in .env, so call this after load_env() / load_config()."""
+    return Path(os.environ.get("CACHE_DIR") or ROOT_DIR / ".cache")
+
+
+def load_config(path: Path | None = None) -> dict:
+    """Load config.yaml (or CONFIG_PATH) after loading .env into the environment."""
+    load_env()
+    path = path or Path(os.environ.get("CONFIG_PATH") or CONFIG_PATH)
+    with open(path) as f:
         cfg = yaml.safe_load(f)
 
     # Allow env overrides
@@ -24,3 +39,39 @@ def load_config() -> dict:
         cfg["keywords"] = [k.strip() for k in os.environ["KEYWORDS"].split(",")]
 
     return cfg
+
+
+# ── Profiles ─────────────────────────────────────────────────────
+
+@dataclass
+class Profile:
+    """One digest: its keywords, ranking and Notion destination.
+    Notion ids of None fall back to DIGEST_PARENT_PAGE_ID / NOTES_DB_ID."""
+
+    name: str
+    keywords: list[str]
+    ranking: dict = field(default_factory=dict)
+    digest_parent_page_id: str | None = None
+    notes_db_id: str | None = None
+
+
+def load_profiles(cfg: dict) -> list[Profile]:
+    """Profiles from the `profiles` section, each inheriting the top-level
+    keywords / ranking it does not override. Without that section the whole
+    config is a single "default" profile."""
+    base_ranking = cfg.get("ranking", {})
+    entries = cfg.get("profiles") or {"default": {}}
+    profiles = []
+    for name, entry in entries.items():
+        entry = entry or {}
+        ranking = {**base_ranking, **entry.get("ranking", {})}
+        ranking["weights"] = {**base_ranking.get("weights", {}), **entry.get("ranking", {}).get("weights", {})}
+        notion = entry.get("notion", {})
+        profiles.append(Profile(
+            name=name,
+            keywords=entry.get("keywords") or cfg["keywords"],
+            ranking=ranking,
+            digest_parent_page_id=notion.get("digest_parent_page_id"),
+            notes_db_id=notion.get("notes_db_id"),
+        ))
+    return profiles
@@ -1,19 +1,44 @@
 """
 CLI entrypoint: python -m app.daily_digest --date YYYY-MM-DD --top_k 5
+
+    python -m app.daily_digest rank [--date YYYY-MM-DD] [--top_k N]
+
+re-ranks the candidates saved by the last run without fetching anything.
+
+    python -m app.daily_digest trends [--weeks 8] [--keyword KW ...]
+
+prints weekly keyword volume and HF likes from the local trend index.
 """
 from __future__ import annotations
 
 import argparse
 import logging
-from datetime import date
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import date, datetime
+from pathlib import Path
 
-from app.config import load_config
+from app.config import Profile, cache_dir, load_config, load_env, load_profiles
+from app.models import PaperCandidate, precompute_keys
 from app.providers.arxiv_provider import ArxivProvider
 from app.providers.hf_provider import HuggingFaceProvider
+from app.services import archive, cpu_pool, telemetry
+from app.services.fulltext import FullTextFetcher
 from app.services.merger import merge_and_dedupe
-from app.services.ranker import rank_papers
+from app.services.ranker import DEFAULT_WEIGHTS, WEIGHT_NAMES, rank_papers, sweep_weights, weight_grid
+from app.services.reranker import LLMReranker
+from app.services.resilience import policy_from_config
+from app.services.scheduler import RunSchedule, degrade, parse_publish_by
+from app.services.structured import Item, digest_layout, layout_to_markdown, papers_layout
+from app.services.snapshot import load_candidates, save_candidates, snapshot_path
 from app.services.summarizer import Summarizer
 from app.services.notion_writer import NotionWriter
+from app.services.trends import TrendIndex, trend_section
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,18 +46,112 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_print_lock = threading.Lock()
+
 
 def main(argv: list[str] | None = None) -> None:
-    parser = argparse.ArgumentParser(description="Daily Paper Digest")
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["rank"]:
+        return rank_main(argv[1:])
+    if argv[:1] == ["trends"]:
+        return trends_main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Daily Paper Digest",
+        epilog="Sub-commands: `rank` re-ranks the cached candidates of a previous run, "
+               "`trends` prints weekly keyword volume (see `rank --help`, `trends --help`).",
+    )
     parser.add_argument("--date", type=str, default=None, help="Digest date (YYYY-MM-DD)")
     parser.add_argument("--top_k", type=int, default=None, help="Number of top papers")
     parser.add_argument("--dry-run", action="store_true", help="Skip Notion write")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="If the date's digest page exists, only summarize and append papers new to its top-k",
+    )
+    parser.add_argument(
+        "--publish-by", type=_publish_by, default=None, metavar="HH:MM",
+        help="Local time the digest must be published by; work is cut to meet it "
+             "(default: schedule.publish_by in config.yaml)",
+    )
+    parser.add_argument(
+        "--report", type=str, default=None,
+        help="Run report JSON path (default: .cache/runs/<date>/<time>.json)",
+    )
+    parser.add_argument(
+        "--trace", type=str, default=None,
+        help="Also append OpenTelemetry-style spans (JSON lines) to this file",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="", default=None, metavar="STAGES",
+        help="cProfile + tracemalloc per stage: the CPU-heavy stages by default, 'all' for every span, "
+             "or a comma list such as merge,rank,notion.build",
+    )
+    parser.add_argument(
+        "--profile-dir", type=str, default=None,
+        help="Profile output directory (default: .cache/profiles/<date>-<time>/)",
+    )
     args = parser.parse_args(argv)
 
     cfg = load_config()
     digest_date = date.fromisoformat(args.date) if args.date else date.today()
-    top_k = args.top_k or cfg["ranking"]["top_k"]
-    keywords = cfg["keywords"]
+
+    tracer = telemetry.start_run(f"daily_digest {digest_date.isoformat()}")
+    profiler = _start_profiler(args, digest_date) if args.profile is not None else None
+    try:
+        schedule = RunSchedule.from_config(cfg, args.publish_by)
+    except ValueError as e:
+        raise SystemExit(f"Invalid config: {e}")
+    schedule.activate()
+    try:
+        with telemetry.span("run", date=digest_date.isoformat(), dry_run=args.dry_run) as run_span:
+            try:
+                _run(args, cfg, digest_date, schedule)
+            finally:
+                run_span.attrs["degradations"] = list(schedule.degradations)
+    finally:
+        schedule.log_summary()
+        report_path = (
+            Path(args.report) if args.report
+            else cache_dir() / "runs" / digest_date.isoformat() / f"{datetime.now():%H%M%S}.json"
+        )
+        tracer.write_report(report_path)
+        if args.trace:
+            tracer.write_spans(Path(args.trace))
+        if profiler:
+            telemetry.set_profiler(None)
+            profiler.write()
+
+
+def _publish_by(value: str) -> str:
+    """argparse type for --publish-by: rejects anything but HH:MM up front."""
+    try:
+        parse_publish_by(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return value
+
+
+def _start_profiler(args: argparse.Namespace, digest_date: date):
+    from app.services.profiling import DEFAULT_STAGES, StageProfiler
+
+    out_dir = (
+        Path(args.profile_dir) if args.profile_dir
+        else cache_dir() / "profiles" / f"{digest_date.isoformat()}-{datetime.now():%H%M%S}"
+    )
+    stages = tuple(s.strip() for s in args.profile.split(",") if s.strip()) or DEFAULT_STAGES
+    profiler = StageProfiler(out_dir, None if stages == ("all",) else stages)
+    telemetry.set_profiler(profiler)
+    return profiler
+
+
+def _run(args: argparse.Namespace, cfg: dict, digest_date: date, schedule: RunSchedule | None = None) -> None:
+    schedule = schedule or RunSchedule.from_config(cfg)
+    cpu_pool.configure(**cfg.get("cpu_pool", {}))
+    profiles = load_profiles(cfg)
+    # Fetch once for the union of every profile's keywords
+    keywords = list(dict.fromkeys(kw for prof in profiles for kw in prof.keywords))
+    res_cfg = cfg.get("resilience", {})
+    policy = policy_from_config(res_cfg)
 
     # 1) Fetch from both providers
     logger.info("Fetching papers for keywords: %s", keywords)
@@ -40,58 +159,472 @@ def main(argv: list[str] | None = None) -> None:
     arxiv_provider = ArxivProvider(
         window_days=arxiv_cfg["window_days"],
         max_results_per_keyword=arxiv_cfg["max_results_per_keyword"],
+        policy=policy,
+        delay_seconds=arxiv_cfg.get("delay_seconds", 3.0),
+        max_workers=arxiv_cfg.get("max_workers", 4),
+        page_size=arxiv_cfg.get("page_size", 100),
     )
-    hf_provider = HuggingFaceProvider()
+    hf_cfg = cfg["providers"].get("huggingface", {})
+    hf_provider = HuggingFaceProvider(
+        window_days=hf_cfg.get("window_days", arxiv_cfg["window_days"]),
+        cache_dir=cache_dir() / "hf_daily",
+        max_workers=hf_cfg.get("max_workers", 4),
+        policy=policy,
+    )
+    fetch_deadline = schedule.stage("fetch")
+    arxiv_provider.http.deadline = fetch_deadline
+    hf_provider.http.deadline = fetch_deadline
 
-    arxiv_papers = arxiv_provider.fetch(keywords)
-    hf_papers = hf_provider.fetch(keywords)
+    with telemetry.span("fetch.arxiv"):
+        arxiv_papers = arxiv_provider.fetch(keywords)
+    with telemetry.span("fetch.huggingface"):
+        hf_papers = hf_provider.fetch(keywords)
     logger.info("ArXiv: %d, HuggingFace: %d", len(arxiv_papers), len(hf_papers))
 
     # 2) Merge & dedupe
-    all_papers = merge_and_dedupe(arxiv_papers + hf_papers)
+    with telemetry.span("merge"):
+        all_papers = merge_and_dedupe(arxiv_papers + hf_papers)
+        telemetry.count("papers", len(all_papers))
 
     if not all_papers:
         logger.warning("No papers found. Exiting.")
         return
 
-    # 2b) Filter out papers already in Notes DB
-    writer = NotionWriter()
-    existing_keys = writer.get_existing_keys()
-    before = len(all_papers)
-    all_papers = [p for p in all_papers if p.notion_key not in existing_keys]
-    logger.info("Filtered %d already-seen papers, %d remaining", before - len(all_papers), len(all_papers))
+    # 2a) Fold the candidates into the local keyword-trend index
+    trends_cfg = cfg.get("trends", {})
+    trends = None
+    if trends_cfg.get("enabled", True):
+        with telemetry.span("trends"):
+            trends = TrendIndex(cache_dir() / "trends.json", keep_days=trends_cfg.get("keep_days", 30))
+            telemetry.count("changed", trends.update(all_papers, digest_date))
+    if not trends_cfg.get("section"):
+        trends = None  # index only, no digest section
 
-    if not all_papers:
-        logger.warning("All papers already seen. Exiting.")
-        return
+    # 2b) Scan each Notes DB once for papers already written
+    label = len(profiles) > 1
+    writers = {
+        prof.name: NotionWriter(
+            policy=policy,
+            digest_parent_page=prof.digest_parent_page_id,
+            notes_db=prof.notes_db_id,
+            label=prof.name if label else None,
+            hash_index=cache_dir() / "notion_hashes.json",
+        )
+        for prof in profiles
+    }
+    existing_keys: dict[str, set[str]] = {}
+    with telemetry.span("notion.filter"):
+        for writer in writers.values():
+            if writer.notes_db not in existing_keys:
+                existing_keys[writer.notes_db] = writer.get_existing_keys()
+                telemetry.count("existing_keys", len(existing_keys[writer.notes_db]))
+    save_candidates(snapshot_path(cache_dir(), digest_date), all_papers, existing_keys)
+
+    # Shared by all profiles: full text and notes are produced once per paper
+    fetcher = None
+    ft_cfg = cfg.get("fulltext", {})
+    if ft_cfg.get("enabled"):
+        fetcher = FullTextFetcher(
+            cache_dir=cache_dir() / "fulltext",
+            token_budget=ft_cfg.get("token_budget", 6000),
+            max_cache_bytes=int(ft_cfg.get("max_cache_mb", 500) * 1024 * 1024),
+            max_pdf_bytes=int(ft_cfg.get("max_pdf_mb", 30) * 1024 * 1024),
+            max_workers=ft_cfg.get("max_workers", 4),
+            policy=policy,
+            delay_seconds=arxiv_cfg.get("delay_seconds", 3.0),
+        )
+
+    sum_cfg = cfg.get("summarizer", {})
+    summarizer = Summarizer(
+        policy=policy_from_config(res_cfg, call_timeout=res_cfg.get("llm_call_timeout", 300)),
+        digest_input_budget=sum_cfg.get("digest_input_budget", 12000),
+        digest_max_tokens=sum_cfg.get("digest_max_tokens", 8000),
+        tokens_per_paper=sum_cfg.get("tokens_per_paper", 900),
+        map_workers=sum_cfg.get("map_workers", 4),
+        structured=sum_cfg.get("structured", False),
+    )
+    # Full text is fetched for the selected papers only, as part of summarizing
+    summarizer.http.deadline = schedule.stage("summarize")
+    if fetcher:
+        fetcher.http.deadline = summarizer.http.deadline
+
+    reranker = None
+    rr_cfg = cfg.get("rerank", {})
+    if rr_cfg.get("enabled"):
+        reranker = LLMReranker(
+            summarizer,
+            cache_path=cache_dir() / "rerank_scores.json",
+            candidates=rr_cfg.get("candidates", 100),
+            batch_size=rr_cfg.get("batch_size", 25),
+            weight=rr_cfg.get("weight", 0.7),
+            max_workers=rr_cfg.get("max_workers", 4),
+            abstract_chars=rr_cfg.get("abstract_chars", 600),
+        )
+
+    # 3-5) Rank, summarize and write each profile concurrently
+    ranked: dict[str, tuple[list[PaperCandidate], set[str]]] = {}
+
+    def run_profile(prof: Profile) -> None:
+        writer = writers[prof.name]
+        with telemetry.span("profile", profile=prof.name):
+            ranked[prof.name] = _run_profile(
+                prof, args, digest_date, all_papers, existing_keys[writer.notes_db],
+                summarizer, writer, fetcher, reranker, schedule, trends,
+            )
+
+    with ThreadPoolExecutor(max_workers=len(profiles)) as pool:
+        futures = {prof.name: pool.submit(telemetry.propagate(run_profile), prof) for prof in profiles}
+
+    # 6) Archive every candidate with its per-profile score for later queries
+    if cfg.get("archive", {}).get("enabled"):
+        if archive.available():
+            with telemetry.span("archive"):
+                seen = {prof.name: existing_keys[writers[prof.name].notes_db] for prof in profiles}
+                rows = _archive_rows(profiles, all_papers, ranked, seen)
+                archive.PaperArchive(cache_dir() / "archive").write(digest_date, rows)
+                telemetry.count("rows", len(rows))
+        else:
+            logger.warning("Archive: pyarrow is not installed, skipping (pip install pyarrow)")
+
+    failed = [name for name, f in futures.items() if f.exception()]
+    for name in failed:
+        logger.error("Profile '%s' failed", name, exc_info=futures[name].exception())
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(profiles)} profiles failed: {', '.join(failed)}")
+
+
+def _run_profile(
+    prof: Profile,
+    args: argparse.Namespace,
+    digest_date: date,
+    all_papers: list[PaperCandidate],
+    existing_keys: set[str],
+    summarizer: Summarizer,
+    writer: NotionWriter,
+    fetcher: FullTextFetcher | None,
+    reranker: LLMReranker | None = None,
+    schedule: RunSchedule | None = None,
+    trends: TrendIndex | None = None,
+) -> tuple[list[PaperCandidate], set[str]]:
+    """Returns the profile's ranked candidates (scores set) and the dedup keys
+    of its top-k."""
+    tag = f"[{prof.name}] "
+    schedule = schedule or RunSchedule()
+    top_k = args.top_k or prof.ranking["top_k"]
+
+    shared = {p.dedup_key: p for p in all_papers}
+    # Incremental: papers already on today's page compete for the top-k again,
+    # but only the ones that are not on it yet get summarized and appended
+    page = writer.read_digest(digest_date) if args.incremental else None
+    if page and not page.keys:
+        page = None  # nothing to append to: write the page in full
+    on_page = set(page.keys) if page else set()
+    papers = _profile_candidates(prof, all_papers, existing_keys - on_page)
+    logger.info("%s%d unseen papers match %d keywords", tag, len(papers), len(prof.keywords))
 
-    # 3) Rank & select top-k
-    weights = cfg["ranking"].get("weights")
-    top_papers = rank_papers(all_papers, keywords, top_k=top_k, weights=weights)
-    logger.info("Top %d papers selected:", len(top_papers))
+    if not papers:
+        logger.warning("%sNo new papers. Skipping.", tag)
+        return [], set()
+
+    # 3) Rank & select top-k (optionally reranked by Claude from a larger shortlist)
+    if reranker:
+        with telemetry.span("rerank", candidates=min(len(papers), reranker.candidates)):
+            top_papers = reranker.rerank(papers, prof.keywords, top_k=top_k, weights=prof.ranking.get("weights"))
+    else:
+        with telemetry.span("rank"):
+            top_papers = rank_papers(papers, prof.keywords, top_k=top_k, weights=prof.ranking.get("weights"))
+    logger.info("%sTop %d papers selected:", tag, len(top_papers))
     for i, p in enumerate(top_papers, 1):
-        logger.info("  %d. [%.3f] %s", i, p.score, p.title)
+        logger.info("%s  %d. [%.3f] %s", tag, i, p.score, p.title)
+    ranked = (papers, {p.dedup_key for p in top_papers})
+    if page:
+        top_papers = [p for p in top_papers if p.notion_key not in on_page]
+        logger.info("%s%d of them are not on the digest page yet", tag, len(top_papers))
+        if not top_papers:
+            return ranked
 
-    # 4) Summarize with Claude API
-    summarizer = Summarizer()
+    # 3b) Optional: full text of the selected papers for richer notes
+    if fetcher:
+        with telemetry.span("fulltext", papers=len(top_papers)):
+            fetcher.fetch([shared[p.dedup_key] for p in top_papers])
+        logger.info(
+            "%sFull text attached to %d/%d papers",
+            tag, sum(bool(shared[p.dedup_key].full_text) for p in top_papers), len(top_papers),
+        )
 
-    # 4a) Digest: one call for all papers
-    logger.info("Generating digest summary for %d papers...", len(top_papers))
-    digest_markdown = summarizer.summarize_for_digest(top_papers, digest_date, keywords)
+    # 4a) Note: one call per paper, shared across profiles, in rank order while
+    # a note plus the digest still fit; the rest keep abstract-only note pages
+    deadline = summarizer.http.deadline
+    for i, p in enumerate(top_papers):
+        if not schedule.fits(deadline, "note", reserve=schedule.estimate("digest")):
+            degrade("summarize.notes", f"{tag}{len(top_papers) - i} of {len(top_papers)} notes left abstract-only")
+            break
+        logger.info("%sGenerating note for: %s", tag, p.title[:60])
+        with telemetry.span("summarize.note", key=p.notion_key), schedule.timed("note"):
+            p.note_markdown = shared[p.dedup_key].note_markdown = summarizer.note_for(shared[p.dedup_key])
+        if not p.note_markdown:
+            degrade("summarize.notes", f"{tag}note failed for {p.notion_key}, abstract-only")
 
-    # 4b) Note: one call per paper
-    for p in top_papers:
-        logger.info("Generating note for: %s", p.title[:60])
-        p.note_markdown = summarizer.summarize_for_note(p)
+    # 4b) Digest: built from the notes; split into parallel calls if over budget.
+    # Built from the abstracts alone when it would not finish in time or fails
+    start = page.sections + 1 if page else None
+    with telemetry.span("summarize.digest", papers=len(top_papers), incremental=bool(page)):
+        digest_markdown, layout = "", None
+        if schedule.fits(deadline, "digest"):
+            logger.info("%sGenerating digest summary for %d papers...", tag, len(top_papers))
+            with schedule.timed("digest"):
+                if page:
+                    digest_markdown, layout = _summarize_sections(summarizer, top_papers, digest_date, prof, start)
+                else:
+                    digest_markdown, layout = _summarize_digest(summarizer, top_papers, digest_date, prof)
+            if not digest_markdown.strip():
+                degrade("summarize.digest", f"{tag}digest call failed, built from abstracts")
+        else:
+            degrade("summarize.digest", f"{tag}no time for the digest call, built from abstracts")
+        if not digest_markdown.strip():
+            digest_markdown, layout = _abstract_digest(top_papers, digest_date, prof, start)
+    if trends and not page:
+        digest_markdown, layout = _with_section(
+            digest_markdown, layout, trend_section(trends, digest_date, prof.keywords)
+        )
 
     # 5) Write to Notion
     if args.dry_run:
-        logger.info("Dry run — skipping Notion write.")
-        _print_digest(digest_markdown, top_papers)
-        return
+        logger.info("%sDry run — skipping Notion write.", tag)
+        with _print_lock:
+            if prof.name != "default":
+                print(f"\n##### Profile: {prof.name}")
+            _print_digest(digest_markdown, top_papers)
+        return ranked
+
+    writer.http.deadline = schedule.stage("write")
+    writer.body_reserve = schedule.write_reserve if schedule.remaining() is not None else 0.0
+    # Note pages come from the shared candidates: their Tags (every matched
+    # keyword) and content hash are the same whichever profile writes them,
+    # so a note another profile already wrote is skipped as unchanged
+    notes = [shared[p.dedup_key] for p in top_papers]
+    with telemetry.span("notion.write"):
+        if page:
+            digest_id = writer.append_to_digest(page, top_papers, digest_markdown, layout=layout, notes=notes)
+        else:
+            digest_id = writer.write_digest(top_papers, digest_date, digest_markdown, layout=layout, notes=notes)
+    logger.info("%sNotion digest page: %s", tag, digest_id)
+    return ranked
+
+
+def _summarize_digest(
+    summarizer: Summarizer,
+    papers: list[PaperCandidate],
+    digest_date: date,
+    prof: Profile,
+) -> tuple[str, list[Item] | None]:
+    """The whole digest page: (markdown, structured layout or None)."""
+    if summarizer.structured:
+        data = summarizer.summarize_for_digest_structured(papers, digest_date, prof.keywords)
+        if data is not None:
+            layout = digest_layout(data, papers, digest_date, prof.keywords)
+            return layout_to_markdown(layout), layout
+        logger.warning("[%s] Structured digest failed, falling back to markdown", prof.name)
+    return summarizer.summarize_for_digest(papers, digest_date, prof.keywords), None
+
+
+def _summarize_sections(
+    summarizer: Summarizer,
+    papers: list[PaperCandidate],
+    digest_date: date,
+    prof: Profile,
+    start: int,
+) -> tuple[str, list[Item] | None]:
+    """Only the sections of papers new to an existing page, numbered from `start`."""
+    if summarizer.structured:
+        sections = summarizer.summarize_sections_structured(papers, digest_date, prof.keywords)
+        if sections is not None:
+            layout = papers_layout(sections, papers, start)
+            return layout_to_markdown(layout), layout
+        logger.warning("[%s] Structured sections failed, falling back to markdown", prof.name)
+    return summarizer.summarize_sections(papers, digest_date, prof.keywords, start), None
+
+
+def _abstract_digest(
+    papers: list[PaperCandidate],
+    digest_date: date,
+    prof: Profile,
+    start: int | None = None,
+) -> tuple[str, list[Item]]:
+    """Digest page (or, from `start`, appended sections) without Claude:
+    every paper's section is its abstract."""
+    layout = papers_layout([], papers, start) if start else digest_layout({}, papers, digest_date, prof.keywords)
+    return layout_to_markdown(layout), layout
+
 
-    digest_id = writer.write_digest(top_papers, digest_date, digest_markdown)
-    logger.info("Notion digest page: %s", digest_id)
+def _with_section(
+    digest_markdown: str,
+    layout: list[Item] | None,
+    section: list[Item],
+) -> tuple[str, list[Item] | None]:
+    """Insert a section just before the paper list (`## 今日论文`), so papers
+    appended later still follow the papers already on the page."""
+    if layout is not None:
+        at = next((i for i, it in enumerate(layout) if it.kind == "h2" and it.text.startswith("今日论文")), len(layout))
+        layout = layout[:at] + section + layout[at:]
+        return layout_to_markdown(layout), layout
+    lines = digest_markdown.split("\n")
+    at = next((i for i, line in enumerate(lines) if line.startswith("## 今日论文")), len(lines))
+    return "\n".join(lines[:at] + [layout_to_markdown(section), ""] + lines[at:]), None
+
+
+def _archive_rows(
+    profiles: list[Profile],
+    all_papers: list[PaperCandidate],
+    ranked: dict[str, tuple[list[PaperCandidate], set[str]]],
+    seen: dict[str, set[str]],
+) -> list[archive.ArchiveRow]:
+    """One row per candidate and profile whose keywords it matched; papers a
+    profile did not rank (already written, or the profile failed) have no score."""
+    rows = []
+    for prof in profiles:
+        papers, selected = ranked.get(prof.name, ([], set()))
+        scores = {p.dedup_key: p.score for p in papers}
+        for p in _profile_candidates(prof, all_papers, set()):
+            rows.append(archive.ArchiveRow(
+                prof.name, p, scores.get(p.dedup_key), p.dedup_key in selected, p.notion_key in seen[prof.name],
+            ))
+    return rows
+
+
+def _profile_candidates(
+    prof: Profile,
+    all_papers: list[PaperCandidate],
+    existing_keys: set[str],
+) -> list[PaperCandidate]:
+    """Unseen papers matching the profile, as copies carrying only its keywords
+    (rank sets score and the digest reads matched_keywords per profile)."""
+    wanted = set(prof.keywords)
+    papers = []
+    for p in all_papers:
+        matched = [kw for kw in p.matched_keywords if kw in wanted]
+        if matched and p.notion_key not in existing_keys:
+            copy = replace(p, matched_keywords=matched)
+            copy._keys = p._keys  # same key inputs: no second title normalization
+            papers.append(copy)
+    return papers
+
+
+# ── rank sub-command ─────────────────────────────────────────────
+
+def rank_main(argv: list[str]) -> None:
+    """Re-rank a saved candidate snapshot with the current config. Reads only
+    config and the snapshot, and loads no client library (anthropic,
+    notion_client, requests, ...): the app modules it imports with this one
+    defer those to the components that use them (tests/test_cli.py)."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.daily_digest rank",
+        description="Re-rank cached candidates (no fetching, no Claude, no Notion)",
+    )
+    parser.add_argument("--date", type=str, default=None, help="Snapshot date (default: latest)")
+    parser.add_argument("--top_k", type=int, default=None, help="Number of top papers")
+    parser.add_argument("--include-seen", action="store_true", help="Keep papers already in Notion")
+    parser.add_argument(
+        "--sweep", type=int, default=None, metavar="STEPS",
+        help="What-if: try STEPS values in [0, 1] per weight (STEPS^3 - 1 settings, 10 -> 999) "
+             "and report how the top-k changes",
+    )
+    args = parser.parse_args(argv)
+
+    cfg = load_config()
+    if args.date:
+        path = snapshot_path(cache_dir(), date.fromisoformat(args.date))
+    else:
+        snapshots = sorted(snapshot_path(cache_dir(), date.today()).parent.glob("*.json"))
+        path = snapshots[-1] if snapshots else None
+    if path is None or not path.exists():
+        raise SystemExit("No candidate snapshot found; run the full pipeline first.")
+
+    all_papers, seen = load_candidates(path)
+    cpu_pool.configure(**cfg.get("cpu_pool", {}))
+    if cpu_pool.worth(len(all_papers), "keys"):
+        precompute_keys(all_papers, cpu_pool.map_chunked)
+    print(f"{len(all_papers)} candidates from {path}")
+    for prof in load_profiles(cfg):
+        notes_db = prof.notes_db_id or os.environ.get("NOTES_DB_ID", "")
+        existing = set() if args.include_seen else seen.get(notes_db, set())
+        papers = _profile_candidates(prof, all_papers, existing)
+        top_k = args.top_k or prof.ranking["top_k"]
+        top = rank_papers(papers, prof.keywords, top_k=top_k, weights=prof.ranking.get("weights"))
+        print(f"\n[{prof.name}] top {len(top)} of {len(papers)}")
+        for i, p in enumerate(top, 1):
+            print(f"{i:>3}. {p.score:6.3f}  likes={p.hf_likes:<4} {p.title[:90]}")
+        if args.sweep:
+            _print_sweep(papers, prof.keywords, top_k, prof.ranking.get("weights"), args.sweep)
+
+
+def _print_sweep(
+    papers: list[PaperCandidate],
+    keywords: list[str],
+    top_k: int,
+    weights: dict | None,
+    steps: int,
+) -> None:
+    grid = weight_grid(steps)
+    config_weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    t0 = time.perf_counter()
+    config_top, *tops = sweep_weights(papers, keywords, [config_weights, *grid], top_k=top_k)
+    elapsed = time.perf_counter() - t0
+
+    config_set = set(config_top)
+    sets = Counter(frozenset(t) for t in tops)
+    print(
+        f"\n  Sweep: {len(grid)} weight settings in {elapsed:.2f}s, "
+        f"{len(sets)} distinct top-{top_k} sets"
+    )
+    swapped = Counter(len(set(t) - config_set) for t in tops)
+    print("  Papers swapped out vs config weights: " + ", ".join(
+        f"{n}: {c / len(tops):.0%}" for n, c in sorted(swapped.items())
+    ))
+
+    print("  Top-k membership across settings (* = in config top-k):")
+    membership = Counter(i for t in tops for i in t)
+    for i, c in membership.most_common(max(2 * top_k, 10)):
+        mark = "*" if i in config_set else " "
+        print(f"   {mark} {c / len(tops):6.1%}  {papers[i].title[:80]}")
+
+    print("  Most common top-k sets:")
+    for members, c in sets.most_common(5):
+        ws = grid[next(n for n, t in enumerate(tops) if frozenset(t) == members)]
+        diff = "= config" if members == config_set else f"{len(members - config_set)} swapped"
+        example = " ".join(f"{name}={ws[name]:.2f}" for name in WEIGHT_NAMES)
+        print(f"    {c:>5} settings ({diff}), e.g. {example}")
+
+
+# ── trends sub-command ───────────────────────────────────────────
+
+def trends_main(argv: list[str]) -> None:
+    """Weekly keyword volume and mean HF likes from the local trend index."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.daily_digest trends",
+        description="Weekly keyword trends from the local index (no fetching, no Notion)",
+    )
+    parser.add_argument("--end", type=str, default=None, help="Last day of the last week (default: today)")
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--keyword", action="append", default=None, help="Only this keyword (repeatable)")
+    parser.add_argument("--source", choices=("arxiv", "huggingface"), default=None)
+    args = parser.parse_args(argv)
+
+    load_env()
+    path = cache_dir() / "trends.json"
+    if not path.exists():
+        raise SystemExit("No trend index found; run the full pipeline first.")
+    end = date.fromisoformat(args.end) if args.end else date.today()
+    weekly = TrendIndex(path).weekly(end, args.weeks, args.keyword, args.source)
+    if not weekly:
+        print("No papers in that range.")
+        return
+    weeks = next(iter(weekly.values()))
+    width = max(7, *(len(kw) for kw in weekly))
+    print(f"{'week of':<{width}}  " + "  ".join(f"{w:%m-%d}".rjust(11) for w, _, _ in weeks))
+    for kw, row in weekly.items():
+        print(f"{kw:<{width}}  " + "  ".join(f"{n:>4} ({likes:>4.1f})" for _, n, likes in row))
+    print("\npapers per week (mean HF likes)")
 
 
 def _print_digest(digest_markdown: str, papers: list) -> None:
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import hashlib
 import re
+import sys
 import unicodedata
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
 
-@dataclass
+
+@dataclass(slots=True)
 class PaperCandidate:
     title: str
     url: str
@@ -23,37 +27,79 @@ class PaperCandidate:
     # populated after ranking
     score: float = 0.0
     note_markdown: str = ""
+    full_text: str = ""  # token-budgeted PDF excerpt (optional full-text stage)
+
+    # (key inputs, dedup_key, notion_key) — recomputed only when inputs change
+    _keys: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Keywords and sources repeat across every candidate; share one string each
+        self.source = sys.intern(self.source)
+        self.matched_keywords = [sys.intern(kw) for kw in self.matched_keywords]
 
     @property
     def dedup_key(self) -> str:
         """Primary: arxiv_id. Fallback: normalized title hash."""
-        if self.arxiv_id:
-            return f"arxiv:{self.arxiv_id}"
-        return f"title:{self._title_hash}"
+        return self._cached_keys()[1]
 
     @property
     def notion_key(self) -> str:
         """Key for Notion DB dedup: arxiv_id or hash(title+first_author+year)."""
-        if self.arxiv_id:
-            return self.arxiv_id
-        parts = [self._normalize_title(self.title)]
-        if self.authors:
-            parts.append(self.authors[0].lower().strip())
-        if self.published:
-            parts.append(str(self.published.year))
-        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+        return self._cached_keys()[2]
+
+    @property
+    def pdf_url(self) -> str | None:
+        return f"https://arxiv.org/pdf/{self.arxiv_id}" if self.arxiv_id else None
 
     @property
     def _title_hash(self) -> str:
         norm = self._normalize_title(self.title)
         return hashlib.sha256(norm.encode()).hexdigest()[:16]
 
+    def _key_inputs(self) -> tuple:
+        # Same tuple as _cached_keys builds inline (the hot path)
+        return (self.title, self.arxiv_id, self.authors[0] if self.authors else None, self.published)
+
+    def _cached_keys(self) -> tuple:
+        # Merge may fill in arxiv_id / authors / published after the first
+        # access, so the cache is validated against the inputs it came from.
+        src = (self.title, self.arxiv_id, self.authors[0] if self.authors else None, self.published)
+        cached = self._keys
+        if cached is not None and cached[0] == src:
+            return cached
+        self._keys = (src, *compute_keys(src))
+        return self._keys
+
     @staticmethod
     def _normalize_title(title: str) -> str:
         title = unicodedata.normalize("NFKD", title)
         title = title.lower().strip()
-        title = re.sub(r"[^a-z0-9\s]", "", title)
-        title = re.sub(r"\s+", " ", title)
+        title = _NON_ALNUM_RE.sub("", title)
+        title = _WHITESPACE_RE.sub(" ", title)
         return title
 
 
+def compute_keys(src: tuple) -> tuple[str, str]:
+    """(dedup_key, notion_key) from (title, arxiv_id, first_author, published)."""
+    title, arxiv_id, first_author, published = src
+    if arxiv_id:
+        return f"arxiv:{arxiv_id}", arxiv_id
+    norm = PaperCandidate._normalize_title(title)
+    dedup_key = f"title:{hashlib.sha256(norm.encode()).hexdigest()[:16]}"
+    parts = [norm]
+    if first_author:
+        parts.append(first_author.lower().strip())
+    if published:
+        parts.append(str(published.year))
+    return dedup_key, hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+
+def precompute_keys(papers: list[PaperCandidate], map_fn=None) -> None:
+    """Fill the key cache of many papers at once. Only papers without an
+    arxiv_id need the title normalized; their key inputs go through map_fn
+    (cpu_pool.map_chunked) so the work can run in other processes."""
+    todo = [p for p in papers if not p.arxiv_id]
+    srcs = [p._key_inputs() for p in todo]
+    keys = map_fn(compute_keys, srcs, "keys") if map_fn else [compute_keys(src) for src in srcs]
+    for p, src, (dedup_key, notion_key) in zip(todo, srcs, keys):
+        p._keys = (src, dedup_key, notion_key)
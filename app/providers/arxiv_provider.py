@@ -1,57 +1,190 @@
+"""
+arXiv API search, one shard per keyword.
+
+Shards run on a small thread pool, but every request goes through one
+process-wide RateLimiter for export.arxiv.org, so the politeness interval
+(`delay_seconds`) holds across all of them. Within a shard the next page is
+requested before the current one is parsed: results are sorted newest
+first, so a quick look at the last <published> date on the page tells
+whether another page is needed, and parsing overlaps the wait for it.
+Each shard reports its own span (pages, results, seconds spent waiting on
+the limiter) with a fetch.arxiv.parse span per page inside. Under a fetch
+deadline, a shard stops paging once another page (at the mean time pages
+have taken so far) no longer fits.
+"""
 from __future__ import annotations
 
 import logging
+import os
 import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
-import arxiv
-
 from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.resilience import DeadlineExceeded, ResilientCaller, RetryPolicy, limiter_for
+from app.services.scheduler import degrade
 
 logger = logging.getLogger(__name__)
 
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_PUBLISHED_RE = re.compile(rb"<published>([^<]+)</published>")
+_TOTAL_RE = re.compile(rb"<opensearch:totalResults[^>]*>(\d+)<")
+
+
+class UnexpectedEmptyPageError(Exception):
+    """The API sometimes answers with an empty page mid-result-set; retried."""
+
 
 class ArxivProvider:
-    def __init__(self, window_days: int = 7, max_results_per_keyword: int = 50):
+    def __init__(
+        self,
+        window_days: int = 7,
+        max_results_per_keyword: int = 50,
+        policy: RetryPolicy | None = None,
+        delay_seconds: float = 3.0,
+        max_workers: int = 4,
+        page_size: int = 100,
+        base_url: str | None = None,
+    ):
         self.window_days = window_days
         self.max_results = max_results_per_keyword
+        self.max_workers = max_workers
+        self.page_size = page_size
+        # ARXIV_BASE_URL lets benchmarks point the provider at a local fake
+        base_url = base_url or os.environ.get("ARXIV_BASE_URL")
+        self.api_url = f"{base_url.rstrip('/')}/api/query" if base_url else ARXIV_API_URL
+        import requests
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "DailyPaperBot/1.0"})
+        self.http = ResilientCaller("export.arxiv.org", policy)
+        # arXiv API terms: one request every delay_seconds, across all shards
+        self.limiter = limiter_for("export.arxiv.org", delay_seconds)
+        self._page_times: list[float] = []
+        self._page_lock = threading.Lock()
 
     def fetch(self, keywords: list[str]) -> list[PaperCandidate]:
         cutoff = datetime.now(timezone.utc) - timedelta(days=self.window_days)
-        candidates: list[PaperCandidate] = []
-
-        for kw in keywords:
-            logger.info("ArXiv: searching '%s' (last %d days)", kw, self.window_days)
-            query = f'all:"{kw}"'
-            search = arxiv.Search(
-                query=query,
-                max_results=self.max_results,
-                sort_by=arxiv.SortCriterion.SubmittedDate,
-                sort_order=arxiv.SortOrder.Descending,
-            )
-            client = arxiv.Client()
-            for result in client.results(search):
-                pub = result.published.replace(tzinfo=timezone.utc)
-                if pub < cutoff:
-                    continue
-                aid = self._extract_arxiv_id(result.entry_id)
-                candidates.append(
-                    PaperCandidate(
-                        title=result.title,
-                        url=result.entry_id,
-                        source="arxiv",
-                        arxiv_id=aid,
-                        authors=[a.name for a in result.authors],
-                        abstract=result.summary,
-                        published=pub,
-                        matched_keywords=[kw],
-                    )
+        if not keywords:
+            return []
+        workers = max(1, min(self.max_workers, len(keywords)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(telemetry.propagate(lambda kw: self._fetch_shard(kw, cutoff)), keywords))
+        return [p for shard in shards for p in shard]
+
+    # ── One shard: the pages of one keyword search ──────────────
+
+    def _fetch_shard(self, kw: str, cutoff: datetime) -> list[PaperCandidate]:
+        logger.info("ArXiv: searching '%s' (last %d days)", kw, self.window_days)
+        found: list[PaperCandidate] = []
+        with telemetry.span("fetch.arxiv.shard", keyword=kw) as shard, \
+                ThreadPoolExecutor(max_workers=1) as prefetch:
+            start = 0
+            page: Future | None = self._request_page(prefetch, kw, start)
+            while page is not None:
+                try:
+                    raw = page.result()
+                except DeadlineExceeded:
+                    degrade("fetch.arxiv", f"'{kw}': out of time at offset {start}")
+                    break
+                except Exception:
+                    logger.warning("ArXiv: search failed for '%s' at offset %d", kw, start, exc_info=True)
+                    break
+                telemetry.count("pages")
+                offset, start = start, start + self._page_len(start)
+
+                # Newest first: if this page still reaches past the cutoff, ask
+                # for the next one now and parse while it is on its way
+                published = _PUBLISHED_RE.findall(raw)
+                total = _TOTAL_RE.search(raw)
+                more = (
+                    published
+                    and start < self.max_results
+                    and (total is None or start < int(total.group(1)))
+                    and _parse_date(published[-1].decode()) >= cutoff
                 )
-            logger.info("ArXiv: got %d results for '%s'", len(candidates), kw)
+                if more and not self._page_fits():
+                    degrade("fetch.arxiv", f"'{kw}': stopped paging after {start} results")
+                    more = False
+                page = self._request_page(prefetch, kw, start) if more else None
 
-        return candidates
+                with telemetry.span("fetch.arxiv.parse", offset=offset):
+                    found.extend(self._parse_feed(raw, kw, cutoff))
+
+            telemetry.count("results", len(found))
+            logger.info(
+                "ArXiv: got %d results for '%s' (%d pages, %.1fs waiting on the rate limit)",
+                len(found), kw, shard.counters["pages"], shard.counters["limiter_wait_s"],
+            )
+        return found
+
+    def _page_fits(self) -> bool:
+        """Whether another page (rate-limit wait included) fits in the fetch deadline."""
+        remaining = self.http.deadline.remaining() if self.http.deadline else None
+        with self._page_lock:
+            mean = sum(self._page_times) / len(self._page_times) if self._page_times else 0.0
+        return remaining is None or remaining >= mean
+
+    def _page_len(self, start: int) -> int:
+        return min(self.page_size, self.max_results - start)
+
+    def _request_page(self, pool: ThreadPoolExecutor, kw: str, start: int) -> Future:
+        params = {
+            "search_query": f'all:"{kw}"',
+            "start": start,
+            "max_results": self._page_len(start),
+            "sortBy": "submittedDate",
+            "sortOrder": "descending",
+        }
+        return pool.submit(telemetry.propagate(self.http.call), self._get, params)
+
+    def _get(self, params: dict) -> bytes:
+        t0 = time.monotonic()
+        telemetry.count("limiter_wait_s", self.limiter.wait())
+        resp = self.session.get(self.api_url, params=params, timeout=self.http.attempt_timeout())
+        with self._page_lock:
+            self._page_times.append(time.monotonic() - t0)
+        resp.raise_for_status()
+        total = _TOTAL_RE.search(resp.content)
+        if b"<entry>" not in resp.content and total and params["start"] < int(total.group(1)):
+            raise UnexpectedEmptyPageError(f"empty page at offset {params['start']} of {total.group(1)}")
+        return resp.content
+
+    # ── Atom parsing ────────────────────────────────────────────
+
+    def _parse_feed(self, raw: bytes, kw: str, cutoff: datetime) -> list[PaperCandidate]:
+        found: list[PaperCandidate] = []
+        for entry in ET.fromstring(raw).iter(f"{_ATOM}entry"):
+            pub = _parse_date(entry.findtext(f"{_ATOM}published", ""))
+            if pub < cutoff:
+                continue
+            entry_id = entry.findtext(f"{_ATOM}id", "").strip()
+            found.append(
+                PaperCandidate(
+                    title=" ".join(entry.findtext(f"{_ATOM}title", "").split()),
+                    url=entry_id,
+                    source="arxiv",
+                    arxiv_id=self._extract_arxiv_id(entry_id),
+                    authors=[a.findtext(f"{_ATOM}name", "") for a in entry.iter(f"{_ATOM}author")],
+                    abstract=entry.findtext(f"{_ATOM}summary", "").strip(),
+                    published=pub,
+                    matched_keywords=[kw],
+                )
+            )
+        return found
 
     @staticmethod
     def _extract_arxiv_id(entry_id: str) -> str | None:
         m = re.search(r"(\d{4}\.\d{4,5})(v\d+)?$", entry_id)
         return m.group(1) if m else None
+
+
+def _parse_date(value: str) -> datetime:
+    """arXiv timestamps look like 2026-02-27T18:00:01Z."""
+    return datetime.fromisoformat(value.strip().replace("Z", "+00:00")).astimezone(timezone.utc)
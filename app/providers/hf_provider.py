@@ -1,24 +1,51 @@
 from __future__ import annotations
 
+import codecs
+import html
+import json
 import logging
+import os
 import re
-from datetime import datetime, timezone
-
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import cache, partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.resilience import ResilientCaller, RetryPolicy
+
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
-HF_PAPERS_URL = "https://huggingface.co/papers"
-HF_API_URL = "https://huggingface.co/api/daily_papers"
+HF_BASE_URL = "https://huggingface.co"
+STREAM_CHUNK_BYTES = 64 * 1024
 
 
 class HuggingFaceProvider:
-    def __init__(self):
+    def __init__(
+        self,
+        window_days: int = 7,
+        cache_dir: Path | None = None,
+        max_workers: int = 4,
+        policy: RetryPolicy | None = None,
+        base_url: str | None = None,
+    ):
+        # HF_BASE_URL lets benchmarks point the provider at a local fake
+        base_url = (base_url or os.environ.get("HF_BASE_URL") or HF_BASE_URL).rstrip("/")
+        self.api_url = f"{base_url}/api/daily_papers"
+        self.papers_url = f"{base_url}/papers"
+        self.window_days = window_days
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        import requests
+
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": "DailyPaperBot/1.0"})
+        self.http = ResilientCaller("huggingface.co", policy)
 
     def fetch(self, keywords: list[str]) -> list[PaperCandidate]:
         candidates: list[PaperCandidate] = []
@@ -33,85 +60,126 @@ class HuggingFaceProvider:
         return candidates
 
     def _fetch_api(self, keywords: list[str]) -> list[PaperCandidate]:
-        results: list[PaperCandidate] = []
+        today = date.today()
+        days = [today - timedelta(days=i) for i in range(max(self.window_days, 1))]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            per_day = list(pool.map(telemetry.propagate(lambda d: self._fetch_day(d, today, keywords)), days))
+
+        if all(found is None for found in per_day):
+            logger.warning("HF API fetch failed for every day, will try HTML scrape")
+            return []
+
+        results = [p for found in per_day if found for p in found]
+        logger.info("HF API: found %d matching papers", len(results))
+        return results
+
+    def _fetch_day(self, day: date, today: date, keywords: list[str]) -> list[PaperCandidate] | None:
+        """Matching papers listed for one date. Past days are cached permanently
+        (the raw payload, written as it streams in); today is always refetched
+        so its like counts stay fresh."""
+        cache_path = self.cache_dir / f"{day.isoformat()}.json" if self.cache_dir else None
+        if cache_path and day < today and cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    found = self._parse_stream(iter(partial(f.read, STREAM_CHUNK_BYTES), b""), keywords, day)
+                telemetry.count("cache_hits")
+                return found
+            except ValueError:
+                logger.warning("Ignoring corrupt HF cache file %s", cache_path)
+
         try:
-            resp = self.session.get(HF_API_URL, timeout=30)
-            resp.raise_for_status()
-            papers = resp.json()
+            return self.http.call(self._stream_day, day, keywords, cache_path if day < today else None)
+        except ValueError:
+            logger.warning("Unexpected HF API payload for %s", day, exc_info=True)
         except Exception:
-            logger.warning("HF API fetch failed, will try HTML scrape", exc_info=True)
-            return results
+            logger.warning("HF API fetch failed for %s", day, exc_info=True)
+        return None
 
-        for item in papers:
-            paper = item.get("paper", {})
-            title = paper.get("title", "")
-            abstract = paper.get("summary", "")
-            text = f"{title} {abstract}".lower()
-            matched = [kw for kw in keywords if kw.lower() in text]
-            if not matched:
-                continue
+    def _stream_day(self, day: date, keywords: list[str], cache_path: Path | None) -> list[PaperCandidate]:
+        """One attempt: parse the day's payload chunk by chunk as it arrives.
+        A connection lost mid-body fails the attempt and the retry starts over."""
+        with self.session.get(
+            self.api_url, params={"date": day.isoformat()}, stream=True, timeout=self.http.attempt_timeout(),
+        ) as resp:
+            resp.raise_for_status()
+            chunks = _counted(resp.iter_content(STREAM_CHUNK_BYTES))
+            if cache_path is None:
+                return self._parse_stream(chunks, keywords, day)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                found = self._parse_stream(_tee(chunks, f), keywords, day)
+            tmp.replace(cache_path)
+            return found
 
-            arxiv_id = paper.get("id")  # HF API often uses arxiv id as paper id
-            pub_str = paper.get("publishedAt") or item.get("publishedAt")
-            published = None
-            if pub_str:
-                try:
-                    published = datetime.fromisoformat(pub_str.replace("Z", "+00:00"))
-                except ValueError:
-                    pass
-
-            url = f"https://huggingface.co/papers/{arxiv_id}" if arxiv_id else ""
-            results.append(
-                PaperCandidate(
-                    title=title,
-                    url=url,
-                    source="huggingface",
-                    arxiv_id=arxiv_id,
-                    authors=[a.get("name", "") for a in paper.get("authors", []) if isinstance(a, dict)],
-                    abstract=abstract,
-                    published=published,
-                    hf_likes=item.get("numLikes", 0),
-                    matched_keywords=matched,
-                )
-            )
+    def _parse_stream(self, chunks: Iterable[bytes], keywords: list[str], day: date) -> list[PaperCandidate]:
+        """Keyword-filter each item of a daily_papers payload as soon as it is
+        decoded; only the matches are kept."""
+        listed = 0
+        found: list[PaperCandidate] = []
+        with telemetry.span("fetch.huggingface.parse", day=day.isoformat()):
+            needles = [(kw, kw.lower()) for kw in keywords]
+            for item in _iter_json_array(chunks):
+                listed += 1
+                paper = _parse_api_item(item, needles)
+                if paper is not None:
+                    found.append(paper)
+            telemetry.count("items", listed)
+        logger.info("HF API: %d papers listed for %s, %d matching", listed, day, len(found))
+        return found
 
+    def _parse_api_items(self, papers: Iterable[dict], keywords: list[str]) -> list[PaperCandidate]:
+        needles = [(kw, kw.lower()) for kw in keywords]
+        results: list[PaperCandidate] = []
+        for item in papers:
+            paper = _parse_api_item(item, needles)
+            if paper is not None:
+                results.append(paper)
         logger.info("HF API: found %d matching papers", len(results))
         return results
 
     def _fetch_html(self, keywords: list[str]) -> list[PaperCandidate]:
-        results: list[PaperCandidate] = []
         try:
-            resp = self.session.get(HF_PAPERS_URL, timeout=30)
-            resp.raise_for_status()
+            resp = self._get(self.papers_url)
         except Exception:
             logger.warning("HF HTML fetch failed", exc_info=True)
+            return []
+        with telemetry.span("fetch.huggingface.parse", html=True):
+            return self._parse_html(resp.text, keywords)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        def attempt() -> requests.Response:
+            resp = self.session.get(url, timeout=self.http.attempt_timeout(), **kwargs)
+            resp.raise_for_status()
+            telemetry.count("bytes", len(resp.content))
+            return resp
+
+        return self.http.call(attempt)
+
+    def _parse_html(self, text: str, keywords: list[str]) -> list[PaperCandidate]:
+        # The page embeds the same JSON the API returns (with abstracts and
+        # authors); pull it out directly and skip building a DOM.
+        embedded = _extract_embedded_papers(text)
+        if embedded is not None:
+            results = self._parse_api_items(embedded, keywords)
+            logger.info("HF HTML (embedded JSON): found %d matching papers", len(results))
             return results
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for article in soup.select("article"):
-            title_el = article.select_one("h3 a")
-            if not title_el:
-                continue
-            title = title_el.get_text(strip=True)
-            href = title_el.get("href", "")
+        results: list[PaperCandidate] = []
+        rows = _extract_articles_lxml(text) if _lxml_html() is not None else _extract_articles_bs4(text)
+        for row in rows:
+            title = row["title"]
+            href = row["href"]
             url = f"https://huggingface.co{href}" if href.startswith("/") else href
 
-            # Extract likes
-            likes = 0
-            like_el = article.select_one("[class*='like']")
-            if like_el:
-                m = re.search(r"(\d+)", like_el.get_text())
-                if m:
-                    likes = int(m.group(1))
-
             # Extract arxiv_id from URL
             arxiv_id = None
             m = re.search(r"(\d{4}\.\d{4,5})", href)
             if m:
                 arxiv_id = m.group(1)
 
-            text = title.lower()
-            matched = [kw for kw in keywords if kw.lower() in text]
+            text_lc = f"{title} {row['abstract']}".lower()
+            matched = [kw for kw in keywords if kw.lower() in text_lc]
             if not matched:
                 continue
 
@@ -121,10 +189,215 @@ class HuggingFaceProvider:
                     url=url,
                     source="huggingface",
                     arxiv_id=arxiv_id,
-                    hf_likes=likes,
+                    authors=row["authors"],
+                    abstract=row["abstract"],
+                    hf_likes=row["likes"],
                     matched_keywords=matched,
                 )
             )
 
         logger.info("HF HTML: found %d matching papers", len(results))
         return results
+
+
+# ── HTML extractors ─────────────────────────────────────────────
+
+_EMBEDDED_TAG_RE = re.compile(r"<[^>]*data-target=\"DailyPapers\"[^>]*>")
+_DATA_PROPS_RE = re.compile(r'data-props="([^"]*)"')
+
+
+def _parse_api_item(item: dict, needles: list[tuple[str, str]]) -> PaperCandidate | None:
+    """One daily_papers item as a candidate, or None if no keyword matches.
+    needles: (keyword, keyword lowercased)."""
+    paper = item.get("paper", {})
+    title = paper.get("title", "")
+    abstract = paper.get("summary", "")
+    text = f"{title} {abstract}".lower()
+    matched = [kw for kw, needle in needles if needle in text]
+    if not matched:
+        return None
+
+    arxiv_id = paper.get("id")  # HF API often uses arxiv id as paper id
+    pub_str = paper.get("publishedAt") or item.get("publishedAt")
+    published = None
+    if pub_str:
+        try:
+            published = datetime.fromisoformat(pub_str.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+
+    url = f"https://huggingface.co/papers/{arxiv_id}" if arxiv_id else ""
+    return PaperCandidate(
+        title=title,
+        url=url,
+        source="huggingface",
+        arxiv_id=arxiv_id,
+        authors=[a.get("name", "") for a in paper.get("authors", []) if isinstance(a, dict)],
+        abstract=abstract,
+        published=published,
+        hf_likes=item.get("numLikes", 0),
+        matched_keywords=matched,
+    )
+
+
+# ── Streaming JSON ───────────────────────────────────────────────
+# The stdlib has no incremental parser, so elements of the top-level array
+# are cut out of a rolling text buffer with JSONDecoder.raw_decode. Memory
+# holds about one chunk plus the element being decoded, however long the
+# payload; an element split across chunks is retried once more has arrived.
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"
+MAX_ELEMENT_CHARS = 16 * 2**20
+
+
+def _iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """Yield the elements of a JSON array read from a stream of byte chunks.
+    Raises ValueError if the stream does not hold a well-formed array."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos, eof = "", 0, False
+    # "[" -> "first" (a value, or "]" if empty) -> "," (or "]") -> "value" -> ","
+    expect = "["
+
+    def refill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        eof = chunk is None
+        buf = buf[pos:] + utf8.decode(chunk or b"", final=eof)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if not refill():
+                raise ValueError("JSON array ends early")
+            continue
+        c = buf[pos]
+        if expect == "[":
+            if c != "[":
+                raise ValueError(f"expected a JSON array, got {c!r}")
+            pos += 1
+            expect = "first"
+        elif c == "]" and expect != "value":
+            break
+        elif expect == ",":
+            if c != ",":
+                raise ValueError(f"expected ',' or ']' at {c!r}")
+            pos += 1
+            expect = "value"
+        else:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A value is complete once a delimiter follows it: "12" or "1."
+                # at the end of a chunk may be the start of "123" or "1.5"
+                complete = eof or (end < len(buf) and buf[end] in _DELIMITERS)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                if len(buf) - pos > MAX_ELEMENT_CHARS:
+                    raise ValueError(f"JSON array element over {MAX_ELEMENT_CHARS} characters")
+                refill()
+                continue
+            yield value
+            pos = end
+            expect = ","
+
+    # Drain the rest, so a tee'd cache file gets the whole payload
+    pos += 1
+    while True:
+        if buf[pos:].strip():
+            raise ValueError("trailing data after JSON array")
+        if not refill():
+            return
+
+
+def _counted(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        telemetry.count("bytes", len(chunk))
+        yield chunk
+
+
+def _tee(chunks: Iterable[bytes], sink) -> Iterator[bytes]:
+    for chunk in chunks:
+        sink.write(chunk)
+        yield chunk
+
+
+def _extract_embedded_papers(text: str) -> list[dict] | None:
+    """Return the `dailyPapers` list from the page's hydration props, if present."""
+    tag = _EMBEDDED_TAG_RE.search(text)
+    if not tag:
+        return None
+    props = _DATA_PROPS_RE.search(tag.group(0))
+    if not props:
+        return None
+    try:
+        data = json.loads(html.unescape(props.group(1)))
+    except ValueError:
+        logger.warning("HF HTML: could not decode embedded papers JSON")
+        return None
+    papers = data.get("dailyPapers") if isinstance(data, dict) else None
+    return papers if isinstance(papers, list) else None
+
+
+@cache
+def _lxml_html():
+    """lxml.html if installed (optional: faster HTML fallback parsing)."""
+    try:
+        from lxml import html
+    except ImportError:
+        return None
+    return html
+
+
+def _parse_likes(text: str) -> int:
+    m = re.search(r"(\d+)", text)
+    return int(m.group(1)) if m else 0
+
+
+def _extract_articles_lxml(text: str) -> list[dict]:
+    rows: list[dict] = []
+    doc = _lxml_html().fromstring(text)
+    for article in doc.iter("article"):
+        links = article.xpath(".//h3//a")
+        if not links:
+            continue
+        like_els = article.xpath(".//*[contains(@class, 'like')]")
+        abstract_els = article.xpath(".//p")
+        rows.append({
+            "title": links[0].text_content().strip(),
+            "href": links[0].get("href", ""),
+            "likes": _parse_likes(like_els[0].text_content()) if like_els else 0,
+            "authors": [li.get("title") for li in article.xpath(".//li[@title]")],
+            "abstract": abstract_els[0].text_content().strip() if abstract_els else "",
+        })
+    return rows
+
+
+def _extract_articles_bs4(text: str) -> list[dict]:
+    from bs4 import BeautifulSoup
+
+    rows: list[dict] = []
+    soup = BeautifulSoup(text, "html.parser")
+    for article in soup.select("article"):
+        title_el = article.select_one("h3 a")
+        if not title_el:
+            continue
+        like_el = article.select_one("[class*='like']")
+        abstract_el = article.select_one("p")
+        rows.append({
+            "title": title_el.get_text(strip=True),
+            "href": title_el.get("href", ""),
+            "likes": _parse_likes(like_el.get_text()) if like_el else 0,
+            "authors": [li["title"] for li in article.select("li[title]")],
+            "abstract": abstract_el.get_text(strip=True) if abstract_el else "",
+        })
+    return rows
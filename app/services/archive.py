@@ -0,0 +1,213 @@
+"""
+Local columnar archive of every merged candidate (needs pyarrow, in
+requirements.txt; runs without it skip the archive).
+
+Each run writes one Arrow IPC file per digest date, `<root>/<date>.arrow`,
+with a row per candidate and profile whose keywords it matched: metadata,
+the profile's score (null for papers already in its Notes DB, which are not
+ranked), whether it made the digest and whether it had a note already. A
+later run for the same date (an incremental update) replaces the date's
+file, so each date holds its latest run.
+
+Files are uncompressed so queries memory-map them: only the columns a query
+touches are paged in, and partitions outside its date range are never
+opened. PaperArchive keeps the mapped partitions between queries, so
+questions over years of runs answer in milliseconds without Notion:
+
+    archive = PaperArchive(cache_dir() / "archive")
+    archive.weekly_counts("world model")     # [(week, distinct papers), ...]
+    archive.skipped(start=date(2026, 1, 1))  # ranked but never selected
+
+With rerank enabled, the shortlisted papers carry the blended score and
+the rest their heuristic score, as in the run itself.
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+from app.models import PaperCandidate
+
+logger = logging.getLogger(__name__)
+
+
+def available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+@dataclass(frozen=True, slots=True)
+class ArchiveRow:
+    profile: str
+    paper: PaperCandidate
+    score: float | None  # None: not ranked
+    selected: bool
+    seen: bool  # had a note before this run
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("date", pa.date32()),
+        ("profile", pa.string()),
+        ("key", pa.string()),  # dedup_key
+        ("notion_key", pa.string()),
+        ("arxiv_id", pa.string()),
+        ("title", pa.string()),
+        ("url", pa.string()),
+        ("source", pa.string()),
+        ("authors", pa.list_(pa.string())),
+        ("published", pa.timestamp("us", tz="UTC")),
+        ("hf_likes", pa.int32()),
+        ("matched_keywords", pa.list_(pa.string())),
+        ("score", pa.float64()),
+        ("selected", pa.bool_()),
+        ("seen", pa.bool_()),
+    ])
+
+
+class PaperArchive:
+    def __init__(self, root: Path):
+        self.root = root
+        # path -> (mtime_ns, mapped table)
+        self._mapped: dict[Path, tuple[int, object]] = {}
+
+    def path_for(self, day: date) -> Path:
+        return self.root / f"{day.isoformat()}.arrow"
+
+    # ── Writing ─────────────────────────────────────────────────
+
+    def write(self, day: date, rows: Iterable[ArchiveRow]) -> Path:
+        """Write (or replace) the partition of `day`."""
+        import pyarrow as pa
+
+        rows = list(rows)
+        columns = {
+            "date": [day] * len(rows),
+            "profile": [r.profile for r in rows],
+            "key": [r.paper.dedup_key for r in rows],
+            "notion_key": [r.paper.notion_key for r in rows],
+            "arxiv_id": [r.paper.arxiv_id for r in rows],
+            "title": [r.paper.title for r in rows],
+            "url": [r.paper.url for r in rows],
+            "source": [r.paper.source for r in rows],
+            "authors": [r.paper.authors for r in rows],
+            "published": [r.paper.published for r in rows],
+            "hf_likes": [r.paper.hf_likes for r in rows],
+            "matched_keywords": [r.paper.matched_keywords for r in rows],
+            "score": [r.score for r in rows],
+            "selected": [r.selected for r in rows],
+            "seen": [r.seen for r in rows],
+        }
+        table = pa.Table.from_pydict(columns, schema=_schema())
+        path = self.path_for(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as out:
+            out.write_table(table)
+        tmp.replace(path)
+        logger.info("Archived %d candidate rows to %s", len(rows), path)
+        return path
+
+    # ── Queries ─────────────────────────────────────────────────
+
+    def days(self) -> list[date]:
+        days = []
+        for path in self.root.glob("*.arrow"):
+            try:
+                days.append(date.fromisoformat(path.stem))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def scan(
+        self,
+        columns: list[str] | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        profile: str | None = None,
+    ):
+        """The archived rows of run dates in [start, end] as one pyarrow.Table."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        needed = list(dict.fromkeys([*columns, *(["profile"] if profile else [])])) if columns else None
+        tables = [
+            self._open(self.path_for(d)).select(needed) if needed else self._open(self.path_for(d))
+            for d in self.days()
+            if (start is None or d >= start) and (end is None or d <= end)
+        ]
+        if not tables:
+            schema = _schema()
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+        table = pa.concat_tables(tables).combine_chunks()
+        if profile:
+            table = table.filter(pc.equal(table["profile"], profile))
+        return table.select(columns) if columns else table
+
+    def weekly_counts(
+        self,
+        keyword: str,
+        start: date | None = None,
+        end: date | None = None,
+        profile: str | None = None,
+    ) -> list[tuple[date, int]]:
+        """Distinct papers matching `keyword` per week (Monday) of publication,
+        over runs dated [start, end]."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        table = self.scan(["date", "key", "published", "matched_keywords"], start, end, profile)
+        keywords = table["matched_keywords"]
+        hits = pc.filter(pc.list_parent_indices(keywords), pc.equal(pc.list_flatten(keywords), keyword))
+        rows = table.take(hits)
+        day = pc.coalesce(pc.cast(rows["published"], pa.date32()), rows["date"])
+        pairs = pa.table({"week": pc.floor_temporal(day, unit="week"), "key": rows["key"]})
+        counts = (
+            pairs.group_by(["week", "key"]).aggregate([])
+            .group_by("week").aggregate([("key", "count")])
+            .sort_by("week")
+        )
+        return list(zip(counts["week"].to_pylist(), counts["key_count"].to_pylist()))
+
+    def skipped(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        profile: str | None = None,
+    ) -> list[dict]:
+        """Papers a profile ranked in runs dated [start, end] but never
+        selected there, best score first."""
+        import pyarrow.compute as pc
+
+        table = self.scan(["date", "profile", "key", "title", "url", "score", "selected"], start, end, profile)
+        table = table.filter(pc.is_valid(table["score"]))
+        papers = table.group_by(["profile", "key"]).aggregate([
+            ("selected", "any"), ("score", "max"), ("title", "max"), ("url", "max"),
+            ("date", "min"), ("date", "count"),
+        ])
+        papers = papers.filter(pc.invert(papers["selected_any"])).sort_by([("score_max", "descending")])
+        return [
+            {
+                "profile": row["profile"], "key": row["key"], "title": row["title_max"], "url": row["url_max"],
+                "best_score": row["score_max"], "first_ranked": row["date_min"], "runs": row["date_count"],
+            }
+            for row in papers.to_pylist()
+        ]
+
+    def _open(self, path: Path):
+        """Memory-mapped table of one partition, reused until the file changes."""
+        import pyarrow as pa
+
+        mtime = path.stat().st_mtime_ns
+        cached = self._mapped.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        self._mapped[path] = (mtime, table)
+        return table
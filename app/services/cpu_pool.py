@@ -0,0 +1,99 @@
+"""
+Process pool for the CPU-bound bulk stages (title normalization for keys,
+note markdown -> Notion blocks) on large inputs such as backfills.
+
+Under the GIL those stages use one core however many threads run them.
+map_chunked() sends large inputs to worker processes instead, in contiguous
+chunks (one pickle per chunk, not per item) holding only the plain strings
+a function needs, never whole PaperCandidates. Inputs smaller than the
+stage's `min_items`, or a machine with one core, stay in-process, so daily
+runs never start a process. Each stage has its own threshold: rendering a
+note costs about as much as normalizing ~85 titles. The pool is started on
+first use, reused for the rest of the run and shut down at exit.
+
+Workers are started with forkserver (spawn where that is missing): the
+pipeline runs thread pools, and forking a threaded process can deadlock.
+"""
+from __future__ import annotations
+
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Sequence, TypeVar
+
+from app.services import telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MIN_ITEMS = {"keys": 20_000, "notes": 500}
+
+_settings: dict = {"min_items": dict(DEFAULT_MIN_ITEMS), "max_workers": None, "chunk_size": None}
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_lock = threading.Lock()
+
+
+def configure(min_items: dict | None = None, max_workers: int | None = None, chunk_size: int | None = None) -> None:
+    """Set the thresholds from the `cpu_pool` section of config.yaml.
+    max_workers None: one per core; chunk_size None: ~4 chunks per worker."""
+    _settings.update(
+        min_items={**DEFAULT_MIN_ITEMS, **(min_items or {})}, max_workers=max_workers, chunk_size=chunk_size,
+    )
+
+
+def workers() -> int:
+    return max(1, _settings["max_workers"] or os.cpu_count() or 1)
+
+
+def worth(n: int, stage: str) -> bool:
+    """Whether n items of `stage` ("keys", "notes") are enough to go to the pool."""
+    return n >= _settings["min_items"][stage] and workers() > 1
+
+
+def map_chunked(fn: Callable[[T], R], items: Sequence[T], stage: str) -> list[R]:
+    """[fn(x) for x in items], in worker processes when worth(len(items), stage).
+    fn must be a module-level function; items and results must pickle."""
+    if not worth(len(items), stage):
+        return [fn(x) for x in items]
+    n = workers()
+    size = _settings["chunk_size"] or -(-len(items) // (n * 4))
+    chunks = [items[i : i + size] for i in range(0, len(items), size)]
+    telemetry.count("cpu_pool_items", len(items))
+    telemetry.count("cpu_pool_chunks", len(chunks))
+    results = _get_pool(n).map(_apply, itertools.repeat(fn), chunks)
+    return [r for chunk in results for r in chunk]
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _apply(fn: Callable[[T], R], chunk: Sequence[T]) -> list[R]:
+    return [fn(x) for x in chunk]
+
+
+def _get_pool(n: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is None or _pool_workers != n:
+            if _pool is not None:
+                _pool.shutdown()
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context(method))
+            _pool_workers = n
+            logger.info("CPU pool: started %d worker processes", n)
+        return _pool
+
+
+atexit.register(shutdown)
@@ -0,0 +1,317 @@
+"""
+Optional full-text stage for the selected top-k papers.
+
+PDFs are stream-downloaded from arXiv, through the same process-wide rate
+limiter as the arXiv API searches, into a content-addressed cache
+(`pdf/<sha256>.pdf`), text is extracted once per PDF in a process pool
+(`text/<sha256>.txt`) and an index maps arXiv ids to content hashes, so a
+repeat run neither downloads nor parses a paper it has already seen. The
+cache is size-capped: least recently used files are evicted, PDFs before
+extracted text.
+
+Before the text goes into a note prompt it is cut down to a token budget,
+preferring the method and experiment sections over the introduction and
+dropping references and appendices.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.resilience import ResilientCaller, RetryPolicy, limiter_for
+from app.services.summarizer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+ARXIV_PDF_BASE_URL = "https://arxiv.org"
+_CHUNK_SIZE = 64 * 1024
+
+# ── Section selection ────────────────────────────────────────────
+
+_SECTION_NAMES = (
+    r"abstract|introduction|related work|background|preliminar(?:y|ies)|problem (?:setup|formulation|statement)"
+    r"|methods?|methodology|approach|(?:proposed )?(?:model|framework|system|architecture)|overview"
+    r"|experiments?(?:al (?:setup|results))?|results|evaluation|analysis|ablations?(?: stud(?:y|ies))?"
+    r"|discussion|limitations?|conclusions?(?: and future work)?|future work"
+    r"|references|bibliography|acknowledge?ments?|appendi(?:x|ces)|supplementary material"
+)
+# "3 Method", "3.2. Training", "IV. EXPERIMENTS", or a bare well-known section name
+_HEADING_RE = re.compile(
+    rf"^(?:(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z][^\n]{{0,70}}|(?i:{_SECTION_NAMES})\s*)$",
+    re.MULTILINE,
+)
+_DROP_RE = re.compile(r"references|bibliography|acknowledge?ment|appendi|supplementary", re.I)
+_PRIORITY = (
+    (re.compile(r"method|approach|model|framework|architecture|system|overview|formulation|setup|preliminar", re.I), 0),
+    (re.compile(r"experiment|result|evaluation|ablation|analysis", re.I), 1),
+    (re.compile(r"introduction", re.I), 2),
+    (re.compile(r"conclusion|limitation|discussion|future", re.I), 3),
+)
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """Split extracted PDF text into (heading, body) pairs in document order."""
+    sections: list[tuple[str, str]] = []
+    matches = list(_HEADING_RE.finditer(text))
+    if not matches or matches[0].start() > 0:
+        sections.append(("", text[: matches[0].start() if matches else len(text)]))
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        body = text[m.end(): nxt.start() if nxt else len(text)]
+        sections.append((m.group(0).strip(), body))
+    return sections
+
+
+def _section_priority(heading: str) -> int:
+    for pattern, prio in _PRIORITY:
+        if pattern.search(heading):
+            return prio
+    return 4
+
+
+def select_sections(text: str, token_budget: int) -> str:
+    """Cut full text to ~token_budget tokens, keeping the most useful sections.
+
+    Everything from the references onwards is dropped, as are the preamble and
+    abstract (the abstract is already in the prompt). Sections are chosen by
+    priority (method > experiments > introduction > conclusion > rest) and
+    emitted in document order; the last one chosen is truncated to fit.
+    """
+    if token_budget <= 0 or not text.strip():
+        return ""
+    kept: list[tuple[int, str, str]] = []
+    for idx, (heading, body) in enumerate(split_sections(text)):
+        if _DROP_RE.search(heading):
+            break
+        if not heading or heading.lower().startswith("abstract"):
+            continue
+        kept.append((idx, heading, body.strip()))
+    if not kept:
+        # No recognisable structure: take the head of the document
+        return text[: token_budget * 4].strip()
+
+    chosen: dict[int, str] = {}
+    remaining = token_budget
+    for idx, heading, body in sorted(kept, key=lambda s: (_section_priority(s[1]), s[0])):
+        block = f"{heading}\n{body}"
+        cost = estimate_tokens(block)
+        if cost <= remaining:
+            chosen[idx] = block
+            remaining -= cost
+        elif remaining > 50:
+            chosen[idx] = block[: remaining * 4].rstrip() + " …"
+            remaining = 0
+        if remaining <= 0:
+            break
+    return "\n\n".join(chosen[i] for i in sorted(chosen))
+
+
+# ── PDF text extraction (runs in worker processes) ───────────────
+
+_SOFT_HYPHEN_RE = re.compile(r"(\w)-\n(\w)")
+
+
+def _extract_pdf_text(path: str) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return _SOFT_HYPHEN_RE.sub(r"\1\2", "\n".join(pages))
+
+
+# ── Fetcher ──────────────────────────────────────────────────────
+
+class FullTextFetcher:
+    def __init__(
+        self,
+        cache_dir: Path,
+        token_budget: int = 6000,
+        max_cache_bytes: int = 500 * 1024 * 1024,
+        max_pdf_bytes: int = 30 * 1024 * 1024,
+        max_workers: int = 4,
+        policy: RetryPolicy | None = None,
+        base_url: str | None = None,
+        delay_seconds: float = 3.0,
+    ):
+        # ARXIV_BASE_URL lets benchmarks point downloads at a local fake
+        self.base_url = (base_url or os.environ.get("ARXIV_BASE_URL") or ARXIV_PDF_BASE_URL).rstrip("/")
+        self.cache_dir = cache_dir
+        self.token_budget = token_budget
+        self.max_cache_bytes = max_cache_bytes
+        self.max_pdf_bytes = max_pdf_bytes
+        self.max_workers = max_workers
+        import requests
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "DailyPaperBot/1.0"})
+        self.http = ResilientCaller("arxiv.org", policy)
+        # arXiv's access policy covers all of its hosts: PDF downloads share
+        # the API searches' limiter, one request every delay_seconds
+        self.limiter = limiter_for("export.arxiv.org", delay_seconds)
+        self._index_lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    @property
+    def _pdf_dir(self) -> Path:
+        return self.cache_dir / "pdf"
+
+    @property
+    def _text_dir(self) -> Path:
+        return self.cache_dir / "text"
+
+    @property
+    def _index_path(self) -> Path:
+        return self.cache_dir / "index.json"
+
+    def fetch(self, papers: list[PaperCandidate]) -> None:
+        """Fill paper.full_text (token-budgeted) for every paper with an arXiv id.
+        Concurrent callers are serialized so they share one view of the cache."""
+        with self._fetch_lock:
+            self._fetch(papers)
+
+    def _fetch(self, papers: list[PaperCandidate]) -> None:
+        if importlib.util.find_spec("pypdf") is None:  # optional dependency
+            logger.warning("Full text: pypdf is not installed, skipping (pip install pypdf)")
+            return
+        papers = [p for p in papers if p.arxiv_id]
+        if not papers:
+            return
+
+        index = self._load_index()
+        todo = [p for p in papers if not self._text_path(index.get(p.arxiv_id))]
+        telemetry.count("cache_hits", len(papers) - len(todo))
+
+        # 1) Download whatever is not cached yet (I/O bound: threads)
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                shas = list(pool.map(telemetry.propagate(lambda p: self._download(p, index)), todo))
+            for p, sha in zip(todo, shas):
+                if sha:
+                    index[p.arxiv_id] = sha
+            self._save_index(index)
+
+        # 2) Extract text once per PDF (CPU bound: processes)
+        to_parse = sorted({
+            index[p.arxiv_id] for p in todo
+            if p.arxiv_id in index and not self._text_path(index[p.arxiv_id])
+        })
+        if to_parse:
+            self._extract(to_parse)
+
+        # 3) Budget each paper's text for the note prompt
+        for p in papers:
+            text_path = self._text_path(index.get(p.arxiv_id))
+            if text_path:
+                os.utime(text_path)  # LRU: mark as recently used
+                p.full_text = select_sections(text_path.read_text(), self.token_budget)
+        self._evict()
+
+    # ── Download ────────────────────────────────────────────────
+
+    def _download(self, paper: PaperCandidate, index: dict[str, str]) -> str | None:
+        sha = index.get(paper.arxiv_id)
+        if sha and (self._pdf_dir / f"{sha}.pdf").exists():
+            return sha  # downloaded earlier, only the text is missing
+        url = f"{self.base_url}/pdf/{paper.arxiv_id}"
+        try:
+            return self.http.call(self._stream_to_cache, url)
+        except Exception:
+            logger.warning("Full text: download failed for %s", paper.arxiv_id, exc_info=True)
+            return None
+
+    def _stream_to_cache(self, url: str) -> str:
+        """Stream a PDF to disk, hashing as it goes; returns its sha256."""
+        self._pdf_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        tmp = self._pdf_dir / f".{threading.get_ident()}-{os.getpid()}.part"
+        telemetry.count("limiter_wait_s", self.limiter.wait())
+        try:
+            with self.session.get(url, stream=True, timeout=self.http.attempt_timeout()) as resp:
+                resp.raise_for_status()
+                declared = int(resp.headers.get("Content-Length") or 0)
+                if declared > self.max_pdf_bytes:
+                    raise ValueError(f"PDF too large ({declared} bytes): {url}")
+                with open(tmp, "wb") as f:
+                    for chunk in resp.iter_content(_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_pdf_bytes:
+                            raise ValueError(f"PDF exceeds {self.max_pdf_bytes} bytes: {url}")
+                        digest.update(chunk)
+                        f.write(chunk)
+            sha = digest.hexdigest()
+            tmp.replace(self._pdf_dir / f"{sha}.pdf")
+        finally:
+            tmp.unlink(missing_ok=True)
+        telemetry.count("bytes", size)
+        telemetry.count("downloads")
+        return sha
+
+    # ── Extraction ──────────────────────────────────────────────
+
+    def _extract(self, shas: list[str]) -> None:
+        self._text_dir.mkdir(parents=True, exist_ok=True)
+        paths = [str(self._pdf_dir / f"{sha}.pdf") for sha in shas]
+        workers = max(1, min(self.max_workers, len(paths)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_pdf_text, path) for path in paths]
+            for sha, future in zip(shas, futures):
+                try:
+                    text = future.result()
+                except Exception:
+                    logger.warning("Full text: could not parse %s.pdf", sha, exc_info=True)
+                    continue
+                tmp = self._text_dir / f"{sha}.tmp"
+                tmp.write_text(text)
+                tmp.replace(self._text_dir / f"{sha}.txt")
+                telemetry.count("parsed")
+
+    # ── Cache bookkeeping ───────────────────────────────────────
+
+    def _text_path(self, sha: str | None) -> Path | None:
+        if not sha:
+            return None
+        path = self._text_dir / f"{sha}.txt"
+        return path if path.exists() else None
+
+    def _load_index(self) -> dict[str, str]:
+        try:
+            return json.loads(self._index_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Ignoring corrupt full-text index %s", self._index_path)
+            return {}
+
+    def _save_index(self, index: dict[str, str]) -> None:
+        with self._index_lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(index, sort_keys=True))
+            tmp.replace(self._index_path)
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits max_cache_bytes.
+        PDFs go first: once extracted, only their text is needed."""
+        files = [
+            (path, path.stat())
+            for folder in (self._pdf_dir, self._text_dir) if folder.exists()
+            for path in folder.iterdir() if path.suffix in (".pdf", ".txt")
+        ]
+        total = sum(st.st_size for _, st in files)
+        if total <= self.max_cache_bytes:
+            return
+        for path, st in sorted(files, key=lambda f: (f[0].suffix == ".txt", f[1].st_mtime)):
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            telemetry.count("evicted")
+            if total <= self.max_cache_bytes:
+                break
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import logging
 
-from app.models import PaperCandidate
+from app.models import PaperCandidate, precompute_keys
+from app.services import cpu_pool
 
 logger = logging.getLogger(__name__)
 
 
 def merge_and_dedupe(all_candidates: list[PaperCandidate]) -> list[PaperCandidate]:
     """Merge candidates from all providers, deduplicate, and enrich."""
+    if cpu_pool.worth(len(all_candidates), "keys"):
+        # Backfill-sized input: normalize titles for the keys across cores first
+        precompute_keys(all_candidates, cpu_pool.map_chunked)
     seen: dict[str, PaperCandidate] = {}
 
     for paper in all_candidates:
@@ -1,22 +1,144 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
 import re
+import threading
+from dataclasses import dataclass, field
 from datetime import date
-
-from notion_client import Client
+from pathlib import Path
 
 from app.models import PaperCandidate
+from app.services import cpu_pool, telemetry
+from app.services.resilience import ResilientCaller, RetryPolicy
+from app.services.scheduler import degrade
+from app.services.structured import Item
 
 logger = logging.getLogger(__name__)
 
+_MAX_CHILDREN = 100  # Notion: blocks per create / append request
+
+_NOTE_LINK = "📄 Detailed Note"
+_SECTION_RE = re.compile(r"^(\d+)\.\s+")
+_TOP_RE = re.compile(r"^今日论文（Top \d+）$")
+
+# Profiles sharing a Notes DB write concurrently; one writer per note Key at a
+# time keeps two of them from both creating the same page.
+_note_locks: dict[tuple[str, str], threading.Lock] = {}
+_note_locks_guard = threading.Lock()
+
+
+def _note_lock(notes_db: str, key: str) -> threading.Lock:
+    with _note_locks_guard:
+        return _note_locks.setdefault((notes_db, key), threading.Lock())
+
+
+# ── Content hashes ──────────────────────────────────────────────
+
+# Optional Notes DB property (Rich text) holding each note's content hash
+HASH_PROPERTY = "Content Hash"
+
+
+def _content_hash(properties: dict, blocks: list[dict]) -> str:
+    payload = json.dumps([properties, blocks], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class _HashIndex:
+    """Local page_id -> content hash of what was last written there."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._hashes: dict[str, str] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self._hashes = {}
+        except ValueError:
+            logger.warning("Ignoring corrupt Notion hash index %s", path)
+            self._hashes = {}
+
+    def get(self, page_id: str) -> str | None:
+        return self._hashes.get(page_id)
+
+    def put(self, page_id: str, content_hash: str) -> None:
+        with self._lock:
+            self._hashes[page_id] = content_hash
+
+    def discard(self, page_id: str) -> None:
+        with self._lock:
+            self._hashes.pop(page_id, None)
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._hashes, sort_keys=True))
+            tmp.replace(self.path)
+
+
+# Writers of different profiles share one index per file
+_hash_indexes: dict[Path, _HashIndex] = {}
+
+
+def _hash_index(path: Path) -> _HashIndex:
+    with _note_locks_guard:
+        if path not in _hash_indexes:
+            _hash_indexes[path] = _HashIndex(path)
+        return _hash_indexes[path]
+
+
+@dataclass
+class DigestPage:
+    """What an existing digest page already holds, for incremental appends."""
+
+    page_id: str
+    keys: list[str] = field(default_factory=list)  # notion_key per linked note, in page order
+    sections: int = 0  # highest "### N." paper number on the page
+    top_heading: dict | None = None  # the "今日论文（Top N）" block
+
 
 class NotionWriter:
-    def __init__(self):
-        self.client = Client(auth=os.environ["NOTION_API_KEY"], notion_version="2022-06-28")
-        self.digest_parent_page = os.environ["DIGEST_PARENT_PAGE_ID"]
-        self.notes_db = os.environ["NOTES_DB_ID"]
+    def __init__(
+        self,
+        policy: RetryPolicy | None = None,
+        digest_parent_page: str | None = None,
+        notes_db: str | None = None,
+        label: str | None = None,
+        client=None,
+        base_url: str | None = None,
+        hash_index: Path | None = None,
+    ):
+        self.http = ResilientCaller("api.notion.com", policy)
+        if client is None:
+            from notion_client import Client
+
+            # NOTION_BASE_URL / base_url let benchmarks point at a local fake
+            options: dict = {}
+            base_url = base_url or os.environ.get("NOTION_BASE_URL")
+            if base_url:
+                options["base_url"] = base_url
+            client = Client(
+                auth=os.environ["NOTION_API_KEY"],
+                notion_version="2022-06-28",
+                timeout_ms=int(self.http.policy.call_timeout * 1000),
+                **options,
+            )
+        self.client = client
+        self.digest_parent_page = digest_parent_page or os.environ["DIGEST_PARENT_PAGE_ID"]
+        self.notes_db = notes_db or os.environ["NOTES_DB_ID"]
+        # Appended to the digest title so profiles can share a parent page
+        self.label = label
+        # Content hashes let unchanged pages be skipped on re-runs
+        self.hashes = _hash_index(hash_index) if hash_index else None
+        self._hash_property: bool | None = None
+        # note page id -> Key, filled by get_existing_keys
+        self._note_keys: dict[str, str] = {}
+        # Seconds of the write deadline kept for the digest body: note pages
+        # are skipped once less than this is left
+        self.body_reserve = 0.0
 
     # ── Public API ──────────────────────────────────────────────
 
@@ -25,34 +147,145 @@ class NotionWriter:
         papers: list[PaperCandidate],
         digest_date: date,
         digest_markdown: str,
+        layout: list[Item] | None = None,
+        notes: list[PaperCandidate] | None = None,
     ) -> str:
-        """Upsert today's digest page and paper note pages. Returns digest page id."""
+        """Upsert today's digest page and paper note pages. Returns digest page id.
+
+        With a structured-mode `layout` the body is rendered from it directly
+        and digest_markdown is not parsed. Note pages are written from `notes`
+        when given (the same papers, e.g. without per-profile keywords).
+        """
         digest_page_id = self._upsert_digest_page(digest_date)
 
         # Create/update paper note pages first so we have their IDs
-        note_map: dict[str, str] = {}  # dedup_key -> note_page_id
-        for paper in papers:
-            note_id = self._upsert_paper_note(paper)
-            note_map[paper.dedup_key] = note_id
+        note_map = self._write_notes(papers if notes is None else notes)
 
         # Build digest body: convert markdown to blocks, then inject note links
-        body_blocks = self._build_digest_body(digest_markdown, papers, note_map)
-        self._replace_page_body(digest_page_id, body_blocks)
+        with telemetry.span("notion.write.digest_body"):
+            with telemetry.span("notion.build.digest_body"):
+                if layout is not None:
+                    body_blocks = _render_layout(layout, note_map)
+                else:
+                    body_blocks = self._build_digest_body(digest_markdown, papers, note_map)
+            body_hash = _content_hash({}, body_blocks)
+            if self._stored_hash(digest_page_id) == body_hash:
+                logger.info("Digest page unchanged, skipping body rewrite")
+                telemetry.count("pages_unchanged")
+            else:
+                self._replace_page_body(digest_page_id, body_blocks)
+                self._record_hash(digest_page_id, body_hash)
+        if self.hashes:
+            self.hashes.save()
 
         logger.info("Wrote digest for %s with %d papers", digest_date, len(papers))
         return digest_page_id
 
+    def read_digest(self, digest_date: date) -> DigestPage | None:
+        """The papers already on this date's digest page, or None if there is no page yet."""
+        page_id = self._find_child_page_by_title(self.digest_parent_page, self._digest_title(digest_date))
+        if not page_id:
+            return None
+        page = DigestPage(page_id)
+        for block in self._list_children(page_id):
+            btype = block.get("type", "")
+            text = _extract_block_text(block)
+            if btype == "heading_3" and (m := _SECTION_RE.match(text)):
+                page.sections = max(page.sections, int(m.group(1)))
+            elif btype == "heading_2" and _TOP_RE.match(text):
+                page.top_heading = block
+            elif btype == "paragraph" and text.startswith(_NOTE_LINK):
+                for rt in block["paragraph"]["rich_text"]:
+                    if rt.get("type") == "mention" and rt["mention"].get("type") == "page":
+                        page.keys.append(self._note_key(rt["mention"]["page"]["id"]))
+        page.keys = [k for k in page.keys if k]
+        logger.info("Digest page %s already has %d papers", page_id, len(page.keys))
+        return page
+
+    def append_to_digest(
+        self,
+        page: DigestPage,
+        papers: list[PaperCandidate],
+        sections_markdown: str,
+        layout: list[Item] | None = None,
+        notes: list[PaperCandidate] | None = None,
+    ) -> str:
+        """Add new paper sections (numbered after page.sections) and their note
+        links to the end of an existing digest page; nothing on it is rewritten.
+        `notes` as in write_digest. Returns the digest page id."""
+        note_map = self._write_notes(papers if notes is None else notes)
+        with telemetry.span("notion.write.digest_append", papers=len(papers)):
+            with telemetry.span("notion.build.digest_body"):
+                if layout is not None:
+                    blocks = _render_layout(layout, note_map)
+                else:
+                    blocks = self._build_digest_body(sections_markdown, papers, note_map)
+            self._append_blocks(page.page_id, blocks)
+            if page.top_heading:
+                total = len(page.keys) + len(papers)
+                self._api(
+                    self.client.blocks.update,
+                    block_id=page.top_heading["id"],
+                    heading_2={"rich_text": _rich_text(f"今日论文（Top {total}）")},
+                )
+        page.keys += [p.notion_key for p in papers]
+        page.sections += len(papers)
+        # The stored body hash no longer describes the page
+        if self.hashes:
+            self.hashes.discard(page.page_id)
+            self.hashes.save()
+        logger.info("Appended %d papers to digest page %s", len(papers), page.page_id)
+        return page.page_id
+
+    def _write_notes(self, papers: list[PaperCandidate]) -> dict[str, str]:
+        """Create/update each paper's note page; returns dedup_key -> note page id."""
+        note_map: dict[str, str] = {}
+        bodies = self._prerender_notes(papers) if cpu_pool.worth(len(papers), "notes") else {}
+        for n, paper in enumerate(papers):
+            remaining = self.http.deadline.remaining() if self.http.deadline else None
+            if remaining is not None and remaining < self.body_reserve:
+                degrade("notion.write", f"{len(papers) - n} of {len(papers)} note pages skipped to publish the digest in time")
+                break
+            with telemetry.span("notion.write.note", key=paper.notion_key), \
+                    _note_lock(self.notes_db, paper.notion_key):
+                note_map[paper.dedup_key] = self._upsert_paper_note(paper, bodies.get(paper.dedup_key))
+        return note_map
+
+    def _prerender_notes(self, papers: list[PaperCandidate]) -> dict[str, list[dict]]:
+        """Note bodies of a large batch rendered in the CPU pool (only the
+        markdown is sent to the workers); dedup_key -> blocks."""
+        with_notes = [p for p in papers if p.note_markdown]
+        with telemetry.span("notion.build.notes", notes=len(with_notes)):
+            blocks = cpu_pool.map_chunked(_markdown_to_blocks, [p.note_markdown for p in with_notes], "notes")
+        return {p.dedup_key: b for p, b in zip(with_notes, blocks)}
+
+    def _note_key(self, page_id: str) -> str:
+        if page_id not in self._note_keys:
+            try:
+                page = self._api(self.client.pages.retrieve, page_id=page_id)
+                self._note_keys[page_id] = _property_text(page, "Key")
+            except Exception:
+                logger.warning("Could not read linked note %s", page_id, exc_info=True)
+                return ""
+        return self._note_keys[page_id]
+
     # ── Digest page (child of a parent page) ──────────────────
 
-    def _upsert_digest_page(self, digest_date: date) -> str:
+    def _digest_title(self, digest_date: date) -> str:
         title = f"Daily Digest – {digest_date.isoformat()}"
+        if self.label:
+            title += f" · {self.label}"
+        return title
 
+    def _upsert_digest_page(self, digest_date: date) -> str:
+        title = self._digest_title(digest_date)
         existing_id = self._find_child_page_by_title(self.digest_parent_page, title)
         if existing_id:
             logger.info("Found existing digest page: %s", existing_id)
             return existing_id
 
-        page = self.client.pages.create(
+        page = self._api(
+            self.client.pages.create,
             parent={"page_id": self.digest_parent_page},
             properties={
                 "title": {"title": [{"text": {"content": title}}]},
@@ -63,7 +296,7 @@ class NotionWriter:
 
     def _find_child_page_by_title(self, parent_page_id: str, title: str) -> str | None:
         try:
-            resp = self.client.blocks.children.list(block_id=parent_page_id, page_size=100)
+            resp = self._api(self.client.blocks.children.list, block_id=parent_page_id, page_size=100)
             for block in resp["results"]:
                 if block["type"] == "child_page" and block["child_page"]["title"] == title:
                     return block["id"]
@@ -73,9 +306,9 @@ class NotionWriter:
 
     # ── Paper note pages (in Notes DB) ─────────────────────────
 
-    def _upsert_paper_note(self, paper: PaperCandidate) -> str:
+    def _upsert_paper_note(self, paper: PaperCandidate, note_blocks: list[dict] | None = None) -> str:
         key = paper.notion_key
-        existing_id = self._find_paper_note_by_key(key)
+        existing = self._find_paper_note_by_key(key)
 
         properties: dict = {
             "Title": {"title": [{"text": {"content": paper.title[:100]}}]},
@@ -95,23 +328,40 @@ class NotionWriter:
                 "date": {"start": paper.published.strftime("%Y-%m-%d")}
             }
 
-        note_blocks = self._build_note_body(paper)
-
-        if existing_id:
+        if note_blocks is None:
+            with telemetry.span("notion.build.note"):
+                note_blocks = self._build_note_body(paper)
+        content_hash = _content_hash(properties, note_blocks)
+        if self._has_hash_property():
+            properties[HASH_PROPERTY] = {"rich_text": [{"text": {"content": content_hash}}]}
+
+        if existing:
+            existing_id = existing["id"]
+            stored = _property_text(existing, HASH_PROPERTY) or self._stored_hash(existing_id)
+            if stored == content_hash:
+                logger.info("Paper note for '%s' unchanged, skipping", paper.title[:50])
+                telemetry.count("pages_unchanged")
+                return existing_id
             logger.info("Updating existing paper note for '%s'", paper.title[:50])
-            self.client.pages.update(page_id=existing_id, properties=properties)
+            self._api(self.client.pages.update, page_id=existing_id, properties=properties)
             self._replace_page_body(existing_id, note_blocks)
+            self._record_hash(existing_id, content_hash)
             return existing_id
 
-        page = self.client.pages.create(
+        # pages.create takes at most 100 children; the rest are appended
+        page = self._api(
+            self.client.pages.create,
             parent={"database_id": self.notes_db},
             properties=properties,
-            children=note_blocks,
+            children=note_blocks[:_MAX_CHILDREN],
         )
+        self._append_blocks(page["id"], note_blocks[_MAX_CHILDREN:])
+        self._record_hash(page["id"], content_hash)
         logger.info("Created paper note for '%s' (Key=%s)", paper.title[:50], key)
         return page["id"]
 
-    def _find_paper_note_by_key(self, key: str) -> str | None:
+    def _find_paper_note_by_key(self, key: str) -> dict | None:
+        """The note page (with its properties) for a Key, if there is one."""
         try:
             resp = self._query_database(
                 self.notes_db,
@@ -119,11 +369,29 @@ class NotionWriter:
                 page_size=1,
             )
             if resp["results"]:
-                return resp["results"][0]["id"]
+                return resp["results"][0]
         except Exception:
             logger.warning("Query by Key failed", exc_info=True)
         return None
 
+    def _has_hash_property(self) -> bool:
+        """Whether the Notes DB has a HASH_PROPERTY column (checked once)."""
+        if self._hash_property is None:
+            try:
+                db = self._api(self.client.databases.retrieve, database_id=self.notes_db)
+                self._hash_property = HASH_PROPERTY in db.get("properties", {})
+            except Exception:
+                logger.warning("Could not read the Notes DB schema", exc_info=True)
+                self._hash_property = False
+        return self._hash_property
+
+    def _stored_hash(self, page_id: str) -> str | None:
+        return self.hashes.get(page_id) if self.hashes else None
+
+    def _record_hash(self, page_id: str, content_hash: str) -> None:
+        if self.hashes:
+            self.hashes.put(page_id, content_hash)
+
     def get_existing_keys(self) -> set[str]:
         """Return all Key values already in the Notes DB (for cross-day dedup)."""
         keys: set[str] = set()
@@ -137,14 +405,20 @@ class NotionWriter:
                 rt = page.get("properties", {}).get("Key", {}).get("rich_text", [])
                 if rt:
                     keys.add(rt[0]["text"]["content"])
+                    self._note_keys[page["id"]] = rt[0]["text"]["content"]
             if not resp.get("has_more"):
                 break
             start_cursor = resp.get("next_cursor")
         return keys
 
+    def _api(self, endpoint, /, **kwargs):
+        """Call a notion_client endpoint through the shared retry/breaker layer."""
+        return self.http.call(endpoint, **kwargs)
+
     def _query_database(self, database_id: str, **kwargs) -> dict:
         body = {k: v for k, v in kwargs.items()}
-        return self.client.request(
+        return self._api(
+            self.client.request,
             path=f"databases/{database_id}/query",
             method="POST",
             body=body,
@@ -194,7 +468,7 @@ class NotionWriter:
                 insert_at = len(blocks)
 
             # Insert divider + mention link
-            mention_block = _paragraph_with_mention("📄 Detailed Note", note_id)
+            mention_block = _paragraph_with_mention(_NOTE_LINK, note_id)
             divider_block = _divider()
             blocks.insert(insert_at, divider_block)
             blocks.insert(insert_at, mention_block)
@@ -217,31 +491,59 @@ class NotionWriter:
 
     # ── Helpers ──────────────────────────────────────────────────
 
-    def _replace_page_body(self, page_id: str, blocks: list[dict]) -> None:
-        # Paginate to collect ALL existing block IDs before deleting
-        block_ids: list[str] = []
+    def _list_children(self, page_id: str) -> list[dict]:
+        """All top-level blocks of a page, following pagination."""
+        blocks: list[dict] = []
         cursor = None
         while True:
             kwargs: dict = {"block_id": page_id, "page_size": 100}
             if cursor:
                 kwargs["start_cursor"] = cursor
-            resp = self.client.blocks.children.list(**kwargs)
-            block_ids.extend(b["id"] for b in resp["results"])
+            resp = self._api(self.client.blocks.children.list, **kwargs)
+            blocks.extend(resp["results"])
             if not resp.get("has_more"):
                 break
             cursor = resp.get("next_cursor")
+        return blocks
+
+    def _replace_page_body(self, page_id: str, blocks: list[dict]) -> None:
+        # Collect ALL existing block IDs before deleting
+        block_ids = [b["id"] for b in self._list_children(page_id)]
 
         for bid in block_ids:
             try:
-                self.client.blocks.delete(block_id=bid)
+                self._api(self.client.blocks.delete, block_id=bid)
+                telemetry.count("blocks_deleted")
             except Exception:
                 pass
 
-        # Append new blocks (Notion limit: 100 per request)
-        for i in range(0, len(blocks), 100):
-            self.client.blocks.children.append(
-                block_id=page_id, children=blocks[i : i + 100]
+        self._append_blocks(page_id, blocks)
+
+    def _append_blocks(self, page_id: str, blocks: list[dict]) -> None:
+        for i in range(0, len(blocks), _MAX_CHILDREN):
+            self._api(
+                self.client.blocks.children.append,
+                block_id=page_id,
+                children=blocks[i : i + _MAX_CHILDREN],
             )
+        telemetry.count("blocks_appended", len(blocks))
+
+
+# ── Structured layout → Notion blocks ──────────────────────────
+
+def _render_layout(items: list[Item], note_map: dict[str, str]) -> list[dict]:
+    """Map layout items to blocks one-to-one; `note` items become the link to
+    that paper's note, so links land exactly where the layout put them."""
+    blocks: list[dict] = []
+    for item in items:
+        if item.kind == "note":
+            if note_map.get(item.text):
+                blocks.append(_paragraph_with_mention(_NOTE_LINK, note_map[item.text]))
+        elif item.kind == "divider":
+            blocks.append(_divider())
+        else:
+            blocks.append(_LAYOUT_BLOCKS[item.kind](item.text))
+    return blocks
 
 
 # ── Markdown → Notion blocks converter ─────────────────────────
@@ -402,6 +704,21 @@ def _paragraph_with_mention(text: str, page_id: str) -> dict:
     }
 
 
+_LAYOUT_BLOCKS = {
+    "h1": _heading1,
+    "h2": _heading2,
+    "h3": _heading3,
+    "h4": _heading3,
+    "p": _paragraph_rich,
+    "li": _bulleted_list_item,
+}
+
+
+def _property_text(page: dict, name: str) -> str:
+    rt = page.get("properties", {}).get(name, {}).get("rich_text", [])
+    return "".join(item.get("text", {}).get("content", "") for item in rt)
+
+
 def _extract_block_text(block: dict) -> str:
     """Extract plain text from a block's rich_text array."""
     btype = block.get("type", "")
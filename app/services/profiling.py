@@ -0,0 +1,172 @@
+"""
+Opt-in per-stage CPU and memory profiling (`daily_digest --profile`).
+
+While a StageProfiler is installed, every selected telemetry span runs
+under its own cProfile.Profile and between two tracemalloc snapshots. By
+default those are the CPU-heavy stages (merge, rank, block building and
+provider parsing); "all" selects every span. tracemalloc only runs while a
+selected stage does, so the rest of the run is not slowed down and the
+snapshots stay small. At the end of the run, each stage name gets:
+
+    <out_dir>/<stage>.pstats       cProfile stats, merged over all calls
+    <out_dir>/<stage>.alloc.txt    top allocation sites by net bytes
+    <out_dir>/summary.txt          calls, CPU time, net allocations, hot spots
+
+A profiled span nested inside another one pauses the outer profile, so each
+function's time shows up in the innermost stage only. tracemalloc is global:
+allocations made by other threads while a stage runs are counted in it too.
+
+When profiling is off, telemetry.span does one None check and nothing from
+this module runs.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import re
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+DEFAULT_STAGES = ("merge", "rank", "notion.build", "fetch.arxiv.parse", "fetch.huggingface.parse")
+
+
+class StageProfiler:
+    def __init__(self, out_dir: Path, stages: tuple[str, ...] | None = DEFAULT_STAGES, top: int = 25):
+        self.out_dir = out_dir
+        # None profiles every span; "notion.build" also selects "notion.build.note"
+        self.stages = stages
+        self.top = top
+        self.calls: Counter = Counter()
+        self.peak: Counter = Counter()
+        self._profiles: dict[str, list[cProfile.Profile]] = {}
+        self._allocs: dict[str, dict[str, list[int]]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = 0  # selected stages running, across threads
+        self._owns_tracing = False
+
+    def selects(self, name: str) -> bool:
+        return self.stages is None or any(name == s or name.startswith(s + ".") for s in self.stages)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.selects(name):
+            yield
+            return
+        stack: list[cProfile.Profile | None] = self._local.__dict__.setdefault("stack", [])
+        if stack and stack[-1]:
+            stack[-1].disable()
+        self._trace(+1)
+        before = _snapshot()
+        prof: cProfile.Profile | None = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Python 3.12+: only one cProfile may be active per process
+            prof = None
+        stack.append(prof)
+        try:
+            yield
+        finally:
+            if prof:
+                prof.disable()
+            stack.pop()
+            after = _snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            self._trace(-1)
+            if stack and stack[-1]:
+                stack[-1].enable()
+            self._record(name, prof, after.compare_to(before, "lineno"), peak)
+
+    def _trace(self, delta: int) -> None:
+        """Run tracemalloc while any selected stage runs (unless someone else already does)."""
+        with self._lock:
+            if self._active == 0 and delta > 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            self._active += delta
+            if self._active == 0 and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+    def _record(self, name: str, prof: cProfile.Profile | None, diffs: list, peak: int) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            self.peak[name] = max(self.peak[name], peak)
+            if prof:
+                self._profiles.setdefault(name, []).append(prof)
+            allocs = self._allocs.setdefault(name, {})
+            for stat in diffs:
+                if stat.size_diff:
+                    site = allocs.setdefault(str(stat.traceback[0]), [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += stat.count_diff
+
+    # ── Output ──────────────────────────────────────────────────
+
+    def write(self) -> Path:
+        """Write per-stage stats and the summary."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        summary = [
+            f"{'stage':<32} {'calls':>6} {'cpu_s':>9} {'net_alloc_kb':>13} {'peak_kb':>10}  hot spots (tottime)"
+        ]
+        for name in sorted(self.calls):
+            base = re.sub(r"[^\w.-]", "_", name)
+            stats = _merge(self._profiles.get(name, []))
+            cpu = 0.0
+            hot = ""
+            if stats:
+                stats.dump_stats(self.out_dir / f"{base}.pstats")
+                cpu = stats.total_tt
+                hot = ", ".join(_hot_spots(stats, 3))
+
+            allocs = sorted(self._allocs.get(name, {}).items(), key=lambda kv: -abs(kv[1][0]))
+            net = sum(size for size, _ in self._allocs.get(name, {}).values())
+            lines = [f"# {name}: net {net / 1024:+.1f} KiB over {self.calls[name]} call(s)"]
+            lines += [f"{size / 1024:+12.1f} KiB {count:+9d} blocks  {site}" for site, (size, count) in allocs[: self.top]]
+            (self.out_dir / f"{base}.alloc.txt").write_text("\n".join(lines) + "\n")
+
+            summary.append(
+                f"{name:<32} {self.calls[name]:>6} {cpu:>9.3f} {net / 1024:>13.1f} {self.peak[name] / 1024:>10.1f}  {hot}"
+            )
+        (self.out_dir / "summary.txt").write_text("\n".join(summary) + "\n")
+        logger.info("Profiles written to %s", self.out_dir)
+        return self.out_dir
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+
+def _merge(profiles: list[cProfile.Profile]) -> pstats.Stats | None:
+    stats = None
+    for prof in profiles:
+        try:
+            if stats is None:
+                stats = pstats.Stats(prof, stream=io.StringIO())
+            else:
+                stats.add(prof)
+        except TypeError:  # a profile that recorded nothing
+            continue
+    return stats
+
+
+def _hot_spots(stats: pstats.Stats, n: int) -> list[str]:
+    ranked = sorted(stats.stats.items(), key=lambda kv: -kv[1][2])  # tottime
+    return [f"{Path(file).name}:{line}({func}) {tt:.3f}s" for (file, line, func), (_, _, tt, _, _) in ranked[:n]]
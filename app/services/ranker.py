@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
 import math
 from datetime import datetime, timezone
@@ -8,6 +10,8 @@ from app.models import PaperCandidate
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_WEIGHTS = {"hf_likes": 0.6, "recency": 0.3, "keyword_match": 0.1}
+
 
 def score_paper(
     paper: PaperCandidate,
@@ -21,9 +25,7 @@ def score_paper(
           + w_recency * recency_bonus
           + w_keyword * keyword_match_strength
     """
-    likes_component = math.log(1 + paper.hf_likes)
-    recency_component = _recency_bonus(paper.published)
-    keyword_component = _keyword_match_strength(paper, all_keywords)
+    likes_component, recency_component, keyword_component = _components(paper, all_keywords)
 
     return (
         w_likes * likes_component
@@ -38,14 +40,14 @@ def rank_papers(
     top_k: int = 5,
     weights: dict | None = None,
 ) -> list[PaperCandidate]:
-    w = weights or {}
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
     for p in papers:
         p.score = score_paper(
             p,
             keywords,
-            w_likes=w.get("hf_likes", 0.6),
-            w_recency=w.get("recency", 0.3),
-            w_keyword=w.get("keyword_match", 0.1),
+            w_likes=w["hf_likes"],
+            w_recency=w["recency"],
+            w_keyword=w["keyword_match"],
         )
     ranked = sorted(papers, key=lambda p: p.score, reverse=True)
     logger.info(
@@ -57,6 +59,74 @@ def rank_papers(
     return ranked[:top_k]
 
 
+# ── Weight sweeps ───────────────────────────────────────────────
+
+WEIGHT_NAMES = tuple(DEFAULT_WEIGHTS)
+
+
+def weight_grid(steps: int) -> list[dict]:
+    """Every combination of `steps` evenly spaced values in [0, 1] per weight
+    (except all zeros)."""
+    values = [i / (steps - 1) for i in range(steps)] if steps > 1 else [1.0]
+    return [
+        dict(zip(WEIGHT_NAMES, combo))
+        for combo in itertools.product(values, repeat=3) if any(combo)
+    ]
+
+
+def sweep_weights(
+    papers: list[PaperCandidate],
+    keywords: list[str],
+    weight_sets: list[dict],
+    top_k: int = 5,
+) -> list[tuple[int, ...]]:
+    """Top-k paper indices (in rank order, same tie-breaking as rank_papers)
+    for every weight setting.
+
+    The score inputs are computed once. Each setting then walks the papers in
+    descending order of its most influential component and stops once no
+    remaining paper can reach the current k-th score, so a sweep usually
+    scores a small fraction of papers × settings.
+    """
+    comps = [_components(p, keywords) for p in papers]
+    if not comps or top_k <= 0:
+        return [() for _ in weight_sets]
+    cols = list(zip(*comps))
+    maxes = [max(col) for col in cols]
+    spans = [hi - min(col) for hi, col in zip(maxes, cols)]
+    orders = [sorted(range(len(comps)), key=lambda i, c=c: -cols[c][i]) for c in range(3)]
+
+    results = []
+    for ws in weight_sets:
+        wl, wr, wk = (ws.get(name, 0.0) for name in WEIGHT_NAMES)
+        lead = max(range(3), key=lambda c: (wl, wr, wk)[c] * spans[c])
+        bound = [wl * maxes[0], wr * maxes[1], wk * maxes[2]]
+        heap: list[tuple[float, int]] = []  # (score, -index): k best so far
+        for i in orders[lead]:
+            a, b, c = comps[i]
+            if len(heap) == top_k:
+                # Best score any remaining paper could reach (same arithmetic
+                # order as score_paper, so rounding cannot break the bound)
+                bound[lead] = (wl, wr, wk)[lead] * comps[i][lead]
+                if bound[0] + bound[1] + bound[2] < heap[0][0]:
+                    break
+            item = (wl * a + wr * b + wk * c, -i)
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        results.append(tuple(-i for _, i in sorted(heap, reverse=True)))
+    return results
+
+
+def _components(paper: PaperCandidate, all_keywords: list[str]) -> tuple[float, float, float]:
+    return (
+        math.log(1 + paper.hf_likes),
+        _recency_bonus(paper.published),
+        _keyword_match_strength(paper, all_keywords),
+    )
+
+
 def _recency_bonus(published: datetime | None) -> float:
     """1.0 for today, decaying to 0.0 over 7 days."""
     if not published:
@@ -0,0 +1,141 @@
+"""
+Optional LLM rerank of the heuristic shortlist.
+
+rank_papers is dominated by log(1 + hf_likes), so strong arXiv-only papers
+with no likes rarely make the top-k. LLMReranker takes the heuristic top
+`candidates` papers, has Claude score their relevance to the profile's
+keywords (0-10) from the title and the start of the abstract, many papers
+per call, and blends that score with the heuristic one.
+
+Cost stays bounded as the candidate pool grows: at most
+ceil(candidates / batch_size) calls per profile, run `max_workers` at a
+time, each with a short prompt and a ~20-token answer per paper. Scores
+are cached per paper and keyword set across runs, so a daily run only
+pays for papers it has not scored before.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.ranker import rank_papers
+from app.services.summarizer import Summarizer
+
+logger = logging.getLogger(__name__)
+
+
+class _ScoreCache:
+    """"<keywords fingerprint>:<notion_key>" -> relevance score, kept as JSON."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._scores: dict[str, float] = {}
+        if path:
+            try:
+                self._scores = json.loads(path.read_text())
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                logger.warning("Ignoring corrupt rerank cache %s", path)
+
+    def get(self, key: str) -> float | None:
+        return self._scores.get(key)
+
+    def put(self, key: str, score: float) -> None:
+        with self._lock:
+            self._scores[key] = score
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._scores, sort_keys=True))
+            tmp.replace(self.path)
+
+
+class LLMReranker:
+    def __init__(
+        self,
+        summarizer: Summarizer,
+        cache_path: Path | None = None,
+        candidates: int = 100,
+        batch_size: int = 25,
+        weight: float = 0.7,
+        max_workers: int = 4,
+        abstract_chars: int = 600,
+    ):
+        self.summarizer = summarizer
+        self.candidates = candidates
+        self.batch_size = batch_size
+        # Share of the final score that comes from the LLM relevance score
+        self.weight = weight
+        self.max_workers = max_workers
+        self.abstract_chars = abstract_chars
+        self.cache = _ScoreCache(cache_path)
+
+    def rerank(
+        self,
+        papers: list[PaperCandidate],
+        keywords: list[str],
+        top_k: int = 5,
+        weights: dict | None = None,
+    ) -> list[PaperCandidate]:
+        """Top-k of the heuristic shortlist by the blended score, which
+        replaces p.score: (1 - weight) * min-max normalized heuristic score
+        + weight * relevance / 10. Papers left unscored keep their
+        normalized heuristic score."""
+        shortlist = rank_papers(papers, keywords, top_k=self.candidates, weights=weights)
+        if not shortlist:
+            return []
+        relevance = self._relevance(shortlist, keywords)
+
+        lo = min(p.score for p in shortlist)
+        spread = max(p.score for p in shortlist) - lo
+        for p in shortlist:
+            heuristic = (p.score - lo) / spread if spread else 1.0
+            r = relevance.get(p.notion_key)
+            p.score = heuristic if r is None else (1 - self.weight) * heuristic + self.weight * r / 10
+        ranked = sorted(shortlist, key=lambda p: p.score, reverse=True)
+        heuristic_top = {id(p) for p in shortlist[:top_k]}
+        logger.info(
+            "Reranked %d candidates; %d of the top %d were outside the heuristic top-k",
+            len(shortlist), sum(id(p) not in heuristic_top for p in ranked[:top_k]), top_k,
+        )
+        return ranked[:top_k]
+
+    def _relevance(self, papers: list[PaperCandidate], keywords: list[str]) -> dict[str, float]:
+        """notion_key -> 0-10 relevance, from the cache or new batched calls."""
+        prefix = hashlib.sha256("\n".join(sorted(keywords)).encode()).hexdigest()[:8] + ":"
+        scores: dict[str, float] = {}
+        missing: list[PaperCandidate] = []
+        for p in papers:
+            cached = self.cache.get(prefix + p.notion_key)
+            if cached is None:
+                missing.append(p)
+            else:
+                scores[p.notion_key] = cached
+        telemetry.count("rerank_cached", len(papers) - len(missing))
+
+        batches = [missing[i : i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        if batches:
+            logger.info("Rerank: scoring %d papers in %d calls (%d cached)", len(missing), len(batches), len(scores))
+            score = lambda batch: self.summarizer.score_relevance(batch, keywords, self.abstract_chars)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(batches)))) as pool:
+                results = list(pool.map(telemetry.propagate(score), batches))
+            for batch, batch_scores in zip(batches, results):
+                for p, s in zip(batch, batch_scores):
+                    if s is not None:
+                        scores[p.notion_key] = s
+                        self.cache.put(prefix + p.notion_key, s)
+            telemetry.count("rerank_scored", sum(s is not None for r in results for s in r))
+            self.cache.save()
+        return scores
@@ -0,0 +1,280 @@
+"""
+Shared retry / backoff / circuit-breaker layer for outbound calls.
+
+Every network call (arXiv, Hugging Face, Anthropic, Notion) goes through a
+ResilientCaller bound to the remote host:
+
+    http = ResilientCaller("api.notion.com", policy)
+    page = http.call(client.pages.create, parent=..., properties=...)
+
+Transient failures (timeouts, connection errors, 408/425/429/5xx) are retried
+with full-jitter exponential backoff, honouring Retry-After when the server
+sends one. Each host has one CircuitBreaker shared by all callers, so once a
+host keeps failing every component fails fast until the cool-down passes.
+An optional Deadline bounds a whole stage: no retry sleeps past it and
+per-attempt timeouts shrink to fit it. Hosts with a politeness limit (arXiv)
+also share one RateLimiter per process, however many threads call them.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, TypeVar
+
+from app.services import telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504, 529})
+# Exception class names (anywhere in the MRO) that indicate a transport-level
+# failure. Matched by name so this module needs none of the client libraries.
+_TRANSIENT_NAME_PARTS = (
+    "Timeout", "Connection", "Transport", "ChunkedEncoding",
+    "UnexpectedEmptyPage",  # arXiv: the API intermittently returns empty pages
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage deadline leaves no time for another attempt."""
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    call_timeout: float = 30.0  # per-attempt timeout, seconds
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 0-based attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def policy_from_config(cfg: dict, **overrides: Any) -> RetryPolicy:
+    """Build a RetryPolicy from the `resilience` section of config.yaml."""
+    fields = {k: cfg[k] for k in ("max_attempts", "base_delay", "max_delay", "call_timeout") if k in cfg}
+    fields.update(overrides)
+    return RetryPolicy(**fields)
+
+
+class Deadline:
+    """Absolute point in time a stage must finish by (None = unbounded)."""
+
+    def __init__(self, seconds: float | None):
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive transient failures; after
+    `reset_timeout` seconds one trial call is let through (half-open)."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError(f"circuit open for {self.name}")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit closed for %s", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Circuit opened for %s after %d failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host: str, failure_threshold: int = 5, reset_timeout: float = 60.0) -> CircuitBreaker:
+    """Process-wide breaker for `host` (created on first use)."""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host, failure_threshold, reset_timeout)
+        return _breakers[host]
+
+
+def reset_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+class RateLimiter:
+    """Spaces request starts at least `interval` seconds apart, across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Block until this caller's slot; returns the seconds spent waiting."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def limiter_for(host: str, interval: float) -> RateLimiter:
+    """Process-wide rate limiter for `host`; the latest interval wins."""
+    with _breakers_lock:
+        limiter = _limiters.setdefault(host, RateLimiter(interval))
+        limiter.interval = interval
+        return limiter
+
+
+class ResilientCaller:
+    def __init__(
+        self,
+        host: str,
+        policy: RetryPolicy | None = None,
+        deadline: Deadline | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.host = host
+        self.policy = policy or RetryPolicy()
+        self.deadline = deadline
+        self.breaker = breaker or breaker_for(host)
+
+    def attempt_timeout(self) -> float:
+        """Per-attempt timeout, shrunk to whatever the stage deadline leaves."""
+        remaining = self.deadline.remaining() if self.deadline else None
+        if remaining is None:
+            return self.policy.call_timeout
+        return max(0.1, min(self.policy.call_timeout, remaining))
+
+    def call(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Call fn(*args, **kwargs), retrying transient failures."""
+        attempt = 0
+        while True:
+            if self.deadline and self.deadline.expired():
+                raise DeadlineExceeded(f"stage deadline passed before calling {self.host}")
+            self.breaker.before_call()
+            telemetry.count("requests")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                status = _status_of(exc)
+                transient = is_transient(exc, status)
+                if transient and status != 429:
+                    self.breaker.record_failure()
+                else:
+                    # The host answered (rate limit or a client error)
+                    self.breaker.record_success()
+
+                attempt += 1
+                if not transient or attempt >= self.policy.max_attempts:
+                    raise
+                delay = _retry_after(exc)
+                if delay is None:
+                    delay = self.policy.backoff(attempt - 1)
+                else:
+                    delay = min(delay, self.policy.max_delay)
+                remaining = self.deadline.remaining() if self.deadline else None
+                if remaining is not None and delay >= remaining:
+                    raise DeadlineExceeded(
+                        f"no time left to retry {self.host} (needed {delay:.1f}s)"
+                    ) from exc
+                logger.warning(
+                    "%s: attempt %d/%d failed (%s), retrying in %.1fs",
+                    self.host, attempt, self.policy.max_attempts,
+                    status or type(exc).__name__, delay,
+                )
+                telemetry.count("retries")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+
+# ── Exception classification ────────────────────────────────────
+
+def is_transient(exc: BaseException, status: int | None = None) -> bool:
+    status = status if status is not None else _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    names = (cls.__name__ for cls in type(exc).__mro__)
+    return any(part in name for name in names for part in _TRANSIENT_NAME_PARTS)
+
+
+def _status_of(exc: BaseException) -> int | None:
+    # anthropic: .status_code; notion_client: .status; requests: .response
+    for attr in ("status_code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
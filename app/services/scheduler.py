@@ -0,0 +1,169 @@
+"""
+Deadline-aware run schedule (`daily_digest --publish-by 08:00`).
+
+The time left until the publish deadline is split between fetch, summarize
+and write. Each stage's budget is worked out when the stage starts, from
+the time actually left and the shares of the stages still to come, so time
+one stage does not use passes on to the next. resilience.stage_deadlines
+still caps each stage; without a publish deadline those caps are all
+there is, as before.
+
+When a budget runs short the pipeline cuts work instead of running late:
+
+    fetch      arXiv stops paging a keyword once a page no longer fits
+    summarize  notes are written in rank order while a note plus the digest
+               still fit; the rest keep abstract-only note pages. A digest
+               that does not fit (or fails) is built from the abstracts
+               without Claude
+    write      note pages are skipped once only write_reserve_s is left, so
+               the digest page itself still goes out
+
+Each cut is reported with degrade(): logged when it happens, counted as
+"degradations" in the run report and listed again at the end of the run.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time
+from typing import Iterator
+
+from app.services import telemetry
+from app.services.resilience import Deadline
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "summarize", "write")
+DEFAULT_SHARES = {"fetch": 0.25, "summarize": 0.55, "write": 0.2}
+# First guesses for call durations, replaced by the mean of observed ones
+DEFAULT_ESTIMATES = {"note": 60.0, "digest": 120.0}
+
+_active: RunSchedule | None = None
+
+
+def parse_publish_by(value) -> dt_time:
+    """A publish deadline, "HH:MM" in 24-hour local time."""
+    # YAML reads an unquoted 10:30 as the base-60 integer 630
+    if not isinstance(value, str):
+        raise ValueError(f'expected a quoted "HH:MM" string, got {value!r}')
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise ValueError(f'expected "HH:MM" (24-hour local time), got {value!r}') from None
+
+
+class RunSchedule:
+    def __init__(
+        self,
+        seconds: float | None = None,
+        shares: dict | None = None,
+        caps: dict | None = None,
+        estimates: dict | None = None,
+        write_reserve: float = 60.0,
+    ):
+        # None: no publish deadline, stages are bounded by their caps only
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.shares = {**DEFAULT_SHARES, **(shares or {})}
+        self.caps = caps or {}
+        self.write_reserve = write_reserve
+        self.degradations: list[str] = []
+        self._estimates = {**DEFAULT_ESTIMATES, **(estimates or {})}
+        self._observed: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: dict, publish_by: str | None = None) -> RunSchedule:
+        """publish_by ("HH:MM", local time) from the CLI or the `schedule`
+        section; stage caps from resilience.stage_deadlines."""
+        sched_cfg = cfg.get("schedule") or {}
+        publish_by = publish_by or sched_cfg.get("publish_by")
+        seconds = None
+        if publish_by:
+            try:
+                at = parse_publish_by(publish_by)
+            except ValueError as e:
+                raise ValueError(f"schedule.publish_by: {e}") from None
+            now = datetime.now()
+            seconds = (datetime.combine(now.date(), at) - now).total_seconds()
+            if seconds <= 0:
+                logger.warning("Publish deadline %s has already passed; running without one", publish_by)
+                seconds = None
+            else:
+                logger.info("Publishing by %s: %.0f s for the whole run", publish_by, seconds)
+        return cls(
+            seconds,
+            shares=sched_cfg.get("shares"),
+            caps=cfg.get("resilience", {}).get("stage_deadlines", {}),
+            estimates={k: sched_cfg[f"{k}_estimate_s"] for k in DEFAULT_ESTIMATES if f"{k}_estimate_s" in sched_cfg},
+            write_reserve=sched_cfg.get("write_reserve_s", 60.0),
+        )
+
+    def activate(self) -> None:
+        """Make degrade() record into this schedule (one per run)."""
+        global _active
+        _active = self
+
+    # ── Budgets ─────────────────────────────────────────────────
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def stage(self, name: str) -> Deadline:
+        """A Deadline for a stage that starts now."""
+        cap = self.caps.get(name)
+        left = self.remaining()
+        if left is None:
+            return Deadline(cap)
+        later = STAGES[STAGES.index(name):]
+        budget = left * self.shares[name] / sum(self.shares[s] for s in later)
+        if cap is not None:
+            budget = min(budget, cap)
+        logger.info("Schedule: %s gets %.0f s of the %.0f s left", name, budget, left)
+        return Deadline(budget)
+
+    # ── Call-time estimates ─────────────────────────────────────
+
+    def estimate(self, kind: str) -> float:
+        with self._lock:
+            seen = self._observed.get(kind)
+            return sum(seen) / len(seen) if seen else self._estimates[kind]
+
+    def fits(self, deadline: Deadline | None, kind: str, reserve: float = 0.0) -> bool:
+        """Whether one more `kind` call, plus `reserve` seconds, fits in the deadline."""
+        remaining = deadline.remaining() if deadline else None
+        return remaining is None or remaining >= self.estimate(kind) + reserve
+
+    @contextmanager
+    def timed(self, kind: str) -> Iterator[None]:
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._observed.setdefault(kind, []).append(time.monotonic() - t0)
+
+    # ── Degradations ────────────────────────────────────────────
+
+    def record(self, message: str) -> None:
+        with self._lock:
+            self.degradations.append(message)
+
+    def log_summary(self) -> None:
+        if self.degradations:
+            logger.warning(
+                "Run degraded to meet its deadline (%d):\n  %s",
+                len(self.degradations), "\n  ".join(self.degradations),
+            )
+
+
+def degrade(stage: str, detail: str) -> None:
+    """Report work cut to stay within a deadline."""
+    message = f"{stage}: {detail}"
+    logger.warning("Degraded %s", message)
+    telemetry.count("degradations")
+    if _active is not None:
+        _active.record(message)
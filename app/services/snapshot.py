@@ -0,0 +1,55 @@
+"""
+Candidate snapshots: the merged candidates of a run (plus which of them were
+already in each Notes DB) saved as JSON, so ranking can be re-run from the
+cache without fetching anything.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+
+from app.models import PaperCandidate
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ("title", "url", "source", "arxiv_id", "authors", "abstract", "hf_likes", "matched_keywords")
+
+
+def snapshot_path(cache_dir: Path, digest_date: date) -> Path:
+    return cache_dir / "candidates" / f"{digest_date.isoformat()}.json"
+
+
+def save_candidates(
+    path: Path,
+    papers: list[PaperCandidate],
+    seen: dict[str, set[str]],
+) -> None:
+    """Write candidates and, per Notes DB id, the notion keys already written there."""
+    rows = []
+    for p in papers:
+        row = {f: getattr(p, f) for f in _FIELDS}
+        row["published"] = p.published.isoformat() if p.published else None
+        rows.append(row)
+    keys = {p.notion_key for p in papers}
+    data = {
+        "candidates": rows,
+        "seen": {db: sorted(k for k in db_keys if k in keys) for db, db_keys in seen.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False))
+    tmp.replace(path)
+    logger.info("Saved %d candidates to %s", len(papers), path)
+
+
+def load_candidates(path: Path) -> tuple[list[PaperCandidate], dict[str, set[str]]]:
+    data = json.loads(path.read_text())
+    papers = []
+    for row in data["candidates"]:
+        published = row.pop("published", None)
+        papers.append(PaperCandidate(
+            **row, published=datetime.fromisoformat(published) if published else None
+        ))
+    return papers, {db: set(keys) for db, keys in data.get("seen", {}).items()}
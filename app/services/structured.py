@@ -0,0 +1,163 @@
+"""
+Structured digest mode: Claude fills a tool-use schema (overview + one
+section per paper, keyed by the paper's number in the prompt) instead of
+writing free-form markdown.
+
+The page layout is built here from that data plus our own PaperCandidate
+fields, as a flat list of typed items. NotionWriter maps the items straight
+to blocks and markdown is rendered from the same list for dry runs, so
+nothing is re-parsed and each note link sits right after its own paper.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from app.models import PaperCandidate
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# (schema field, heading) in page order; the headings match digest_prompt.md
+SECTION_FIELDS = (
+    ("summary", "摘要"),
+    ("problem", "这篇在解决什么问题？"),
+    ("innovations", "创新点"),
+    ("method", "核心方法"),
+    ("insights", "适用于机器人/具身智能的启示"),
+    ("limitations", "风险与局限"),
+    ("next_steps", "建议下一步阅读/复现"),
+)
+
+PAPER_SECTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "paper": {"type": "integer", "description": "输入中的论文编号（--- paper N ---）"},
+        "summary": {"type": "string", "description": "摘要（1段，3~5 句）"},
+        "problem": {"type": "string", "description": "这篇在解决什么问题？（2~4 句）"},
+        "innovations": {**_STRING_LIST, "description": "创新点（3~5 条）"},
+        "method": {**_STRING_LIST, "description": "核心方法（4~8 条 pipeline bullet）"},
+        "insights": {**_STRING_LIST, "description": "适用于机器人/具身智能的启示（2~5 条）"},
+        "limitations": {**_STRING_LIST, "description": "风险与局限（2~4 条）"},
+        "next_steps": {**_STRING_LIST, "description": "建议下一步阅读/复现（3~6 条）"},
+    },
+    "required": ["paper", *(field for field, _ in SECTION_FIELDS)],
+}
+
+_OVERVIEW_PROPERTIES = {
+    "commentary": {"type": "string", "description": "今日锐评（5~8 句）"},
+    "takeaways": {**_STRING_LIST, "description": "今日要点速览（4~7 条）"},
+}
+_PAPERS_PROPERTY = {"papers": {"type": "array", "items": PAPER_SECTION_SCHEMA}}
+
+
+def _tool(name: str, description: str, properties: dict) -> dict:
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": {"type": "object", "properties": properties, "required": list(properties)},
+    }
+
+
+DIGEST_TOOL = _tool(
+    "write_digest", "写入当日 Digest：今日锐评、今日要点速览和每篇论文的小节",
+    {**_OVERVIEW_PROPERTIES, **_PAPERS_PROPERTY},
+)
+SECTIONS_TOOL = _tool("write_paper_sections", "写入输入中各篇论文的小节", _PAPERS_PROPERTY)
+OVERVIEW_TOOL = _tool("write_overview", "写入今日锐评和今日要点速览", _OVERVIEW_PROPERTIES)
+
+# Rerank stage: one 0-10 relevance score per candidate in a batch
+SCORE_TOOL = _tool(
+    "score_papers", "写入每篇候选论文的相关性与价值分（0~10）",
+    {"scores": {"type": "array", "items": {
+        "type": "object",
+        "properties": {
+            "paper": {"type": "integer", "description": "输入中的论文编号（[N]）"},
+            "score": {"type": "integer", "minimum": 0, "maximum": 10},
+        },
+        "required": ["paper", "score"],
+    }}},
+)
+
+
+# ── Digest data ─────────────────────────────────────────────────
+
+def collect_sections(tool_inputs: list[dict], n_papers: int) -> list[dict | None]:
+    """Paper sections from one or more tool calls, indexed by position
+    (paper N -> index N-1). Unknown numbers and duplicates are dropped."""
+    sections: list[dict | None] = [None] * n_papers
+    for data in tool_inputs:
+        for section in data.get("papers") or []:
+            if not isinstance(section, dict):
+                continue
+            n = section.get("paper")
+            if isinstance(n, int) and 1 <= n <= n_papers and sections[n - 1] is None:
+                sections[n - 1] = section
+    return sections
+
+
+def fallback_section(paper: PaperCandidate) -> dict:
+    return {"summary": paper.abstract or "未提供"}
+
+
+# ── Layout ──────────────────────────────────────────────────────
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    """One line of the page: kind is h1 / h2 / h3 / h4 / p / li / divider / note.
+    `note` items carry the dedup_key of the paper whose note link goes there."""
+
+    kind: str
+    text: str = ""
+
+
+def digest_layout(data: dict, papers: list[PaperCandidate], digest_date: date, keywords: list[str]) -> list[Item]:
+    items = [
+        Item("h1", f"{digest_date.isoformat()} - papers"),
+        Item("p", f"**Keywords:** {', '.join(keywords)}"),
+        Item("h2", "今日锐评"),
+        Item("p", data.get("commentary") or "未生成"),
+        Item("h2", "今日要点速览"),
+        *[Item("li", t) for t in data.get("takeaways") or []],
+        Item("h2", f"今日论文（Top {len(papers)}）"),
+    ]
+    return items + papers_layout(data.get("papers") or [], papers)
+
+
+def papers_layout(sections: list[dict | None], papers: list[PaperCandidate], start: int = 1) -> list[Item]:
+    """The per-paper part of the page, numbered from `start` (an incremental
+    update appends papers after the ones already on the page)."""
+    items: list[Item] = []
+    for n, p in enumerate(papers):
+        section = (sections[n] if n < len(sections) else None) or fallback_section(p)
+        items += [
+            Item("h3", f"{start + n}. {p.title}"),
+            Item("li", f"**Tags:** {', '.join(p.matched_keywords)}"),
+            Item("li", f"**Source:** {p.source}"),
+            Item("li", f"**arXiv:** {p.url if p.arxiv_id else '未提供'}"),
+            Item("li", f"**PDF:** {p.pdf_url or '未提供'}"),
+            Item("li", f"**Authors:** {', '.join(p.authors) or '未在输入中提供'}"),
+            Item("li", f"**Published:** {p.published.strftime('%Y-%m-%d') if p.published else '未在输入中提供'}"),
+            Item("li", f"**HF Likes:** {p.hf_likes}"),
+        ]
+        for field, heading in SECTION_FIELDS:
+            value = section.get(field)
+            if not value:
+                continue
+            items.append(Item("h4", heading))
+            if isinstance(value, list):
+                items += [Item("li", str(v)) for v in value]
+            else:
+                items.append(Item("p", str(value)))
+        items += [Item("note", p.dedup_key), Item("divider")]
+    return items
+
+
+def layout_to_markdown(items: list[Item]) -> str:
+    prefix = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "#### ", "li": "- ", "p": ""}
+    lines = []
+    for item in items:
+        if item.kind == "divider":
+            lines.append("---")
+        elif item.kind != "note":  # note links only exist in Notion
+            lines.append(prefix[item.kind] + item.text)
+    return "\n".join(lines)
@@ -1,25 +1,66 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
 
-import anthropic
-
 from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.resilience import ResilientCaller, RetryPolicy
+from app.services.structured import DIGEST_TOOL, OVERVIEW_TOOL, SCORE_TOOL, SECTIONS_TOOL, collect_sections
 
 logger = logging.getLogger(__name__)
 
 SKILLS_DIR = Path(__file__).resolve().parent.parent.parent / "skills"
 
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+# Estimated output of the digest header + 今日锐评 + 今日要点速览
+_OVERVIEW_TOKENS = 1500
+# Output per {"paper": N, "score": S} entry of a rerank batch, plus slack
+_SCORE_TOKENS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Claude token count: ~1 token per CJK character, ~4 characters
+    per token for everything else. Errs high for mixed CN+EN prompts."""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
 
 class Summarizer:
-    def __init__(self, model: str = "claude-sonnet-4-20250514"):
-        self.client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    def __init__(
+        self,
+        model: str = "claude-sonnet-4-20250514",
+        policy: RetryPolicy | None = None,
+        digest_input_budget: int = 12000,
+        digest_max_tokens: int = 8000,
+        tokens_per_paper: int = 900,
+        map_workers: int = 4,
+        structured: bool = False,
+    ):
+        import anthropic
+
+        # Retries live in the shared resilience layer, not the SDK
+        self.client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"], max_retries=0)
         self.model = model
+        self.digest_input_budget = digest_input_budget
+        self.digest_max_tokens = digest_max_tokens
+        self.tokens_per_paper = tokens_per_paper
+        self.map_workers = map_workers
+        # Digest as tool-use data rendered by app.services.structured
+        self.structured = structured
+        self._notes: dict[str, Future] = {}
+        self._notes_lock = threading.Lock()
+        self.http = ResilientCaller("api.anthropic.com", policy or RetryPolicy(call_timeout=300.0))
         self.digest_prompt = self._load_prompt("digest_prompt.md")
         self.note_prompt = self._load_prompt("note_prompt.md")
+        self.rerank_prompt = self._load_prompt("rerank_prompt.md")
 
     @staticmethod
     def _load_prompt(filename: str) -> str:
@@ -29,7 +70,7 @@ class Summarizer:
         logger.warning("Prompt file not found: %s", path)
         return "You are a research analyst. Produce a structured paper analysis."
 
-    # ── Digest: one call for ALL papers ──────────────────────────
+    # ── Digest: one call, or map-reduce when over budget ─────────
 
     def summarize_for_digest(
         self,
@@ -37,20 +78,285 @@ class Summarizer:
         digest_date: date,
         keywords: list[str],
     ) -> str:
-        """Generate the full daily digest page markdown (one call for all papers)."""
-        user_msg = self._build_digest_user_message(papers, digest_date, keywords)
+        """Generate the full daily digest page markdown.
+
+        Papers that already have a note are described by the note instead of
+        the abstract. If the prompt or the expected output does not fit one
+        call, the per-paper sections are written by parallel calls over
+        groups of papers and a final call writes the overview on top.
+        """
+        groups = self.plan_digest(papers, digest_date, keywords)
+        if len(groups) == 1:
+            user_msg = self._build_digest_user_message(papers, digest_date, keywords)
+            try:
+                response = self._create_message(
+                    "digest",
+                    max_tokens=self.digest_max_tokens,
+                    system=self.digest_prompt,
+                    messages=[{"role": "user", "content": user_msg}],
+                    temperature=0.3,
+                )
+                return response.content[0].text
+            except Exception:
+                logger.error("Digest summary failed", exc_info=True)
+                return ""
+        return self._map_reduce_digest(papers, groups, digest_date, keywords)
+
+    def plan_digest(
+        self,
+        papers: list[PaperCandidate],
+        digest_date: date,
+        keywords: list[str],
+    ) -> list[list[int]]:
+        """Pack paper indices into groups whose prompt fits digest_input_budget
+        and whose sections fit digest_max_tokens. One group = one call."""
+        header = self._digest_header(digest_date, keywords, len(papers))
+        fixed = estimate_tokens(self.digest_prompt) + estimate_tokens(header)
+        entry_tokens = [estimate_tokens(self._paper_entry(i, p)) for i, p in enumerate(papers, 1)]
+
+        total_out = _OVERVIEW_TOKENS + self.tokens_per_paper * len(papers)
+        if fixed + sum(entry_tokens) <= self.digest_input_budget and total_out <= self.digest_max_tokens:
+            return [list(range(len(papers)))]
+
+        max_papers = max(1, self.digest_max_tokens // self.tokens_per_paper)
+        groups: list[list[int]] = [[]]
+        used = fixed
+        for idx, cost in enumerate(entry_tokens):
+            group = groups[-1]
+            if group and (used + cost > self.digest_input_budget or len(group) >= max_papers):
+                groups.append([])
+                used = fixed
+            groups[-1].append(idx)
+            used += cost
+        return groups
+
+    def _map_reduce_digest(
+        self,
+        papers: list[PaperCandidate],
+        groups: list[list[int]],
+        digest_date: date,
+        keywords: list[str],
+    ) -> str:
+        logger.info("Digest: %d papers over budget, splitting into %d calls", len(papers), len(groups))
+        sections = self._write_sections(papers, groups, digest_date, keywords)
+
+        # Reduce: the overview is written from the section texts, trimmed so
+        # the prompt stays within budget
+        header = self._digest_header(digest_date, keywords, len(papers))
+        room = self.digest_input_budget - estimate_tokens(self.digest_prompt) - estimate_tokens(header)
+        share = max(room // len(sections), 200)
+        digests = [self._truncate_tokens(text, share) for text in sections]
+        user_msg = "mode: overview_only\n" + header + "\n\n".join(digests)
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=8000,
+            response = self._create_message(
+                "digest.reduce",
+                max_tokens=min(self.digest_max_tokens, _OVERVIEW_TOKENS * 2),
                 system=self.digest_prompt,
                 messages=[{"role": "user", "content": user_msg}],
                 temperature=0.3,
             )
-            return response.content[0].text
+            overview = response.content[0].text.split("## 今日论文", 1)[0].rstrip()
         except Exception:
-            logger.error("Digest summary failed", exc_info=True)
-            return ""
+            logger.error("Digest overview failed", exc_info=True)
+            overview = f"# {digest_date.isoformat()} - papers\n**Keywords:** {', '.join(keywords)}"
+
+        return "\n\n".join([overview, f"## 今日论文（Top {len(papers)}）", *sections])
+
+    def summarize_sections(
+        self,
+        papers: list[PaperCandidate],
+        digest_date: date,
+        keywords: list[str],
+        start: int = 1,
+    ) -> str:
+        """Only the paper sections (`### {i}. {title}` ...), numbered from
+        `start`: what an incremental update appends to an existing digest.
+        Grouped like summarize_for_digest, without the overview call."""
+        groups = self.plan_digest(papers, digest_date, keywords)
+        return "\n\n".join(self._write_sections(papers, groups, digest_date, keywords, start))
+
+    def _write_sections(
+        self,
+        papers: list[PaperCandidate],
+        groups: list[list[int]],
+        digest_date: date,
+        keywords: list[str],
+        start: int = 1,
+    ) -> list[str]:
+        header = self._digest_header(digest_date, keywords, len(papers))
+
+        def write(group: list[int]) -> str:
+            entries = [self._paper_entry(start + i, papers[i]) for i in group]
+            user_msg = "mode: papers_only\n" + header + "\n".join(entries)
+            try:
+                response = self._create_message(
+                    "digest.map",
+                    max_tokens=self.digest_max_tokens,
+                    system=self.digest_prompt,
+                    messages=[{"role": "user", "content": user_msg}],
+                    temperature=0.3,
+                )
+                return response.content[0].text.strip()
+            except Exception:
+                logger.error("Digest sections failed for papers %s", [start + i for i in group], exc_info=True)
+                return "\n\n".join(self._fallback_section(start + i, papers[i]) for i in group)
+
+        with ThreadPoolExecutor(max_workers=self.map_workers) as pool:
+            return list(pool.map(telemetry.propagate(write), groups))
+
+    @staticmethod
+    def _fallback_section(i: int, p: PaperCandidate) -> str:
+        return "\n".join([
+            f"### {i}. {p.title}",
+            f"- **Tags:** {', '.join(p.matched_keywords)}",
+            f"- **Links:** arXiv: {p.url if p.arxiv_id else '未提供'}",
+            "",
+            p.abstract or "未提供",
+        ])
+
+    @staticmethod
+    def _truncate_tokens(text: str, budget: int) -> str:
+        if estimate_tokens(text) <= budget:
+            return text
+        # Binary-search the longest prefix within budget
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if estimate_tokens(text[:mid]) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo].rstrip() + " …"
+
+    # ── Digest, structured mode (tool use) ─────────────────────
+
+    def summarize_for_digest_structured(
+        self,
+        papers: list[PaperCandidate],
+        digest_date: date,
+        keywords: list[str],
+    ) -> dict | None:
+        """Digest as data: {"commentary", "takeaways", "papers"}, where papers
+        holds one section (or None) per input paper, in input order.
+
+        Packs papers exactly like summarize_for_digest. Returns None when no
+        usable tool call came back, so callers can fall back to markdown.
+        """
+        header = self._digest_header(digest_date, keywords, len(papers))
+        groups = self.plan_digest(papers, digest_date, keywords)
+
+        if len(groups) == 1:
+            data = self._call_tool("digest", DIGEST_TOOL, header + self._entries(papers, groups[0]))
+            if data is None:
+                return None
+            data["papers"] = collect_sections([data], len(papers))
+            return data
+
+        logger.info("Digest: %d papers over budget, splitting into %d calls", len(papers), len(groups))
+        sections = self._structured_sections(papers, groups, header)
+        if sections is None:
+            return None
+
+        # Reduce: overview from each paper's summary and innovations
+        room = self.digest_input_budget - estimate_tokens(self.digest_prompt) - estimate_tokens(header)
+        share = max(room // len(papers), 100)
+        digests = []
+        for i, (p, section) in enumerate(zip(papers, sections), 1):
+            body = (section or {}).get("summary") or p.abstract
+            points = "; ".join((section or {}).get("innovations") or [])
+            digests.append(self._truncate_tokens(f"--- paper {i} ---\ntitle: {p.title}\n{body}\n{points}", share))
+        overview = self._call_tool("digest.reduce", OVERVIEW_TOOL, header + "\n\n".join(digests)) or {}
+        return {
+            "commentary": overview.get("commentary", ""),
+            "takeaways": overview.get("takeaways", []),
+            "papers": sections,
+        }
+
+    def summarize_sections_structured(
+        self,
+        papers: list[PaperCandidate],
+        digest_date: date,
+        keywords: list[str],
+    ) -> list[dict | None] | None:
+        """Paper sections only (see summarize_sections), one per input paper in
+        input order; None when no usable tool call came back."""
+        header = self._digest_header(digest_date, keywords, len(papers))
+        return self._structured_sections(papers, self.plan_digest(papers, digest_date, keywords), header)
+
+    def _structured_sections(
+        self,
+        papers: list[PaperCandidate],
+        groups: list[list[int]],
+        header: str,
+    ) -> list[dict | None] | None:
+        with ThreadPoolExecutor(max_workers=self.map_workers) as pool:
+            results = list(pool.map(
+                telemetry.propagate(
+                    lambda g: self._call_tool("digest.map", SECTIONS_TOOL, header + self._entries(papers, g))
+                ),
+                groups,
+            ))
+        if not any(results):
+            return None
+        return collect_sections([r for r in results if r], len(papers))
+
+    def _entries(self, papers: list[PaperCandidate], group: list[int]) -> str:
+        return "\n".join(self._paper_entry(i + 1, papers[i]) for i in group)
+
+    def _call_tool(
+        self,
+        kind: str,
+        tool: dict,
+        user_msg: str,
+        system: str | None = None,
+        max_tokens: int | None = None,
+    ) -> dict | None:
+        """One forced tool call; returns the tool input or None on failure."""
+        try:
+            response = self._create_message(
+                kind,
+                max_tokens=max_tokens or self.digest_max_tokens,
+                system=system or self.digest_prompt,
+                messages=[{"role": "user", "content": user_msg}],
+                tools=[tool],
+                tool_choice={"type": "tool", "name": tool["name"]},
+                temperature=0.3,
+            )
+        except Exception:
+            logger.error("Structured %s call failed", kind, exc_info=True)
+            return None
+        for block in response.content:
+            if getattr(block, "type", None) == "tool_use" and isinstance(block.input, dict):
+                return block.input
+        logger.error("Structured %s: response had no %s call", kind, tool["name"])
+        return None
+
+    # ── Rerank: compact relevance scores for many papers per call ─
+
+    def score_relevance(
+        self,
+        papers: list[PaperCandidate],
+        keywords: list[str],
+        abstract_chars: int = 600,
+    ) -> list[float | None]:
+        """0-10 relevance of each paper to the keywords from one call over
+        titles and abstract openings; None where no score came back."""
+        lines = [f"keywords: {', '.join(keywords)}", ""]
+        for i, p in enumerate(papers, 1):
+            abstract = " ".join(p.abstract.split())[:abstract_chars]
+            lines += [f"[{i}] {' '.join(p.title.split())}", abstract or "未提供"]
+        data = self._call_tool(
+            "rerank", SCORE_TOOL, "\n".join(lines),
+            system=self.rerank_prompt, max_tokens=200 + _SCORE_TOKENS * len(papers),
+        )
+        scores: list[float | None] = [None] * len(papers)
+        for entry in (data or {}).get("scores") or []:
+            if not isinstance(entry, dict):
+                continue
+            n, score = entry.get("paper"), entry.get("score")
+            if isinstance(n, int) and 1 <= n <= len(papers) and isinstance(score, (int, float)):
+                scores[n - 1] = min(max(float(score), 0.0), 10.0)
+        return scores
 
     # ── Note: one call per paper ─────────────────────────────────
 
@@ -58,8 +364,8 @@ class Summarizer:
         """Generate detailed note page markdown for a single paper."""
         user_msg = self._build_note_user_message(paper)
         try:
-            response = self.client.messages.create(
-                model=self.model,
+            response = self._create_message(
+                "note",
                 max_tokens=4000,
                 system=self.note_prompt,
                 messages=[{"role": "user", "content": user_msg}],
@@ -70,36 +376,96 @@ class Summarizer:
             logger.error("Note summary failed for '%s'", paper.title, exc_info=True)
             return ""
 
+    def note_for(self, paper: PaperCandidate) -> str:
+        """summarize_for_note, at most once per paper per Summarizer: papers
+        selected by several profiles share one note (concurrent callers wait
+        for the first)."""
+        with self._notes_lock:
+            future = self._notes.get(paper.dedup_key)
+            owner = future is None
+            if owner:
+                future = self._notes[paper.dedup_key] = Future()
+        if owner:
+            try:
+                future.set_result(self.summarize_for_note(paper))
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+        else:
+            telemetry.count("note_cache_hits")
+        return future.result()
+
+    def _create_message(self, kind: str, **kwargs):
+        prompt_est = estimate_tokens(kwargs.get("system", "")) + sum(
+            estimate_tokens(m["content"]) for m in kwargs.get("messages", [])
+        ) + estimate_tokens(json.dumps(kwargs.get("tools", []), ensure_ascii=False))
+        with telemetry.span("llm.call", kind=kind, prompt_tokens_est=prompt_est,
+                            max_tokens=kwargs.get("max_tokens")) as s:
+            response = self.http.call(
+                lambda: self.client.messages.create(
+                    model=self.model, timeout=self.http.attempt_timeout(), **kwargs
+                )
+            )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                telemetry.count("tokens_in", usage.input_tokens)
+                telemetry.count("tokens_out", usage.output_tokens)
+                s.attrs.update(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+            stop_reason = getattr(response, "stop_reason", None)
+            s.attrs["stop_reason"] = stop_reason
+        logger.info(
+            "LLM %s: prompt ~%d tokens (%s actual), output %s/%s tokens",
+            kind, prompt_est, s.attrs.get("input_tokens", "?"),
+            s.attrs.get("output_tokens", "?"), kwargs.get("max_tokens"),
+        )
+        if stop_reason == "max_tokens":
+            logger.warning("LLM %s output was truncated at max_tokens=%s", kind, kwargs.get("max_tokens"))
+        return response
+
     # ── User message builders ────────────────────────────────────
 
     @staticmethod
-    def _build_digest_user_message(
-        papers: list[PaperCandidate],
-        digest_date: date,
-        keywords: list[str],
-    ) -> str:
-        lines = [
+    def _digest_header(digest_date: date, keywords: list[str], n_papers: int) -> str:
+        return "\n".join([
             f"date: {digest_date.isoformat()}",
             f"keywords_today: {', '.join(keywords)}",
-            f"papers ({len(papers)} total):",
+            f"papers ({n_papers} total):",
             "",
+            "",
+        ])
+
+    @staticmethod
+    def _paper_entry(i: int, p: PaperCandidate) -> str:
+        lines = [
+            f"--- paper {i} ---",
+            f"title: {p.title}",
+            f"authors: {', '.join(p.authors) if p.authors else '未提供'}",
+            f"affiliations: 未提供",
+            f"source: {p.source}",
+            f"url_arxiv: {p.url if p.arxiv_id else '未提供'}",
+            f"url_pdf: {p.pdf_url or '未提供'}",
+            f"url_hf: {'未提供'}",
+            f"published_date: {p.published.strftime('%Y-%m-%d') if p.published else '未提供'}",
+            f"hf_likes: {p.hf_likes}",
+            f"matched_tags: {', '.join(p.matched_keywords)}",
         ]
-        for i, p in enumerate(papers, 1):
-            lines.append(f"--- paper {i} ---")
-            lines.append(f"title: {p.title}")
-            lines.append(f"authors: {', '.join(p.authors) if p.authors else '未提供'}")
-            lines.append(f"affiliations: 未提供")
-            lines.append(f"source: {p.source}")
-            lines.append(f"url_arxiv: {p.url if p.arxiv_id else '未提供'}")
-            lines.append(f"url_pdf: {'未提供'}")
-            lines.append(f"url_hf: {'未提供'}")
-            lines.append(f"published_date: {p.published.strftime('%Y-%m-%d') if p.published else '未提供'}")
-            lines.append(f"hf_likes: {p.hf_likes}")
-            lines.append(f"matched_tags: {', '.join(p.matched_keywords)}")
+        if p.note_markdown:
+            lines.append(f"note:\n{p.note_markdown}")
+        else:
             lines.append(f"abstract: {p.abstract or '未提供'}")
-            lines.append("")
+        lines.append("")
         return "\n".join(lines)
 
+    @classmethod
+    def _build_digest_user_message(
+        cls,
+        papers: list[PaperCandidate],
+        digest_date: date,
+        keywords: list[str],
+    ) -> str:
+        header = cls._digest_header(digest_date, keywords, len(papers))
+        return header + "\n".join(cls._paper_entry(i, p) for i, p in enumerate(papers, 1))
+
     @staticmethod
     def _build_note_user_message(paper: PaperCandidate) -> str:
         lines = [
@@ -108,11 +474,13 @@ class Summarizer:
             f"affiliations: 未提供",
             f"source: {paper.source}",
             f"url_arxiv: {paper.url if paper.arxiv_id else '未提供'}",
-            f"url_pdf: 未提供",
+            f"url_pdf: {paper.pdf_url or '未提供'}",
             f"url_hf: 未提供",
             f"published_date: {paper.published.strftime('%Y-%m-%d') if paper.published else '未提供'}",
             f"hf_likes: {paper.hf_likes}",
             f"matched_tags: {', '.join(paper.matched_keywords)}",
             f"abstract: {paper.abstract or '未提供'}",
         ]
+        if paper.full_text:
+            lines.append(f"optional_context (full-text excerpt):\n{paper.full_text}")
         return "\n".join(lines)
@@ -0,0 +1,180 @@
+"""
+Per-stage timing and counters for a pipeline run.
+
+    with telemetry.span("fetch.arxiv"):
+        ...
+        telemetry.count("requests")
+
+Spans nest (the current span lives in a ContextVar) and carry counters such
+as requests, retries, bytes and tokens_in / tokens_out. At the end of a run
+the Tracer is written as a JSON run report and, optionally, as
+OpenTelemetry-style span records (one JSON object per line).
+
+Work handed to a thread pool keeps reporting into the submitting span when
+the callable is wrapped with `propagate()`.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Span:
+    __slots__ = ("span_id", "parent", "name", "attrs", "counters", "start", "end", "status")
+
+    def __init__(self, span_id: str, parent: Span | None, name: str, attrs: dict):
+        self.span_id = span_id
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+        self.counters: Counter = Counter()
+        self.start = time.time()
+        self.end: float | None = None
+        self.status = "ok"
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+
+class Tracer:
+    def __init__(self, run_name: str = "run"):
+        self.trace_id = os.urandom(16).hex()
+        self.run_name = run_name
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def new_span(self, name: str, parent: Span | None, attrs: dict) -> Span:
+        span = Span(os.urandom(8).hex(), parent, name, attrs)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def add(self, span: Span, name: str, value: float) -> None:
+        with self._lock:
+            span.counters[name] += value
+
+    # ── Export ──────────────────────────────────────────────────
+
+    def report(self) -> dict:
+        """Run report: every span with its duration and counters, plus totals."""
+        t0 = min((s.start for s in self.spans), default=time.time())
+        totals: Counter = Counter()
+        stages = []
+        for s in self.spans:
+            totals.update(s.counters)
+            stages.append({
+                "name": s.name,
+                "parent": s.parent.name if s.parent else None,
+                "start_offset_s": round(s.start - t0, 4),
+                "duration_s": round(s.duration, 4),
+                "status": s.status,
+                "counters": dict(s.counters),
+                "attrs": s.attrs,
+            })
+        return {
+            "run": self.run_name,
+            "trace_id": self.trace_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(t0)),
+            "duration_s": round(max((s.duration for s in self.spans if not s.parent), default=0.0), 4),
+            "totals": dict(totals),
+            "spans": stages,
+        }
+
+    def write_report(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False, default=str))
+        logger.info("Run report written to %s", path)
+
+    def write_spans(self, path: Path) -> None:
+        """Append spans as OpenTelemetry-style JSON lines (one span per line)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            for s in self.spans:
+                attributes = {**s.attrs, **{f"count.{k}": v for k, v in s.counters.items()}}
+                f.write(json.dumps({
+                    "traceId": self.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent.span_id if s.parent else "",
+                    "name": s.name,
+                    "startTimeUnixNano": int(s.start * 1e9),
+                    "endTimeUnixNano": int((s.end or time.time()) * 1e9),
+                    "status": {"code": "STATUS_CODE_OK" if s.status == "ok" else "STATUS_CODE_ERROR"},
+                    "attributes": attributes,
+                }, ensure_ascii=False, default=str) + "\n")
+        logger.info("Trace spans appended to %s", path)
+
+
+_tracer = Tracer()
+_current: ContextVar[Span | None] = ContextVar("telemetry_span", default=None)
+
+
+def start_run(run_name: str = "run") -> Tracer:
+    """Replace the process tracer with a fresh one for a new run."""
+    global _tracer
+    _tracer = Tracer(run_name)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+# Optional StageProfiler (see profiling.py); spans only check it for None
+_profiler = None
+
+
+def set_profiler(profiler) -> None:
+    global _profiler
+    _profiler = profiler
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    s = _tracer.new_span(name, _current.get(), attrs)
+    token = _current.set(s)
+    try:
+        if _profiler is None:
+            yield s
+        else:
+            with _profiler.stage(name):
+                yield s
+    except BaseException:
+        s.status = "error"
+        raise
+    finally:
+        s.end = time.time()
+        _current.reset(token)
+
+
+def count(name: str, value: float = 1) -> None:
+    """Add to a counter on the current span (no-op outside any span)."""
+    s = _current.get()
+    if s is not None:
+        _tracer.add(s, name, value)
+
+
+def propagate(fn: Callable[..., T]) -> Callable[..., T]:
+    """Bind fn to the current span so pool workers report into it."""
+    parent = _current.get()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
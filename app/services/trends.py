@@ -0,0 +1,123 @@
+"""
+Local keyword-trend index: paper counts and HF likes per publication date x
+keyword x source, kept in one JSON file and updated from each run's merged
+candidates.
+
+A paper stays in the fetch window for several runs, so the index remembers
+what each recent paper contributed (`recent`) and only applies the
+difference when it is seen again: a repeat adds nothing, new likes or a
+newly matched keyword adjust the totals. An update therefore costs
+O(candidates of the run), never a pass over history. Entries in `recent`
+older than `keep_days` are dropped once no run can fetch them again; the
+totals stay.
+
+Read by the `trends` sub-command and, optionally, the digest's trend
+section. Neither makes a network call.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.models import PaperCandidate
+from app.services.structured import Item
+
+logger = logging.getLogger(__name__)
+
+SECTION_HEADING = "关键词趋势"
+
+
+class TrendIndex:
+    def __init__(self, path: Path, keep_days: int = 30):
+        self.path = path
+        self.keep_days = keep_days
+        # "YYYY-MM-DD" -> keyword -> source -> [papers, likes]
+        self.counts: dict[str, dict[str, dict[str, list[int]]]] = {}
+        # dedup_key -> [date, keywords, source, likes]: what the paper added
+        self.recent: dict[str, list] = {}
+        try:
+            data = json.loads(path.read_text())
+            self.counts, self.recent = data["counts"], data["recent"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            logger.warning("Ignoring corrupt trend index %s", path)
+
+    # ── Updating ────────────────────────────────────────────────
+
+    def update(self, papers: list[PaperCandidate], run_date: date) -> int:
+        """Fold one run's merged candidates in; returns how many changed the totals."""
+        changed = 0
+        for p in papers:
+            day = (p.published.date() if p.published else run_date).isoformat()
+            entry = [day, sorted(set(p.matched_keywords)), p.source, p.hf_likes]
+            old = self.recent.get(p.dedup_key)
+            if old == entry:
+                continue
+            if old:
+                self._add(*old, sign=-1)
+            self._add(*entry, sign=1)
+            self.recent[p.dedup_key] = entry
+            changed += 1
+
+        horizon = (run_date - timedelta(days=self.keep_days)).isoformat()
+        self.recent = {k: e for k, e in self.recent.items() if e[0] >= horizon}
+        self.save()
+        logger.info("Trend index: %d of %d candidates new or changed", changed, len(papers))
+        return changed
+
+    def _add(self, day: str, keywords: list[str], source: str, likes: int, sign: int) -> None:
+        for kw in keywords:
+            cell = self.counts.setdefault(day, {}).setdefault(kw, {}).setdefault(source, [0, 0])
+            cell[0] += sign
+            cell[1] += sign * likes
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"counts": self.counts, "recent": self.recent}, ensure_ascii=False, sort_keys=True))
+        tmp.replace(self.path)
+
+    # ── Queries ─────────────────────────────────────────────────
+
+    def weekly(
+        self,
+        end: date,
+        weeks: int = 8,
+        keywords: list[str] | None = None,
+        source: str | None = None,
+    ) -> dict[str, list[tuple[date, int, float]]]:
+        """keyword -> [(week start, papers, mean HF likes)] for the `weeks`
+        seven-day windows ending on `end`, oldest first."""
+        first = end - timedelta(days=7 * weeks - 1)
+        totals: dict[str, list[list[int]]] = {}
+        for day, by_kw in self.counts.items():
+            d = date.fromisoformat(day)
+            if not first <= d <= end:
+                continue
+            week = (d - first).days // 7
+            for kw, by_source in by_kw.items():
+                if keywords is not None and kw not in keywords:
+                    continue
+                row = totals.setdefault(kw, [[0, 0] for _ in range(weeks)])
+                for src, (n, likes) in by_source.items():
+                    if source is None or src == source:
+                        row[week][0] += n
+                        row[week][1] += likes
+        return {
+            kw: [(first + timedelta(days=7 * i), n, likes / n if n else 0.0) for i, (n, likes) in enumerate(row)]
+            for kw, row in sorted(totals.items())
+        }
+
+
+def trend_section(index: TrendIndex, end: date, keywords: list[str]) -> list[Item]:
+    """Digest section: this week's papers per keyword against the week before."""
+    items = [Item("h2", SECTION_HEADING)]
+    weekly = index.weekly(end, weeks=2, keywords=keywords)
+    for kw in keywords:
+        (_, before, _), (_, now, likes) = weekly.get(kw, [(end, 0, 0.0), (end, 0, 0.0)])
+        change = f"{(now - before) / before:+.0%}" if before else ("新" if now else "—")
+        items.append(Item("li", f"**{kw}**: 近 7 天 {now} 篇（前 7 天 {before}，{change}），平均 HF likes {likes:.1f}"))
+    return items
@@ -0,0 +1,53 @@
+"""
+Candidate memory / key-computation benchmark.
+
+Usage: python -m benchmarks.bench_candidates [--n 100000]
+
+Builds N synthetic PaperCandidate objects, then times three passes over
+dedup_key + notion_key (the access pattern of merge, the Notion filter and
+the digest builder) and reports peak RSS.
+"""
+from __future__ import annotations
+
+import argparse
+import resource
+import sys
+import time
+
+from benchmarks.synthetic import make_candidates
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    base_rss = _peak_rss_mb()
+    t0 = time.perf_counter()
+    papers = make_candidates(args.n)
+    build_s = time.perf_counter() - t0
+    built_rss = _peak_rss_mb()
+
+    timings = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for p in papers:
+            p.dedup_key
+            p.notion_key
+        timings.append(time.perf_counter() - t0)
+
+    print(f"candidates:          {args.n}")
+    print(f"build:               {build_s:.3f}s")
+    print(f"keys (1st pass):     {timings[0]:.3f}s")
+    print(f"keys (2nd/3rd pass): {timings[1]:.3f}s / {timings[2]:.3f}s")
+    print(f"peak RSS:            {_peak_rss_mb():.1f} MB (candidates ~{built_rss - base_rss:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+HF HTML fallback parsing benchmark over the saved fixtures.
+
+Usage: python -m benchmarks.bench_hf_html [--repeat 50]
+
+Compares the original BeautifulSoup(html.parser) + CSS select pass with the
+embedded-JSON extractor and the lxml / bs4 article extractors.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.providers import hf_provider
+from app.providers.hf_provider import HuggingFaceProvider
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+KEYWORDS = ["humanoid", "world model", "dexterous manipulation", "robotics"]
+
+
+def _legacy_parse(text: str) -> int:
+    """The pre-fallback-rewrite parse: full html.parser tree + select per article."""
+    found = 0
+    soup = BeautifulSoup(text, "html.parser")
+    for article in soup.select("article"):
+        title_el = article.select_one("h3 a")
+        if not title_el:
+            continue
+        like_el = article.select_one("[class*='like']")
+        if like_el:
+            re.search(r"(\d+)", like_el.get_text())
+        found += 1
+    return found
+
+
+def _time(fn, text: str, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    provider = HuggingFaceProvider()
+    for path in sorted(FIXTURES.glob("hf_papers_*.html")):
+        text = path.read_text()
+        print(f"{path.name} ({len(text) / 1024:.0f} KiB)")
+        print(f"  legacy html.parser:  {_time(_legacy_parse, text, args.repeat):7.2f} ms")
+        print(f"  bs4 articles:        {_time(hf_provider._extract_articles_bs4, text, args.repeat):7.2f} ms")
+        if hf_provider._lxml_html() is not None:
+            print(f"  lxml articles:       {_time(hf_provider._extract_articles_lxml, text, args.repeat):7.2f} ms")
+        print(f"  _parse_html (auto):  {_time(lambda t: provider._parse_html(t, KEYWORDS), text, args.repeat):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
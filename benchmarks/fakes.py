@@ -0,0 +1,472 @@
+"""
+Local HTTP fakes of the services the pipeline talks to, for offline runs.
+
+    with FakeArxiv() as arxiv, FakeHuggingFace() as hf, FakeNotion() as notion, \
+            FakeAnthropic(latency=0.2, rate_limit=5) as claude:
+        env = {**arxiv.env(), **hf.env(), **notion.env(), **claude.env()}
+
+    writer = NotionWriter(client=FakeNotion().client(), ...)   # in-process
+
+Each fake runs a ThreadingHTTPServer on 127.0.0.1 with an ephemeral port,
+counts calls per route, and can add latency and a requests-per-second limit
+(answered with 429 + Retry-After, like the real APIs).
+"""
+from __future__ import annotations
+
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import synthetic
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+class FakeService:
+    """Base class: subclasses implement handle(method, path, query, body)."""
+
+    def __init__(self, latency: float = 0.0, rate_limit: float | None = None):
+        self.latency = latency
+        self.rate_limit = rate_limit  # requests per second, None = unlimited
+        self.calls: Counter = Counter()
+        self._recent: deque[float] = deque()
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    # ── lifecycle ──
+
+    def start(self) -> FakeService:
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; without this,
+                # Nagle + delayed ACK adds ~40ms to every keep-alive request.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                status, headers, payload = service._serve(self.command, self.path, raw)
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def env(self) -> dict[str, str]:
+        return {}
+
+    # ── request handling ──
+
+    def _serve(self, method: str, raw_path: str, raw_body: bytes) -> tuple[int, dict, object]:
+        parsed = urlparse(raw_path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        body = json.loads(raw_body) if raw_body else {}
+        with self._lock:
+            self.calls[f"{method} {_route(parsed.path)}"] += 1
+            limited = self._over_rate_limit()
+        if self.latency:
+            time.sleep(self.latency)
+        if limited:
+            return 429, {"Content-Type": "application/json", "Retry-After": "1"}, self.rate_limited_body()
+        return self.handle(method, parsed.path, query, body)
+
+    def _over_rate_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate_limit:
+            return True
+        self._recent.append(now)
+        return False
+
+    def rate_limited_body(self) -> object:
+        return {"message": "rate limited"}
+
+    def handle(self, method: str, path: str, query: dict, body: dict) -> tuple[int, dict, object]:
+        raise NotImplementedError
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+_ID_RE = re.compile(r"/[0-9a-f]{8}-[0-9a-f-]{27}|/\d{4}-\d{2}-\d{2}")
+
+
+def _route(path: str) -> str:
+    """Collapse ids in a path so calls are counted per endpoint."""
+    return _ID_RE.sub("/{id}", path)
+
+
+_JSON = {"Content-Type": "application/json"}
+
+
+# ── arXiv ────────────────────────────────────────────────────────
+
+class FakeArxiv(FakeService):
+    def __init__(self, results_per_keyword: int = 60, **kwargs):
+        super().__init__(**kwargs)
+        self.results_per_keyword = results_per_keyword
+
+    def env(self) -> dict[str, str]:
+        return {"ARXIV_BASE_URL": self.url}
+
+    def handle(self, method, path, query, body):
+        m = re.search(r'all:"([^"]+)"', query.get("search_query", ""))
+        keyword = m.group(1) if m else "robotics"
+        feed = synthetic.arxiv_atom_feed(
+            keyword,
+            start=int(query.get("start", 0)),
+            max_results=int(query.get("max_results", 100)),
+            total=self.results_per_keyword,
+        )
+        return 200, {"Content-Type": "application/atom+xml"}, feed.encode()
+
+
+# ── Hugging Face ─────────────────────────────────────────────────
+
+class FakeHuggingFace(FakeService):
+    def __init__(self, papers_per_day: int = 40, **kwargs):
+        super().__init__(**kwargs)
+        self.papers_per_day = papers_per_day
+
+    def env(self) -> dict[str, str]:
+        return {"HF_BASE_URL": self.url}
+
+    def handle(self, method, path, query, body):
+        if path == "/api/daily_papers":
+            day = date.fromisoformat(query["date"]) if "date" in query else date.today()
+            return 200, _JSON, synthetic.hf_daily_papers_json(day, self.papers_per_day)
+        if path == "/papers":
+            return 200, {"Content-Type": "text/html"}, (FIXTURES / "hf_papers_embedded.html").read_bytes()
+        return 404, _JSON, {"error": "not found"}
+
+
+# ── Anthropic ────────────────────────────────────────────────────
+
+class FakeAnthropic(FakeService):
+    """POST /v1/messages: answers digest prompts with a digest and anything
+    else with a note, shaped like the skills/ prompt outputs."""
+
+    def env(self) -> dict[str, str]:
+        return {"ANTHROPIC_BASE_URL": self.url, "ANTHROPIC_API_KEY": "sk-ant-fake"}
+
+    def rate_limited_body(self):
+        return {"type": "error", "error": {"type": "rate_limit_error", "message": "rate limited"}}
+
+    def handle(self, method, path, query, body):
+        if path != "/v1/messages":
+            return 404, _JSON, {"type": "error", "error": {"type": "not_found_error", "message": path}}
+        prompt = "".join(
+            m["content"] if isinstance(m["content"], str) else json.dumps(m["content"])
+            for m in body.get("messages", [])
+        )
+        titles = re.findall(r"^title: (.+)$", prompt, flags=re.M)
+        if body.get("tools"):
+            return 200, _JSON, self._tool_use(body, prompt)
+        if prompt.startswith("mode: papers_only"):
+            first = re.search(r"^--- paper (\d+) ---$", prompt, flags=re.M)
+            start = int(first.group(1)) if first else 1
+            digest = synthetic.make_digest_markdown(titles, start=start)
+            text = digest[digest.index(f"### {start}."):]
+        elif prompt.startswith("mode: overview_only"):
+            text = synthetic.make_digest_markdown([]).split("## 今日论文", 1)[0]
+        elif re.search(r"^papers \(\d+ total\):", prompt, flags=re.M):
+            text = synthetic.make_digest_markdown(titles)
+        else:
+            paper = synthetic.PaperCandidate(title=titles[0] if titles else "Paper", url="", source="arxiv")
+            text = synthetic.make_note_markdown(paper)
+        return 200, _JSON, {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        }
+
+
+    def _tool_use(self, body: dict, prompt: str) -> dict:
+        tool = body["tools"][0]
+        props = tool["input_schema"]["properties"]
+        data: dict = {}
+        if "commentary" in props:
+            data["commentary"] = " ".join(synthetic._WORDS) * 2
+            data["takeaways"] = [" ".join(synthetic._WORDS[i:i + 8]) for i in range(5)]
+        if "scores" in props:
+            data["scores"] = [
+                {"paper": int(n), "score": int(n) * 7 % 11} for n in re.findall(r"^\[(\d+)\] ", prompt, flags=re.M)
+            ]
+        if "papers" in props:
+            data["papers"] = [
+                synthetic.make_digest_section(int(n)) for n in re.findall(r"^--- paper (\d+) ---$", prompt, flags=re.M)
+            ]
+        text = json.dumps(data, ensure_ascii=False)
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-fake"),
+            "content": [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool["name"], "input": data}],
+            "stop_reason": "tool_use",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        }
+
+
+# ── Notion ───────────────────────────────────────────────────────
+
+class FakeNotion(FakeService):
+    """In-memory pages and blocks behind the Notion endpoints NotionWriter uses.
+
+    Requests that break Notion's size limits (more than 100 children per
+    create/append, rich text longer than 2000 characters or with more than
+    100 elements) get the same 400 validation_error as the real API and are
+    counted in `rejected`. Pass rate_limit=FakeNotion.RATE_LIMIT for Notion's
+    average of 3 requests per second. Besides serving HTTP, client() returns
+    a notion_client.Client that talks to the fake in-process.
+    """
+
+    DIGEST_PARENT = "00000000-0000-4000-8000-000000000001"
+    NOTES_DB = "00000000-0000-4000-8000-000000000002"
+    RATE_LIMIT = 3.0
+    MAX_CHILDREN = 100
+    MAX_TEXT = 2000
+    MAX_RICH_TEXT = 100
+
+    NOTES_DB_PROPERTIES = ("Title", "URL", "Key", "ArXiv ID", "Tags", "Date Created", "Content Hash")
+
+    def __init__(
+        self,
+        existing_notes: int = 0,
+        strict: bool = True,
+        db_properties: tuple[str, ...] = NOTES_DB_PROPERTIES,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.strict = strict
+        self.db_properties = db_properties
+        self.rejected: Counter = Counter()
+        self.reset(existing_notes)
+
+    def client(self):
+        """A notion_client.Client served by this fake without a socket (start() not needed)."""
+        import httpx
+        from notion_client import Client
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status, headers, payload = self._serve(request.method, request.url.raw_path.decode(), request.content)
+            return httpx.Response(status, headers=headers, json=payload)
+
+        return Client(
+            auth="secret_fake",
+            notion_version="2022-06-28",
+            base_url="http://notion.fake",
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+
+    def reset(self, existing_notes: int = 0) -> None:
+        """Empty the workspace, then seed `existing_notes` pages in the notes DB."""
+        self.pages: dict[str, dict] = {}
+        self.blocks: dict[str, dict] = {}
+        self.children: dict[str, list[str]] = {self.DIGEST_PARENT: []}
+        self.calls.clear()
+        self.rejected.clear()
+        for i in range(existing_notes):
+            self._create_page(
+                {"database_id": self.NOTES_DB},
+                {"Key": {"rich_text": [{"text": {"content": f"seen-{i}"}}]}},
+                [],
+            )
+
+    def env(self) -> dict[str, str]:
+        return {
+            "NOTION_BASE_URL": self.url,
+            "NOTION_API_KEY": "secret_fake",
+            "DIGEST_PARENT_PAGE_ID": self.DIGEST_PARENT,
+            "NOTES_DB_ID": self.NOTES_DB,
+        }
+
+    def rate_limited_body(self):
+        return {"object": "error", "status": 429, "code": "rate_limited", "message": "rate limited"}
+
+    def handle(self, method, path, query, body):
+        with self._lock:
+            error = self._validate(body) if self.strict and method in ("POST", "PATCH") else None
+            if not error and self.strict and _route(path) in ("/v1/pages", "/v1/pages/{id}"):
+                error = self._validate_properties(path, body)
+            if error:
+                self.rejected[f"{method} {_route(path)}"] += 1
+                return 400, _JSON, {"object": "error", "status": 400, "code": "validation_error", "message": error}
+            return self._handle(method, path, query, body)
+
+    def _validate_properties(self, path: str, body: dict) -> str | None:
+        """Notes DB pages may only set properties the database has."""
+        page_id = path.rstrip("/").rsplit("/", 1)[-1]
+        parent = body.get("parent") or self.pages.get(page_id, {}).get("parent", {})
+        if "database_id" not in parent:
+            return None
+        unknown = [name for name in body.get("properties", {}) if name not in self.db_properties]
+        if unknown:
+            return f"{unknown[0]} is not a property that exists."
+        return None
+
+    def _validate(self, body: dict, where: str = "body") -> str | None:
+        """The first size-limit violation in a request body, as Notion words it."""
+        for key, value in body.items():
+            at = f"{where}.{key}"
+            if key == "children" and isinstance(value, list) and len(value) > self.MAX_CHILDREN:
+                return f"{at}.length should be ≤ `{self.MAX_CHILDREN}`, instead was `{len(value)}`."
+            if key == "rich_text" and isinstance(value, list):
+                if len(value) > self.MAX_RICH_TEXT:
+                    return f"{at}.length should be ≤ `{self.MAX_RICH_TEXT}`, instead was `{len(value)}`."
+                for i, rt in enumerate(value):
+                    content = rt.get("text", {}).get("content", "")
+                    if len(content) > self.MAX_TEXT:
+                        return f"{at}[{i}].text.content.length should be ≤ `{self.MAX_TEXT}`, instead was `{len(content)}`."
+            if isinstance(value, dict):
+                error = self._validate(value, at)
+            elif isinstance(value, list):
+                error = next(
+                    (e for i, v in enumerate(value) if isinstance(v, dict) and (e := self._validate(v, f"{at}[{i}]"))),
+                    None,
+                )
+            else:
+                error = None
+            if error:
+                return error
+        return None
+
+    def _handle(self, method, path, query, body):
+        parts = path.strip("/").split("/")[1:]  # drop "v1"
+        if parts == ["pages"] and method == "POST":
+            page = self._create_page(body["parent"], body.get("properties", {}), body.get("children", []))
+            return 200, _JSON, page
+        if len(parts) == 2 and parts[0] == "pages" and method == "PATCH":
+            page = self.pages[parts[1]]
+            page["properties"].update(body.get("properties", {}))
+            return 200, _JSON, page
+        if len(parts) == 2 and parts[0] == "pages" and method == "GET" and parts[1] in self.pages:
+            return 200, _JSON, self.pages[parts[1]]
+        if len(parts) == 3 and parts[0] == "blocks" and parts[2] == "children":
+            if method == "GET":
+                return 200, _JSON, self._list_children(parts[1], query)
+            if method == "PATCH":
+                ids = [self._add_block(parts[1], b) for b in body.get("children", [])]
+                return 200, _JSON, {"object": "list", "results": [self.blocks[i] for i in ids]}
+        if len(parts) == 2 and parts[0] == "blocks" and method == "PATCH" and parts[1] in self.blocks:
+            block = self.blocks[parts[1]]
+            block.update({k: v for k, v in body.items() if k == block["type"]})
+            return 200, _JSON, block
+        if len(parts) == 2 and parts[0] == "blocks" and method == "DELETE":
+            block = self.blocks.pop(parts[1])
+            self.children[block["parent_id"]].remove(parts[1])
+            return 200, _JSON, {**block, "archived": True}
+        if len(parts) == 2 and parts[0] == "databases" and method == "GET":
+            properties = {name: {"name": name} for name in self.db_properties}
+            return 200, _JSON, {"object": "database", "id": parts[1], "properties": properties}
+        if len(parts) == 3 and parts[0] == "databases" and parts[2] == "query":
+            return 200, _JSON, self._query(parts[1], body)
+        return 404, _JSON, {"object": "error", "status": 404, "code": "object_not_found", "message": path}
+
+    def _create_page(self, parent: dict, properties: dict, children: list[dict]) -> dict:
+        page_id = str(uuid.uuid4())
+        page = {"object": "page", "id": page_id, "parent": parent, "properties": properties}
+        self.pages[page_id] = page
+        self.children[page_id] = []
+        for b in children:
+            self._add_block(page_id, b)
+        if "page_id" in parent:
+            title = properties.get("title", {}).get("title", [{}])[0].get("text", {}).get("content", "")
+            self._add_block(parent["page_id"], {"type": "child_page", "child_page": {"title": title}}, page_id)
+        return page
+
+    def _add_block(self, parent_id: str, block: dict, block_id: str | None = None) -> str:
+        block_id = block_id or str(uuid.uuid4())
+        self.blocks[block_id] = {**block, "object": "block", "id": block_id, "parent_id": parent_id}
+        self.children.setdefault(parent_id, []).append(block_id)
+        return block_id
+
+    def _list_children(self, block_id: str, query: dict) -> dict:
+        ids = self.children.get(block_id, [])
+        start = int(query.get("start_cursor") or 0)
+        size = int(query.get("page_size") or 100)
+        chunk = ids[start : start + size]
+        has_more = start + size < len(ids)
+        return {
+            "object": "list",
+            "results": [self.blocks[i] for i in chunk],
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None,
+        }
+
+    def _query(self, database_id: str, body: dict) -> dict:
+        pages = [p for p in self.pages.values() if p["parent"].get("database_id") == database_id]
+        flt = body.get("filter")
+        if flt and "rich_text" in flt:
+            want = flt["rich_text"]["equals"]
+            pages = [
+                p for p in pages
+                if _rich_text_value(p["properties"].get(flt["property"], {})) == want
+            ]
+        start = int(body.get("start_cursor") or 0)
+        size = int(body.get("page_size") or 100)
+        chunk = pages[start : start + size]
+        has_more = start + size < len(pages)
+        return {
+            "object": "list",
+            "results": chunk,
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None,
+        }
+
+
+def _rich_text_value(prop: dict) -> str:
+    return "".join(rt.get("text", {}).get("content", "") for rt in prop.get("rich_text", []))
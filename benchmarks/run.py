@@ -0,0 +1,469 @@
+"""
+Offline benchmark suite: every pipeline stage in isolation plus end-to-end
+`daily_digest.main` runs, all against local fakes (no network).
+
+Usage:
+    python -m benchmarks.run                          # 1k + 10k scales, compare to baseline
+    python -m benchmarks.run --scales 1k,10k,100k
+    python -m benchmarks.run --stages merge,rank --e2e-runs 0
+    python -m benchmarks.run --llm-latency 0.5 --llm-rps 2
+    python -m benchmarks.run --notion-rps 3           # Notion's real rate limit
+    python -m benchmarks.run --update-baseline        # record current numbers
+    python -m benchmarks.run --stages '' --e2e-runs 0 --cpu-workers 1,2,4
+
+Per stage it reports throughput (items/s at the median), latency percentiles
+over the repeats and the tracemalloc peak of one extra traced repeat. The
+e2e runs report wall-time percentiles, per-stage medians from the run
+reports and the peak RSS of the child process. --cpu-workers times the
+process-pool stages (title keys, note rendering) at each worker count,
+with the speedup over the first. The Notion section counts
+API calls for writing one digest and for re-running it. Results are
+compared with benchmarks/baseline.json; a p50 or peak-memory regression
+beyond --tolerance, or any Notion call count above the baseline, exits
+with status 1. Baselines are machine-specific: refresh
+them with --update-baseline on the machine that runs the comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+
+from app.services import archive
+from benchmarks import synthetic
+from benchmarks.fakes import FakeAnthropic, FakeArxiv, FakeHuggingFace, FakeNotion
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+STAGES = [
+    "merge", "notion_filter", "rank", "markdown_to_blocks", "digest_body", "hf_parse",
+    "hf_payload", "hf_stream",
+    "fetch", "notion_scan", "summarize", "rerank", "write",
+] + (["archive_query"] if archive.available() else [])
+
+
+# ── Stage setups: each returns (items, fn) ───────────────────────
+
+def _stage_merge(n: int):
+    from app.services.merger import merge_and_dedupe
+    papers = synthetic.make_candidates(n)
+    return n, lambda: merge_and_dedupe(papers)
+
+
+def _stage_notion_filter(n: int):
+    papers = synthetic.make_candidates(n)
+    existing = {p.notion_key for p in papers[::3]}
+    return n, lambda: [p for p in papers if p.notion_key not in existing]
+
+
+def _stage_rank(n: int):
+    from app.services.ranker import rank_papers
+    papers = synthetic.make_candidates(n)
+    return n, lambda: rank_papers(papers, synthetic.KEYWORDS, top_k=10)
+
+
+def _stage_markdown_to_blocks(n: int):
+    from app.services.notion_writer import _markdown_to_blocks
+    notes = [synthetic.make_note_markdown(p) for p in synthetic.make_candidates(max(n // 10, 1))]
+    return len(notes), lambda: [_markdown_to_blocks(md) for md in notes]
+
+
+def _stage_digest_body(n: int):
+    from app.services.notion_writer import NotionWriter
+    papers = synthetic.make_candidates(10)
+    digest_md = synthetic.make_digest_markdown([p.title for p in papers])
+    note_map = {p.dedup_key: f"page-{i}" for i, p in enumerate(papers)}
+    writer = NotionWriter.__new__(NotionWriter)  # body building needs no client
+    reps = max(n // 100, 1)
+    return reps, lambda: [writer._build_digest_body(digest_md, papers, note_map) for _ in range(reps)]
+
+
+def _stage_hf_parse(n: int):
+    from app.providers.hf_provider import HuggingFaceProvider
+    items = [item for d in range(max(n // 40, 1)) for item in synthetic.hf_daily_papers(date.fromordinal(738000 + d))]
+    provider = HuggingFaceProvider()
+    return len(items), lambda: provider._parse_api_items(items, synthetic.KEYWORDS)
+
+
+def _hf_payload(n: int) -> bytes:
+    # One day listing n papers: the size where decoding the whole body at once hurts
+    return synthetic.hf_daily_papers_json(date.fromordinal(738000), n)
+
+
+def _stage_hf_payload(n: int):
+    """The whole-body path: decode the payload, then filter the items."""
+    from app.providers.hf_provider import HuggingFaceProvider
+    raw = _hf_payload(n)
+    provider = HuggingFaceProvider()
+    return n, lambda: provider._parse_api_items(json.loads(raw), synthetic.KEYWORDS)
+
+
+def _stage_hf_stream(n: int):
+    """The same payload parsed and filtered item by item as chunks arrive."""
+    from app.providers.hf_provider import STREAM_CHUNK_BYTES, HuggingFaceProvider
+    raw = _hf_payload(n)
+    provider = HuggingFaceProvider()
+    chunks = lambda: (raw[i : i + STREAM_CHUNK_BYTES] for i in range(0, len(raw), STREAM_CHUNK_BYTES))
+    return n, lambda: provider._parse_stream(chunks(), synthetic.KEYWORDS, date.fromordinal(738000))
+
+
+def _stage_archive_query(n: int):
+    # Two years of daily partitions, n // 50 candidates a day; queries run on
+    # an archive whose partitions are already mapped, as in a long-lived session
+    tmp = tempfile.TemporaryDirectory()
+    store = archive.PaperArchive(Path(tmp.name))
+    papers = synthetic.make_candidates(max(n // 50, 10))
+    days = [date(2024, 1, 1) + timedelta(days=d) for d in range(730)]
+    for day in days:
+        store.write(day, [archive.ArchiveRow("default", p, p.hf_likes / 10, i < 5, False) for i, p in enumerate(papers)])
+    store.scan()
+
+    def run():
+        tmp  # keep the directory alive while the stage is measured
+        store.weekly_counts(synthetic.KEYWORDS[0])
+        store.skipped()
+
+    return len(days) * len(papers), run
+
+
+def _stage_fetch(n: int, fakes: dict):
+    from app.providers.arxiv_provider import ArxivProvider
+    from app.providers.hf_provider import HuggingFaceProvider
+
+    def run():
+        arxiv_papers = ArxivProvider(delay_seconds=0).fetch(synthetic.KEYWORDS)
+        hf_papers = HuggingFaceProvider(window_days=7).fetch(synthetic.KEYWORDS)
+        return arxiv_papers + hf_papers
+
+    return len(synthetic.KEYWORDS) + 7, run
+
+
+def _stage_notion_scan(n: int, fakes: dict):
+    from app.services.notion_writer import NotionWriter
+    fakes["notion"].reset(existing_notes=n)
+    writer = NotionWriter()
+    return n, writer.get_existing_keys
+
+
+def _stage_summarize(n: int, fakes: dict):
+    from app.services.summarizer import Summarizer
+    papers = synthetic.make_candidates(5)
+    summarizer = Summarizer()
+
+    def run():
+        for p in papers:
+            p.note_markdown = summarizer.summarize_for_note(p)
+        summarizer.summarize_for_digest(papers, date.today(), synthetic.KEYWORDS)
+
+    return len(papers) + 1, run
+
+
+def _stage_rerank(n: int, fakes: dict):
+    """Claude rerank of the top 100 of n candidates, with no score cache:
+    4 batch calls at every scale."""
+    from app.services.reranker import LLMReranker
+    from app.services.summarizer import Summarizer
+    papers = synthetic.make_candidates(n)
+    summarizer = Summarizer()
+    return n, lambda: LLMReranker(summarizer, candidates=100, batch_size=25).rerank(
+        papers, synthetic.KEYWORDS, top_k=10
+    )
+
+
+def _stage_write(n: int, fakes: dict):
+    from app.services.notion_writer import NotionWriter
+    papers = synthetic.make_candidates(5)
+    for p in papers:
+        p.note_markdown = synthetic.make_note_markdown(p)
+    digest_md = synthetic.make_digest_markdown([p.title for p in papers])
+    writer = NotionWriter()
+    return len(papers), lambda: writer.write_digest(papers, date.today(), digest_md)
+
+
+_SERVICE_STAGES = {"fetch", "notion_scan", "summarize", "rerank", "write"}
+# Stages whose cost does not depend on --scales run once, under "fixed"
+_FIXED_STAGES = {"fetch", "summarize", "write"}
+
+
+def _measure(setup: Callable, repeats: int) -> dict:
+    items, fn = setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    p50 = statistics.median(latencies)
+    return {
+        "items": items,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "throughput_per_s": round(items / p50, 1) if p50 else None,
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _start_fakes(args) -> dict:
+    return {
+        "arxiv": FakeArxiv(latency=args.arxiv_latency).start(),
+        "hf": FakeHuggingFace().start(),
+        "notion": FakeNotion(rate_limit=args.notion_rps).start(),
+        "anthropic": FakeAnthropic(latency=args.llm_latency, rate_limit=args.llm_rps).start(),
+    }
+
+
+def run_stages(args, scales: list[str]) -> dict:
+    results: dict = {}
+    fakes = _start_fakes(args)
+    saved_env = dict(os.environ)
+    try:
+        for fake in fakes.values():
+            os.environ.update(fake.env())
+        for stage in args.stages:
+            setup_fn = globals()[f"_stage_{stage}"]
+            for scale in (["fixed"] if stage in _FIXED_STAGES else scales):
+                n = synthetic.SCALES.get(scale, 0)
+                if stage in _SERVICE_STAGES:
+                    setup = lambda: setup_fn(n, fakes)
+                else:
+                    setup = lambda: setup_fn(n)
+                res = _measure(setup, args.repeats)
+                results[f"{stage}/{scale}"] = res
+                print(
+                    f"  {stage + '/' + scale:<28} p50 {res['p50_ms']:>10.2f} ms  p95 {res['p95_ms']:>10.2f} ms"
+                    f"  {res['throughput_per_s'] or 0:>12.0f} items/s  peak {res['peak_mem_mb']:>8.2f} MB"
+                )
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        for fake in fakes.values():
+            fake.stop()
+    return results
+
+
+def run_cpu_scaling(args, scales: list[str]) -> dict:
+    from app.models import compute_keys
+    from app.services import cpu_pool
+    from app.services.notion_writer import _markdown_to_blocks
+
+    results: dict = {}
+    for scale in scales:
+        n = synthetic.SCALES[scale]
+        papers = synthetic.make_candidates(n)
+        # No arxiv_id: every key needs the title normalized
+        srcs = [(p.title, None, p.authors[0], p.published) for p in papers]
+        notes = [synthetic.make_note_markdown(p) for p in papers[: max(n // 10, 1)]]
+        for name, fn, items in (("keys", compute_keys, srcs), ("notes", _markdown_to_blocks, notes)):
+            first = None
+            for workers in args.cpu_workers:
+                cpu_pool.configure(min_items={name: 0}, max_workers=workers)
+                cpu_pool.map_chunked(fn, items[: workers * 4], name)  # start the pool outside the timing
+                res = _measure(lambda: (len(items), lambda: cpu_pool.map_chunked(fn, items, name)), args.repeats)
+                first = first or res["p50_ms"]
+                res["speedup"] = round(first / res["p50_ms"], 2)
+                results[f"cpu_pool/{name}/{scale}/w{workers}"] = res
+                print(
+                    f"  {name + '/' + scale + ' x' + str(workers):<28} p50 {res['p50_ms']:>10.2f} ms"
+                    f"  {res['throughput_per_s'] or 0:>12.0f} items/s  speedup {res['speedup']:>5.2f}x"
+                )
+    cpu_pool.shutdown()
+    cpu_pool.configure()
+    return results
+
+
+def run_e2e(args) -> dict:
+    """Run `python -m app.daily_digest` against fresh fakes and a fresh cache each time."""
+    walls, stage_times = [], {}
+    for _ in range(args.e2e_runs):
+        fakes = _start_fakes(args)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                cfg_path = Path(tmp) / "config.yaml"
+                cfg_path.write_text(
+                    (ROOT / "config.yaml").read_text().replace("delay_seconds: 3", "delay_seconds: 0")
+                )
+                env = {**os.environ, "CACHE_DIR": tmp, "CONFIG_PATH": str(cfg_path)}
+                for fake in fakes.values():
+                    env.update(fake.env())
+                report_path = Path(tmp) / "report.json"
+                t0 = time.perf_counter()
+                proc = subprocess.run(
+                    [sys.executable, "-m", "app.daily_digest", "--report", str(report_path)],
+                    cwd=ROOT, env=env, capture_output=True, text=True,
+                )
+                walls.append(time.perf_counter() - t0)
+                if proc.returncode != 0:
+                    sys.stderr.write(proc.stderr[-2000:])
+                    raise SystemExit("e2e run failed")
+                for span in json.loads(report_path.read_text())["spans"]:
+                    stage_times.setdefault(span["name"], []).append(span["duration_s"])
+        finally:
+            for fake in fakes.values():
+                fake.stop()
+
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result = {
+        "runs": len(walls),
+        "p50_ms": round(statistics.median(walls) * 1000, 3),
+        "p95_ms": round(_percentile(walls, 95) * 1000, 3),
+        "peak_rss_mb": round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1),
+        "stages_p50_ms": {k: round(statistics.median(v) * 1000, 3) for k, v in stage_times.items()},
+    }
+    print(f"  e2e: p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  peak RSS {result['peak_rss_mb']} MB")
+    for name, ms in result["stages_p50_ms"].items():
+        print(f"    {name:<28} {ms:>10.2f} ms")
+    return result
+
+
+def run_notion_calls(args) -> dict:
+    """Notion API calls for one digest written into an empty workspace, for
+    re-running the same digest (pages exist and are unchanged), and for an
+    incremental update that appends one new paper to it."""
+    from app.services.notion_writer import NotionWriter
+
+    notion = FakeNotion()
+    tmp = tempfile.TemporaryDirectory()
+    writer = NotionWriter(
+        client=notion.client(),
+        digest_parent_page=FakeNotion.DIGEST_PARENT,
+        notes_db=FakeNotion.NOTES_DB,
+        hash_index=Path(tmp.name) / "notion_hashes.json",
+    )
+    from app.services.merger import merge_and_dedupe
+
+    papers = merge_and_dedupe(synthetic.make_candidates(args.notion_papers * 2))[: args.notion_papers + 1]
+    for p in papers:
+        p.note_markdown = synthetic.make_note_markdown(p)
+    papers, new = papers[:-1], papers[-1:]
+    digest_md = synthetic.make_digest_markdown([p.title for p in papers])
+
+    result: dict = {"papers": len(papers)}
+    for phase in ("first_run", "rerun", "append"):
+        if phase == "append":
+            writer.get_existing_keys()  # the pipeline's Notes DB scan, which runs anyway
+            notion.calls.clear()
+            page = writer.read_digest(date.today())
+            sections_md = synthetic.make_digest_markdown([p.title for p in new], start=page.sections + 1)
+            writer.append_to_digest(page, new, sections_md[sections_md.index("### "):])
+        else:
+            notion.calls.clear()
+            writer.write_digest(papers, date.today(), digest_md)
+        result[phase] = notion.total_calls
+        result[f"{phase}_by_endpoint"] = dict(sorted(notion.calls.items()))
+        # Wall-time floor imposed by Notion's average rate limit
+        result[f"{phase}_min_s"] = round(notion.total_calls / FakeNotion.RATE_LIMIT, 1)
+    result["rejected"] = sum(notion.rejected.values())
+    tmp.cleanup()
+
+    print(f"  {len(papers)} papers: first run {result['first_run']} calls, re-run {result['rerun']} calls,"
+          f" appending one paper {result['append']} calls"
+          f" (>= {result['first_run_min_s']} s / {result['rerun_min_s']} s at {FakeNotion.RATE_LIMIT:g} req/s)")
+    for phase in ("first_run", "rerun", "append"):
+        for endpoint, n in result[f"{phase}_by_endpoint"].items():
+            print(f"    {phase:<10} {endpoint:<36} {n:>6}")
+    return result
+
+
+# Call counts are a hard budget: any increase over the baseline is a regression
+_BUDGET_METRICS = ("first_run", "rerun", "append", "rejected")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in _BUDGET_METRICS:
+            if metric in res and metric in base and res[metric] > base[metric]:
+                regressions.append(f"{key} {metric}: {base[metric]} -> {res[metric]} (over budget)")
+        for metric in ("p50_ms", "peak_mem_mb", "peak_rss_mb"):
+            if metric in res and metric in base and base[metric]:
+                ratio = res[metric] / base[metric]
+                if ratio > 1 + tolerance:
+                    regressions.append(f"{key} {metric}: {base[metric]} -> {res[metric]} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--scales", default="1k,10k", help=f"Comma list of {', '.join(synthetic.SCALES)}")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma list of stages ('' for none)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--e2e-runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake Claude latency (s)")
+    parser.add_argument("--llm-rps", type=float, default=None, help="Fake Claude rate limit (req/s)")
+    parser.add_argument("--arxiv-latency", type=float, default=0.0, help="Fake arXiv latency (s)")
+    parser.add_argument("--notion-rps", type=float, default=None,
+                        help=f"Fake Notion rate limit (req/s; Notion's own is {FakeNotion.RATE_LIMIT:g})")
+    parser.add_argument("--notion-papers", type=int, default=10,
+                        help="Papers per digest for the Notion call count (0 to skip)")
+    parser.add_argument("--cpu-workers", default="",
+                        help=f"Comma list of process counts for the CPU pool scaling run ({os.cpu_count()} cores here)")
+    parser.add_argument("--output", type=str, default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", type=str, default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    args = parser.parse_args(argv)
+    args.stages = [s for s in args.stages.split(",") if s]
+    args.cpu_workers = [int(w) for w in args.cpu_workers.split(",") if w]
+    logging.basicConfig(level=logging.WARNING)
+
+    results: dict = {}
+    if args.stages:
+        print("Stages:")
+        results.update(run_stages(args, args.scales.split(",")))
+    if args.cpu_workers:
+        print("CPU pool scaling:")
+        results.update(run_cpu_scaling(args, args.scales.split(",")))
+    if args.notion_papers:
+        print("Notion API calls:")
+        results["notion_calls"] = run_notion_calls(args)
+    if args.e2e_runs:
+        print("End to end:")
+        results["e2e"] = run_e2e(args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        merged = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        merged.update(results)
+        baseline_path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline updated: {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"No regressions vs {baseline_path.name} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Deterministic synthetic data for benchmarks: candidates, arXiv Atom feeds,
+HF daily-papers payloads and Claude-style markdown.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+from app.models import PaperCandidate
+
+KEYWORDS = ["humanoid", "world model", "dexterous manipulation", "robotics"]
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+_WORDS = (
+    "policy diffusion latent planner transformer tactile sim2real reward encoder "
+    "trajectory benchmark dataset locomotion grasp contact video pretraining "
+    "scalable robust efficient embodied control model learning"
+).split()
+
+
+def _abstract(rng: random.Random, kws: list[str], n_words: int = 150) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n_words)]
+    for kw in kws:
+        words.insert(rng.randrange(len(words)), kw)
+    return " ".join(words).capitalize() + "."
+
+
+def make_candidates(n: int, seed: int = 0) -> list[PaperCandidate]:
+    """N candidates as they leave the providers: ~30% duplicated across sources,
+    ~half of the rest without an arxiv_id so the title-hash path is hit."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    papers = []
+    for i in range(n):
+        j = rng.randrange(i) if i and rng.random() < 0.3 else i  # duplicate of an earlier paper
+        r = random.Random(j)
+        kws = r.sample(KEYWORDS, r.randint(1, 2))
+        papers.append(
+            PaperCandidate(
+                title=f"Towards Scalable {kws[0].title()} Learning: Part {j}",
+                url=f"https://arxiv.org/abs/2401.{j:05d}",
+                source=rng.choice(["arxiv", "huggingface"]),
+                arxiv_id=f"2401.{j:05d}" if j % 2 else None,
+                authors=[f"Author {r.randint(0, 5000)}" for _ in range(r.randint(1, 8))],
+                abstract=_abstract(r, kws),
+                published=now - timedelta(hours=r.randint(0, 168)),
+                hf_likes=rng.randint(0, 200) if rng.random() < 0.4 else 0,
+                # Fresh (non-interned) keyword strings, as produced by a parser
+                matched_keywords=["".join(list(kw)) for kw in kws],
+            )
+        )
+    return papers
+
+
+def make_note_markdown(paper: PaperCandidate, paragraphs: int = 8) -> str:
+    """A note shaped like skills/note_prompt.md output (~1000 chars of body)."""
+    rng = random.Random(paper.title)
+    lines = [
+        f"# {paper.title}",
+        "",
+        f"- **Tags:** {', '.join(paper.matched_keywords)}",
+        f"- **Source:** {paper.source}",
+        f"- **Authors:** {', '.join(paper.authors) or '未在输入中提供'}",
+        "",
+        "## 一句话结论",
+        f"- 提出了一种 **{rng.choice(_WORDS)}** 方法，用于 `{rng.choice(_WORDS)}` 场景。",
+        "",
+    ]
+    for k in range(paragraphs):
+        lines.append(f"## Section {k + 1}")
+        lines.append(" ".join(rng.choice(_WORDS) for _ in range(60)))
+        lines.append(f"- **{rng.choice(_WORDS)}**: {' '.join(rng.choice(_WORDS) for _ in range(15))}")
+        lines.append(f"- `{rng.choice(_WORDS)}` → {' '.join(rng.choice(_WORDS) for _ in range(15))}")
+        lines.append("")
+    lines.append("---")
+    return "\n".join(lines)
+
+
+def make_digest_markdown(titles: list[str], digest_date: date | None = None, start: int = 1) -> str:
+    """A digest shaped like skills/digest_prompt.md output for the given titles,
+    numbered from `start`."""
+    digest_date = digest_date or date.today()
+    lines = [
+        f"# {digest_date.isoformat()} - papers",
+        f"**Keywords:** {', '.join(KEYWORDS)}",
+        "",
+        "## 今日锐评",
+        " ".join(_WORDS) * 2,
+        "",
+        "## 今日要点速览",
+        *[f"- **Takeaway {i}:** {' '.join(_WORDS[i:i + 8])}" for i in range(5)],
+        "",
+        f"## 今日论文（Top {len(titles)}）",
+    ]
+    for i, title in enumerate(titles, start):
+        lines += [
+            f"### {i}. {title}",
+            "- **Tags:** humanoid",
+            "#### 摘要（1段）",
+            " ".join(_WORDS),
+            "#### 创新点（3~5条）",
+            *[f"- `{w}` **{w}** {w}" for w in _WORDS[:4]],
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def make_digest_section(paper: int) -> dict:
+    """A structured-mode paper section (see app.services.structured)."""
+    rng = random.Random(paper)
+    words = lambda n: " ".join(rng.choice(_WORDS) for _ in range(n))  # noqa: E731
+    return {
+        "paper": paper,
+        "summary": words(60),
+        "problem": words(30),
+        "innovations": [f"**{rng.choice(_WORDS)}**: {words(12)}" for _ in range(4)],
+        "method": [f"`{rng.choice(_WORDS)}` → {words(12)}" for _ in range(6)],
+        "insights": [words(15) for _ in range(3)],
+        "limitations": [words(15) for _ in range(2)],
+        "next_steps": [words(12) for _ in range(4)],
+    }
+
+
+# ── Provider payloads ────────────────────────────────────────────
+
+def _arxiv_id_for(keyword: str, i: int) -> str:
+    # Overlapping id space across keywords so merge has real work to do
+    h = int(hashlib.md5(keyword.encode()).hexdigest()[:4], 16) % 50
+    return f"2602.{10000 + h * 7 + i:05d}"
+
+
+def arxiv_atom_feed(keyword: str, start: int, max_results: int, total: int) -> str:
+    """An arXiv API Atom page for `keyword` (entries submitted over the last 6 days)."""
+    now = datetime.now(timezone.utc)
+    entries = []
+    for i in range(start, min(start + max_results, total)):
+        aid = _arxiv_id_for(keyword, i)
+        r = random.Random(aid)
+        published = (now - timedelta(hours=i * 144 // max(total, 1))).strftime("%Y-%m-%dT%H:%M:%SZ")
+        authors = "".join(
+            f"<author><name>Author {r.randint(0, 999)}</name></author>" for _ in range(r.randint(2, 6))
+        )
+        entries.append(f"""  <entry>
+    <id>http://arxiv.org/abs/{aid}v1</id>
+    <updated>{published}</updated>
+    <published>{published}</published>
+    <title>{escape(f"{keyword.title()} Learning at Scale: Study {aid}")}</title>
+    <summary>{escape(_abstract(r, [keyword]))}</summary>
+    {authors}
+    <link href="http://arxiv.org/abs/{aid}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{aid}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.RO" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.RO" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="http://arxiv.org/api/query?search_query=all:{escape(keyword)}" rel="self" type="application/atom+xml"/>
+  <title type="html">ArXiv Query: search_query=all:"{escape(keyword)}"</title>
+  <id>http://arxiv.org/api/fake</id>
+  <updated>{now.strftime("%Y-%m-%dT%H:%M:%SZ")}</updated>
+  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{total}</opensearch:totalResults>
+  <opensearch:startIndex xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{max_results}</opensearch:itemsPerPage>
+{chr(10).join(entries)}
+</feed>
+"""
+
+
+def hf_daily_papers(day: date, n: int = 40) -> list[dict]:
+    """An api/daily_papers payload for `day`; some ids overlap the fake arXiv feeds."""
+    rng = random.Random(day.isoformat())
+    items = []
+    for i in range(n):
+        kw = rng.choice(KEYWORDS + ["llm", "video generation"])
+        aid = _arxiv_id_for(kw, rng.randrange(60)) if rng.random() < 0.5 else f"2602.{20000 + i + day.day * 100:05d}"
+        ts = f"{day.isoformat()}T00:00:00.000Z"
+        items.append({
+            "paper": {
+                "id": aid,
+                "title": f"{kw.title()} Learning at Scale: Study {aid}",
+                "summary": _abstract(rng, [kw]),
+                "authors": [{"name": f"Author {rng.randint(0, 999)}"} for _ in range(rng.randint(2, 6))],
+                "publishedAt": ts,
+                "upvotes": rng.randint(0, 300),
+            },
+            "numLikes": rng.randint(0, 300),
+            "publishedAt": ts,
+        })
+    return items
+
+
+def hf_daily_papers_json(day: date, n: int = 40) -> bytes:
+    return json.dumps(hf_daily_papers(day, n)).encode()
@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture
+def make_notion():
+    """FakeNotion, the strict in-memory Notion of benchmarks/fakes.py: call
+    it (optionally with db_properties=...) for a fresh workspace."""
+    from benchmarks.fakes import FakeNotion
+
+    return FakeNotion
+
+
+@pytest.fixture
+def notion(make_notion):
+    return make_notion()
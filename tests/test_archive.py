@@ -0,0 +1,70 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.models import PaperCandidate
+from app.services.archive import ArchiveRow, PaperArchive
+
+pytest.importorskip("pyarrow")
+
+
+def _make_paper(i: int, keywords: list[str], published: datetime | None = None) -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        published=published or datetime(2026, 3, 4, tzinfo=timezone.utc),
+        matched_keywords=keywords,
+    )
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PaperArchive(tmp_path)
+    # Monday 2 Mar: paper 1 selected, 2 ranked, 3 already written
+    archive.write(date(2026, 3, 2), [
+        ArchiveRow("default", _make_paper(1, ["world model"]), 2.0, True, False),
+        ArchiveRow("default", _make_paper(2, ["world model", "humanoid"]), 1.0, False, False),
+        ArchiveRow("default", _make_paper(3, ["humanoid"]), None, False, True),
+    ])
+    # A week later: paper 2 is still around and skipped again, paper 4 is new
+    archive.write(date(2026, 3, 9), [
+        ArchiveRow("default", _make_paper(2, ["world model", "humanoid"]), 1.5, False, False),
+        ArchiveRow("default", _make_paper(4, ["world model"], datetime(2026, 3, 10, tzinfo=timezone.utc)), 3.0, True, False),
+        ArchiveRow("robots", _make_paper(4, ["humanoid"], datetime(2026, 3, 10, tzinfo=timezone.utc)), 0.5, False, False),
+    ])
+    return archive
+
+
+class TestPaperArchive:
+    def test_round_trip(self, archive):
+        table = archive.scan(start=date(2026, 3, 2), end=date(2026, 3, 2))
+        assert table.num_rows == 3
+        assert table["title"].to_pylist() == ["Paper 1", "Paper 2", "Paper 3"]
+        assert table["score"].to_pylist() == [2.0, 1.0, None]
+        assert table["matched_keywords"].to_pylist()[1] == ["world model", "humanoid"]
+        assert table["published"].to_pylist()[0] == datetime(2026, 3, 4, tzinfo=timezone.utc)
+
+    def test_rewriting_a_date_replaces_its_partition(self, archive):
+        archive.scan()  # map the old file first
+        archive.write(date(2026, 3, 2), [ArchiveRow("default", _make_paper(5, ["humanoid"]), 1.0, True, False)])
+        assert archive.days() == [date(2026, 3, 2), date(2026, 3, 9)]
+        assert archive.scan(["title"], end=date(2026, 3, 2))["title"].to_pylist() == ["Paper 5"]
+
+    def test_weekly_counts_count_distinct_papers_by_publication_week(self, archive):
+        assert archive.weekly_counts("world model") == [(date(2026, 3, 2), 2), (date(2026, 3, 9), 1)]
+        assert archive.weekly_counts("humanoid", profile="robots") == [(date(2026, 3, 9), 1)]
+        assert archive.weekly_counts("world model", start=date(2026, 3, 9)) == [(date(2026, 3, 2), 1), (date(2026, 3, 9), 1)]
+
+    def test_skipped_are_ranked_but_never_selected(self, archive):
+        skipped = archive.skipped(profile="default")
+        assert [(s["title"], s["best_score"], s["first_ranked"], s["runs"]) for s in skipped] == [
+            ("Paper 2", 1.5, date(2026, 3, 2), 2)
+        ]
+        assert [(s["profile"], s["title"]) for s in archive.skipped()] == [("default", "Paper 2"), ("robots", "Paper 4")]
+
+    def test_empty_archive(self, tmp_path):
+        archive = PaperArchive(tmp_path / "missing")
+        assert archive.scan(["key"]).num_rows == 0
+        assert archive.weekly_counts("humanoid") == [] and archive.skipped() == []
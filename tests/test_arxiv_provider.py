@@ -0,0 +1,88 @@
+from app.providers.arxiv_provider import ArxivProvider
+from app.services import telemetry
+from app.services.resilience import Deadline, RetryPolicy
+from app.services.scheduler import RunSchedule
+from benchmarks import synthetic
+
+
+class _FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class _FakeSession:
+    """Serves synthetic Atom pages: `total` entries per keyword, spread over the last 6 days."""
+
+    def __init__(self, total: int, empty_once_at: int | None = None):
+        self.total = total
+        self.empty_once_at = empty_once_at
+        self.requests: list[tuple[str, int, int]] = []
+
+    def get(self, url, params, timeout):
+        keyword = params["search_query"][len('all:"'):-1]
+        start, size = params["start"], params["max_results"]
+        self.requests.append((keyword, start, size))
+        if start == self.empty_once_at:
+            self.empty_once_at = None
+            return _FakeResponse(synthetic.arxiv_atom_feed(keyword, start, 0, self.total).encode())
+        return _FakeResponse(synthetic.arxiv_atom_feed(keyword, start, size, self.total).encode())
+
+
+def _provider(session: _FakeSession, **kwargs) -> ArxivProvider:
+    provider = ArxivProvider(
+        delay_seconds=0, policy=RetryPolicy(max_attempts=2, base_delay=0.01), **kwargs
+    )
+    provider.session = session
+    return provider
+
+
+class TestArxivProvider:
+    def test_parses_entries(self):
+        papers = _provider(_FakeSession(total=3)).fetch(["humanoid"])
+        assert len(papers) == 3
+        p = papers[0]
+        assert p.source == "arxiv" and p.matched_keywords == ["humanoid"]
+        assert p.url.endswith(p.arxiv_id + "v1")
+        assert p.title.startswith("Humanoid Learning at Scale") and p.authors and p.abstract
+        assert p.published.tzinfo is not None
+
+    def test_pages_up_to_max_results(self):
+        session = _FakeSession(total=500)
+        papers = _provider(session, max_results_per_keyword=120, page_size=50).fetch(["humanoid"])
+        assert len(papers) == 120
+        assert [(start, size) for _, start, size in session.requests] == [(0, 50), (50, 50), (100, 20)]
+
+    def test_stops_paging_past_the_window(self):
+        # 250 entries over 6 days: the window of 2 days ends inside the second page
+        session = _FakeSession(total=250)
+        papers = _provider(session, window_days=2, max_results_per_keyword=250, page_size=50).fetch(["humanoid"])
+        assert len(session.requests) == 2
+        assert 0 < len(papers) < 100
+
+    def test_shards_report_their_own_metrics(self):
+        tracer = telemetry.start_run("test")
+        with telemetry.span("fetch.arxiv"):
+            _provider(_FakeSession(total=30), page_size=20).fetch(["humanoid", "robotics"])
+        shards = {s["attrs"]["keyword"]: s["counters"] for s in tracer.report()["spans"] if s["name"] == "fetch.arxiv.shard"}
+        assert set(shards) == {"humanoid", "robotics"}
+        assert all(c["pages"] == 2 and c["results"] == 30 and c["requests"] == 2 for c in shards.values())
+
+    def test_empty_page_mid_results_is_retried(self):
+        session = _FakeSession(total=60, empty_once_at=20)
+        papers = _provider(session, page_size=20, max_results_per_keyword=60).fetch(["humanoid"])
+        assert len(papers) == 60
+        assert [start for _, start, _ in session.requests] == [0, 20, 20, 40]
+
+    def test_stops_paging_when_the_next_page_would_miss_the_deadline(self):
+        session = _FakeSession(total=300)
+        provider = _provider(session, page_size=50, max_results_per_keyword=300)
+        provider.http.deadline = Deadline(5.0)
+        provider._page_times = [100.0]  # pages have been taking far longer than that
+        schedule = RunSchedule()
+        schedule.activate()
+        papers = provider.fetch(["humanoid"])
+        assert len(session.requests) == 1 and len(papers) == 50
+        assert schedule.degradations == ["fetch.arxiv: 'humanoid': stopped paging after 50 results"]
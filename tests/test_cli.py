@@ -0,0 +1,89 @@
+import os
+import re
+import subprocess
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from app.models import PaperCandidate
+from app.services.snapshot import load_candidates, save_candidates, snapshot_path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("anthropic", "notion_client", "requests", "bs4", "lxml", "pypdf", "pyarrow")
+# Generous so slow CI machines pass; a heavy client import alone costs more
+IMPORT_BUDGET_US = 500_000
+
+
+def _importtime(args: list[str], env: dict | None = None) -> tuple[subprocess.CompletedProcess, dict[str, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, env={**os.environ, **(env or {})}, capture_output=True, text=True,
+    )
+    cumulative = {}
+    for m in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \| *(\S+)$", proc.stderr, re.M):
+        cumulative[m.group(2)] = int(m.group(1))
+    return proc, cumulative
+
+
+def _make_paper(i: int, likes: int, keywords: list[str]) -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        published=datetime.now(timezone.utc),
+        hf_likes=likes,
+        matched_keywords=keywords,
+    )
+
+
+class TestImportTime:
+    def test_cli_module_skips_heavy_clients(self):
+        proc, cumulative = _importtime(["-c", "import app.daily_digest"])
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert not [m for m in cumulative if m.split(".")[0] in HEAVY]
+        assert cumulative["app.daily_digest"] < IMPORT_BUDGET_US
+
+    def test_ranker_does_not_load_config(self):
+        _, cumulative = _importtime(["-c", "import app.services.ranker"])
+        assert "yaml" not in cumulative and "dotenv" not in cumulative
+
+
+class TestRankCommand:
+    def test_snapshot_round_trip(self, tmp_path):
+        papers = [_make_paper(1, 5, ["humanoid"]), _make_paper(2, 50, ["robotics"])]
+        path = snapshot_path(tmp_path, date(2026, 1, 1))
+        save_candidates(path, papers, {"db-1": {"2401.00002", "unrelated"}})
+        loaded, seen = load_candidates(path)
+        assert [(p.title, p.published, p.matched_keywords) for p in loaded] == [
+            (p.title, p.published, p.matched_keywords) for p in papers
+        ]
+        assert seen == {"db-1": {"2401.00002"}}
+
+    def test_reranks_latest_snapshot_without_heavy_imports(self, tmp_path):
+        papers = [_make_paper(i, likes=i * 10, keywords=["humanoid"]) for i in range(1, 6)]
+        save_candidates(snapshot_path(tmp_path, date(2026, 1, 1)), papers, {"db-1": {"2401.00005"}})
+        env = {"CACHE_DIR": str(tmp_path), "NOTES_DB_ID": "db-1", "TOP_K": "2"}
+
+        proc, cumulative = _importtime(["-m", "app.daily_digest", "rank"], env)
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert not [m for m in cumulative if m.split(".")[0] in HEAVY]
+        ranked = re.findall(r"^\s+\d+\.\s+[\d.]+\s+likes=\d+\s+(.+)$", proc.stdout, re.M)
+        assert ranked == ["Paper 4", "Paper 3"]  # Paper 5 is already in Notion
+
+
+class TestTrendsCommand:
+    def test_prints_weekly_counts_without_heavy_imports(self, tmp_path):
+        from app.services.trends import TrendIndex
+
+        papers = [_make_paper(i, likes=i, keywords=["humanoid"]) for i in range(1, 4)]
+        for p in papers:
+            p.published = datetime(2026, 1, 10, tzinfo=timezone.utc)
+        TrendIndex(tmp_path / "trends.json").update(papers, date(2026, 1, 10))
+
+        proc, cumulative = _importtime(
+            ["-m", "app.daily_digest", "trends", "--end", "2026-01-14", "--weeks", "2"], {"CACHE_DIR": str(tmp_path)}
+        )
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert not [m for m in cumulative if m.split(".")[0] in HEAVY]
+        assert re.search(r"^humanoid\s+0 \(\s*0\.0\)\s+3 \(\s*2\.0\)$", proc.stdout, re.M)
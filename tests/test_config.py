@@ -0,0 +1,45 @@
+import dotenv
+
+from app.config import cache_dir, load_config, load_profiles
+
+BASE = {
+    "keywords": ["humanoid", "robotics"],
+    "ranking": {"top_k": 3, "weights": {"hf_likes": 0.6, "recency": 0.3, "keyword_match": 0.1}},
+}
+
+
+class TestProfiles:
+    def test_no_profiles_section_is_one_default_profile(self):
+        [profile] = load_profiles(BASE)
+        assert profile.name == "default"
+        assert profile.keywords == ["humanoid", "robotics"]
+        assert profile.ranking["top_k"] == 3
+        assert profile.notes_db_id is None
+
+    def test_profiles_inherit_what_they_do_not_set(self):
+        cfg = {
+            **BASE,
+            "profiles": {
+                "manip": {
+                    "keywords": ["dexterous manipulation"],
+                    "ranking": {"top_k": 5, "weights": {"recency": 0.9}},
+                    "notion": {"digest_parent_page_id": "page-1", "notes_db_id": "db-1"},
+                },
+                "general": None,
+            },
+        }
+        manip, general = load_profiles(cfg)
+        assert manip.keywords == ["dexterous manipulation"]
+        assert manip.ranking["top_k"] == 5
+        assert manip.ranking["weights"] == {"hf_likes": 0.6, "recency": 0.9, "keyword_match": 0.1}
+        assert (manip.digest_parent_page_id, manip.notes_db_id) == ("page-1", "db-1")
+        assert general.keywords == BASE["keywords"] and general.ranking["top_k"] == 3
+
+
+class TestCacheDir:
+    def test_cache_dir_set_in_dotenv_applies(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("CACHE_DIR", raising=False)
+        # Stand-in for a .env file holding CACHE_DIR
+        monkeypatch.setattr(dotenv, "load_dotenv", lambda: monkeypatch.setenv("CACHE_DIR", str(tmp_path)))
+        load_config()
+        assert cache_dir() == tmp_path
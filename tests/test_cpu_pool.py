@@ -0,0 +1,77 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import PaperCandidate, compute_keys, precompute_keys
+from app.services import cpu_pool
+from app.services.merger import merge_and_dedupe
+from app.services.notion_writer import _markdown_to_blocks
+
+
+def _make_paper(i: int, arxiv: bool = False) -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Ｔowards  Ｒobust Ｈumanoids: Part {i % 7}",  # fullwidth: NFKD matters
+        url=f"https://example.org/{i}",
+        source="huggingface" if i % 2 else "arxiv",
+        arxiv_id=f"2401.{i:05d}" if arxiv else None,
+        authors=[f"Author {i % 7}"],
+        published=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        hf_likes=i,
+        matched_keywords=["humanoid"],
+    )
+
+
+@pytest.fixture
+def pool():
+    cpu_pool.configure(min_items={"keys": 4, "notes": 4}, max_workers=2, chunk_size=3)
+    yield
+    cpu_pool.shutdown()
+    cpu_pool.configure()
+
+
+class TestCpuPool:
+    def test_small_inputs_stay_in_process(self):
+        cpu_pool.configure(min_items={"keys": 100}, max_workers=2)
+        try:
+            assert cpu_pool.map_chunked(len, ["a", "bb"], "keys") == [1, 2]
+            assert cpu_pool._pool is None
+        finally:
+            cpu_pool.configure()
+
+    def test_one_core_stays_in_process(self):
+        cpu_pool.configure(min_items={"keys": 0}, max_workers=1)
+        try:
+            assert not cpu_pool.worth(10_000, "keys")
+        finally:
+            cpu_pool.configure()
+
+    def test_pool_matches_in_process(self, pool):
+        srcs = [_make_paper(i)._key_inputs() for i in range(10)]
+        assert cpu_pool.map_chunked(compute_keys, srcs, "keys") == [compute_keys(s) for s in srcs]
+        notes = [f"## Note {i}\n\n- **bold** and `code`\n\ntext {i}" for i in range(5)]
+        assert cpu_pool.map_chunked(_markdown_to_blocks, notes, "notes") == [_markdown_to_blocks(md) for md in notes]
+        assert cpu_pool._pool is not None
+
+
+class TestPrecomputeKeys:
+    def test_matches_lazy_keys(self):
+        papers = [_make_paper(i, arxiv=i % 3 == 0) for i in range(9)]
+        lazy = [(p.dedup_key, p.notion_key) for p in [replace(p) for p in papers]]
+        precompute_keys(papers)
+        assert [(p.dedup_key, p.notion_key) for p in papers] == lazy
+        assert all(p._keys is not None for p in papers if not p.arxiv_id)
+
+    def test_cache_still_follows_changed_inputs(self):
+        paper = _make_paper(1)
+        precompute_keys([paper])
+        paper.arxiv_id = "2401.99999"
+        assert paper.dedup_key == "arxiv:2401.99999"
+
+    def test_merge_through_the_pool(self, pool):
+        cpu_pool.configure(min_items={"keys": 1000}, max_workers=2)
+        expected = merge_and_dedupe([_make_paper(i) for i in range(20)])
+        cpu_pool.configure(min_items={"keys": 4}, max_workers=2)
+        merged = merge_and_dedupe([_make_paper(i) for i in range(20)])
+        assert [(p.dedup_key, p.hf_likes) for p in merged] == [(p.dedup_key, p.hf_likes) for p in expected]
+        assert len(merged) == 7
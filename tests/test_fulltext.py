@@ -0,0 +1,180 @@
+import os
+import time
+
+import pytest
+
+from app.models import PaperCandidate
+from app.services.fulltext import FullTextFetcher, estimate_tokens, select_sections
+from app.services.resilience import limiter_for
+from app.services.summarizer import Summarizer
+
+pytest.importorskip("pypdf")
+
+
+def _make_paper(arxiv_id="2401.00001") -> PaperCandidate:
+    return PaperCandidate(
+        title="Humanoid Whole-Body Control",
+        url=f"https://arxiv.org/abs/{arxiv_id}",
+        source="arxiv",
+        arxiv_id=arxiv_id,
+        abstract="We study humanoid control.",
+        matched_keywords=["humanoid"],
+    )
+
+
+def _make_pdf(lines: list[str]) -> bytes:
+    """A minimal one-page PDF with one text line per entry."""
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 750 Td"]
+    for line in lines:
+        ops.append(f"({line}) Tj T*")
+    ops.append("ET")
+    stream = "\n".join(ops).encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+PAPER_TEXT = [
+    "Humanoid Whole-Body Control",
+    "Abstract",
+    "We study humanoid control.",
+    "1 Introduction",
+    "Humanoids are hard to control.",
+    "2 Method",
+    "We train a diffusion policy on retargeted motion capture.",
+    "3 Experiments",
+    "We evaluate on a real robot.",
+    "References",
+    "[1] Some citation.",
+]
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.headers = {"Content-Length": str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class _FakeSession:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.calls: list[str] = []
+        self.started: list[float] = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.calls.append(url)
+        self.started.append(time.monotonic())
+        return _FakeResponse(self.body)
+
+
+def _fetcher(tmp_path, body: bytes, **kwargs) -> tuple[FullTextFetcher, _FakeSession]:
+    kwargs.setdefault("delay_seconds", 0.0)
+    fetcher = FullTextFetcher(cache_dir=tmp_path, max_workers=2, **kwargs)
+    session = _FakeSession(body)
+    fetcher.session = session
+    return fetcher, session
+
+
+class TestSectionSelection:
+    TEXT = "\n".join(PAPER_TEXT)
+
+    def test_drops_references_and_abstract(self):
+        selected = select_sections(self.TEXT, token_budget=1000)
+        assert "diffusion policy" in selected
+        assert "Some citation" not in selected
+        assert "Abstract" not in selected
+
+    def test_method_preferred_under_tight_budget(self):
+        method = "2 Method\nWe train a diffusion policy on retargeted motion capture."
+        selected = select_sections(self.TEXT, token_budget=estimate_tokens(method))
+        assert selected == method
+
+    def test_unstructured_text_is_truncated(self):
+        assert select_sections("x" * 1000, token_budget=10) == "x" * 40
+
+
+class TestFullTextFetcher:
+    def test_downloads_parses_and_budgets(self, tmp_path):
+        fetcher, session = _fetcher(tmp_path, _make_pdf(PAPER_TEXT))
+        paper = _make_paper()
+        fetcher.fetch([paper])
+        assert session.calls == ["https://arxiv.org/pdf/2401.00001"]
+        assert "diffusion policy" in paper.full_text
+        assert "Some citation" not in paper.full_text
+        assert len(list((tmp_path / "pdf").glob("*.pdf"))) == 1
+
+    def test_repeat_run_uses_cache(self, tmp_path):
+        fetcher, session = _fetcher(tmp_path, _make_pdf(PAPER_TEXT))
+        fetcher.fetch([_make_paper()])
+        again, session2 = _fetcher(tmp_path, b"not a pdf")
+        paper = _make_paper()
+        again.fetch([paper])
+        assert session2.calls == []
+        assert "diffusion policy" in paper.full_text
+
+    def test_downloads_share_the_arxiv_rate_limit(self, tmp_path):
+        fetcher, session = _fetcher(tmp_path, _make_pdf(PAPER_TEXT), delay_seconds=0.05)
+        assert fetcher.limiter is limiter_for("export.arxiv.org", 0.05)
+        fetcher.fetch([_make_paper(f"2401.0000{i}") for i in range(3)])
+        starts = sorted(session.started)
+        assert len(starts) == 3
+        assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
+
+    def test_identical_pdfs_share_one_cache_entry(self, tmp_path):
+        fetcher, _ = _fetcher(tmp_path, _make_pdf(PAPER_TEXT))
+        fetcher.fetch([_make_paper("2401.00001"), _make_paper("2401.00002")])
+        assert len(list((tmp_path / "text").glob("*.txt"))) == 1
+
+    def test_oversized_pdf_is_skipped(self, tmp_path):
+        fetcher, _ = _fetcher(tmp_path, _make_pdf(PAPER_TEXT), max_pdf_bytes=100)
+        fetcher.http.policy.max_attempts = 1
+        paper = _make_paper()
+        fetcher.fetch([paper])
+        assert paper.full_text == ""
+
+    def test_eviction_removes_pdfs_before_text(self, tmp_path):
+        fetcher, _ = _fetcher(tmp_path, _make_pdf(PAPER_TEXT))
+        fetcher.fetch([_make_paper()])
+        text_size = sum(f.stat().st_size for f in (tmp_path / "text").iterdir())
+        fetcher.max_cache_bytes = text_size
+        fetcher._evict()
+        assert not list((tmp_path / "pdf").glob("*.pdf"))
+        assert len(os.listdir(tmp_path / "text")) == 1
+
+
+class TestNoteMessage:
+    def test_includes_pdf_url_and_full_text(self):
+        paper = _make_paper()
+        paper.full_text = "2 Method\nDetails."
+        msg = Summarizer._build_note_user_message(paper)
+        assert "url_pdf: https://arxiv.org/pdf/2401.00001" in msg
+        assert "optional_context (full-text excerpt):\n2 Method\nDetails." in msg
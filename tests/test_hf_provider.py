@@ -0,0 +1,161 @@
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.providers import hf_provider
+from app.providers.hf_provider import HuggingFaceProvider
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+        self.content = json.dumps(payload).encode()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+    def iter_content(self, chunk_size=1):
+        # Small chunks, so items straddle chunk boundaries
+        for i in range(0, len(self.content), 7):
+            yield self.content[i : i + 7]
+
+
+class _FakeSession:
+    """Serves one daily-papers item per requested date; counts requests per date."""
+
+    def __init__(self, likes: int = 5):
+        self.likes = likes
+        self.calls: list[str] = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        day = params["date"]
+        self.calls.append(day)
+        return _FakeResponse([
+            {
+                "paper": {
+                    "id": f"2401.000{day[-2:]}",
+                    "title": f"Humanoid control for {day}",
+                    "summary": "A humanoid robot paper.",
+                    "authors": [{"name": "A. Author"}],
+                    "publishedAt": f"{day}T00:00:00.000Z",
+                },
+                "numLikes": self.likes,
+            },
+            {"paper": {"id": "2401.99999", "title": "Unrelated", "summary": ""}, "numLikes": 1},
+        ])
+
+
+def _provider(tmp_path, window_days=3) -> tuple[HuggingFaceProvider, _FakeSession]:
+    provider = HuggingFaceProvider(window_days=window_days, cache_dir=tmp_path)
+    session = _FakeSession()
+    provider.session = session
+    return provider, session
+
+
+class TestHuggingFaceDateRange:
+    def test_fetches_every_day_in_window(self, tmp_path):
+        provider, session = _provider(tmp_path, window_days=3)
+        papers = provider.fetch(["humanoid"])
+        today = date.today()
+        expected = {(today - timedelta(days=i)).isoformat() for i in range(3)}
+        assert set(session.calls) == expected
+        assert len(papers) == 3
+        assert all(p.matched_keywords == ["humanoid"] for p in papers)
+
+    def test_past_days_cached_today_refreshed(self, tmp_path):
+        provider, session = _provider(tmp_path, window_days=3)
+        provider.fetch(["humanoid"])
+
+        session.calls.clear()
+        session.likes = 50
+        papers = provider.fetch(["humanoid"])
+
+        assert session.calls == [date.today().isoformat()]
+        likes = sorted(p.hf_likes for p in papers)
+        assert likes == [5, 5, 50]
+
+    def test_no_cache_dir(self):
+        provider = HuggingFaceProvider(window_days=2)
+        session = _FakeSession()
+        provider.session = session
+        provider.fetch(["humanoid"])
+        provider.fetch(["humanoid"])
+        assert len(session.calls) == 4
+
+
+class TestHuggingFaceStreaming:
+    def test_elements_split_across_chunks(self):
+        items = [{"paper": {"title": "Ünïcode 世界模型", "id": f"2401.{i:05d}"}, "numLikes": i} for i in range(20)]
+        raw = json.dumps(items, ensure_ascii=False).encode() + b"\n"
+        for size in (1, 3, 64, len(raw)):
+            chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+            assert list(hf_provider._iter_json_array(chunks)) == items
+
+    def test_number_cut_at_chunk_boundary(self):
+        assert list(hf_provider._iter_json_array([b"[12", b"3, 1.", b"5e1]"])) == [123, 15.0]
+
+    def test_malformed_payload_rejected(self):
+        for raw in (b'{"error": "x"}', b"[1, 2", b"[1] [2]"):
+            with pytest.raises(ValueError):
+                list(hf_provider._iter_json_array([raw]))
+
+    def test_only_matches_kept(self, tmp_path):
+        provider, _ = _provider(tmp_path, window_days=1)
+        chunks = _FakeSession().get("", params={"date": "2026-01-02"}).iter_content()
+        papers = provider._parse_stream(chunks, ["humanoid"], date(2026, 1, 2))
+        assert [p.arxiv_id for p in papers] == ["2401.00002"]
+
+    def test_cache_holds_raw_payload(self, tmp_path):
+        provider, session = _provider(tmp_path, window_days=2)
+        provider.fetch(["humanoid"])
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        cached = json.loads((tmp_path / f"{yesterday}.json").read_text())
+        assert [item["paper"]["id"] for item in cached] == [f"2401.000{yesterday[-2:]}", "2401.99999"]
+
+    def test_unexpected_payload_falls_back(self, tmp_path):
+        provider, session = _provider(tmp_path, window_days=1)
+        session.get = lambda *a, **kw: _FakeResponse({"error": "rate limited"})
+        assert provider._fetch_api(["humanoid"]) == []
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestHuggingFaceHtmlFallback:
+    def test_embedded_json_has_abstract_and_authors(self):
+        text = (FIXTURES / "hf_papers_embedded.html").read_text()
+        papers = HuggingFaceProvider()._parse_html(text, ["humanoid"])
+        assert papers
+        assert all(p.abstract and p.authors and p.published for p in papers)
+        assert all(p.arxiv_id and p.url.endswith(p.arxiv_id) for p in papers)
+
+    def test_article_parsers_agree(self):
+        pytest.importorskip("lxml")
+        text = (FIXTURES / "hf_papers_articles.html").read_text()
+        rows_lxml = hf_provider._extract_articles_lxml(text)
+        rows_bs4 = hf_provider._extract_articles_bs4(text)
+        assert len(rows_lxml) == 30
+        assert rows_lxml == rows_bs4
+
+    def test_article_fallback_matches_embedded(self, monkeypatch):
+        embedded = HuggingFaceProvider()._parse_html(
+            (FIXTURES / "hf_papers_embedded.html").read_text(), ["humanoid", "world model"]
+        )
+        monkeypatch.setattr(hf_provider, "_lxml_html", lambda: None)
+        scraped = HuggingFaceProvider()._parse_html(
+            (FIXTURES / "hf_papers_articles.html").read_text(), ["humanoid", "world model"]
+        )
+        assert [(p.arxiv_id, p.hf_likes, p.authors, p.abstract) for p in scraped] == [
+            (p.arxiv_id, p.hf_likes, p.authors, p.abstract.strip()) for p in embedded
+        ]
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from app.models import PaperCandidate
+
+
+def _make_paper(**kwargs) -> PaperCandidate:
+    defaults = {
+        "title": "Test Paper",
+        "url": "https://arxiv.org/abs/2401.00001",
+        "source": "arxiv",
+    }
+    defaults.update(kwargs)
+    return PaperCandidate(**defaults)
+
+
+class TestPaperCandidateKeys:
+    def test_arxiv_keys(self):
+        p = _make_paper(arxiv_id="2401.00001")
+        assert p.dedup_key == "arxiv:2401.00001"
+        assert p.notion_key == "2401.00001"
+
+    def test_title_keys_are_stable(self):
+        p1 = _make_paper(title="  Some  GREAT paper! ")
+        p2 = _make_paper(title="some great paper")
+        assert p1.dedup_key == p2.dedup_key
+        assert p1.dedup_key == f"title:{p1._title_hash}"
+
+    def test_keys_are_cached(self):
+        p = _make_paper(title="Cached Title")
+        assert p.dedup_key is p.dedup_key
+        assert p.notion_key is p.notion_key
+
+    def test_cache_follows_merged_fields(self):
+        p = _make_paper(title="Late Metadata")
+        key_before = p.notion_key
+        p.authors = ["Ada Lovelace"]
+        p.published = datetime(2024, 1, 15, tzinfo=timezone.utc)
+        assert p.notion_key != key_before
+        p.arxiv_id = "2401.00009"
+        assert p.dedup_key == "arxiv:2401.00009"
+        assert p.notion_key == "2401.00009"
+
+    def test_cache_not_part_of_equality(self):
+        p1 = _make_paper(arxiv_id="2401.00001")
+        p2 = _make_paper(arxiv_id="2401.00001")
+        p1.dedup_key
+        assert p1 == p2
+
+
+class TestPaperCandidateCompactness:
+    def test_slotted(self):
+        assert not hasattr(_make_paper(), "__dict__")
+
+    def test_keywords_interned(self):
+        kw = "".join(["world", " ", "model"])
+        p1 = _make_paper(matched_keywords=[kw])
+        p2 = _make_paper(matched_keywords=["".join(["world", " model"])])
+        assert p1.matched_keywords[0] is p2.matched_keywords[0]
@@ -0,0 +1,177 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("notion_client")
+
+from app.config import Profile
+from app.daily_digest import _run_profile
+from app.models import PaperCandidate
+from app.services.notion_writer import NotionWriter
+
+DAY = date(2026, 1, 1)
+
+
+def _make_paper(i: int, note_lines: int = 5) -> PaperCandidate:
+    p = PaperCandidate(
+        title=f"Humanoid Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        abstract="We study humanoid control.",
+        matched_keywords=["humanoid"],
+    )
+    p.note_markdown = "\n".join(f"- point {n}" for n in range(note_lines))
+    return p
+
+
+def _writer(notion, tmp_path) -> NotionWriter:
+    w = NotionWriter(
+        client=notion.client(),
+        digest_parent_page=notion.DIGEST_PARENT,
+        notes_db=notion.NOTES_DB,
+        hash_index=tmp_path / "notion_hashes.json",
+    )
+    w.http.policy.max_attempts = 1
+    return w
+
+
+@pytest.fixture
+def writer(notion, tmp_path):
+    return _writer(notion, tmp_path)
+
+
+def _digest(papers: list[PaperCandidate]) -> str:
+    return "# digest\n" + "\n".join(f"### {i}. {p.title}\nsummary" for i, p in enumerate(papers, 1))
+
+
+class TestFakeNotionLimits:
+    def test_rejects_oversized_requests(self, notion):
+        from notion_client import APIResponseError
+
+        client = notion.client()
+        block = {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": "x"}}]}}
+        with pytest.raises(APIResponseError, match="≤ `100`"):
+            client.blocks.children.append(block_id=notion.DIGEST_PARENT, children=[block] * 101)
+        long_block = {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": "x" * 2001}}]}}
+        with pytest.raises(APIResponseError, match="≤ `2000`"):
+            client.blocks.children.append(block_id=notion.DIGEST_PARENT, children=[long_block])
+        assert sum(notion.rejected.values()) == 2
+
+
+class TestNotionWriter:
+    def test_long_note_is_created_in_chunks(self, notion, writer):
+        paper = _make_paper(1, note_lines=250)
+        writer.write_digest([paper], DAY, _digest([paper]))
+        note_id = next(pid for pid, p in notion.pages.items() if "database_id" in p["parent"])
+        assert len(notion.children[note_id]) == 250
+        assert not notion.rejected
+
+    def test_unchanged_rerun_only_reads(self, notion, writer):
+        papers = [_make_paper(i) for i in range(3)]
+        writer.write_digest(papers, DAY, _digest(papers))
+        assert notion.calls["POST /v1/pages"] == 4  # digest page + 3 notes
+
+        notion.calls.clear()
+        writer.write_digest(papers, DAY, _digest(papers))
+        assert all(call.startswith(("GET", "POST /v1/databases")) for call in notion.calls)
+        assert len(notion.children[notion.DIGEST_PARENT]) == 1
+
+    def test_changed_note_is_rewritten(self, notion, writer):
+        papers = [_make_paper(i) for i in range(3)]
+        writer.write_digest(papers, DAY, _digest(papers))
+        papers[1].note_markdown += "\n- new point"
+
+        notion.calls.clear()
+        writer.write_digest(papers, DAY, _digest(papers))
+        assert notion.calls["PATCH /v1/pages/{id}"] == 1
+        assert "DELETE /v1/blocks/{id}" in notion.calls
+
+    def test_hash_property_is_read_from_notion(self, notion, writer, tmp_path):
+        papers = [_make_paper(i) for i in range(2)]
+        writer.write_digest(papers, DAY, _digest(papers))
+        notes = [p for p in notion.pages.values() if "database_id" in p["parent"]]
+        assert all(p["properties"]["Content Hash"]["rich_text"] for p in notes)
+
+        # A fresh machine without the local index still skips the notes
+        notion.calls.clear()
+        _writer(notion, tmp_path / "elsewhere").write_digest(papers, DAY, _digest(papers))
+        assert "PATCH /v1/pages/{id}" not in notion.calls
+
+    def test_db_without_hash_property_uses_local_index(self, make_notion, tmp_path):
+        notion = make_notion(db_properties=("Title", "URL", "Key", "ArXiv ID", "Tags", "Date Created"))
+        writer = _writer(notion, tmp_path)
+        papers = [_make_paper(i) for i in range(2)]
+        writer.write_digest(papers, DAY, _digest(papers))
+        assert not notion.rejected
+
+        notion.calls.clear()
+        writer.write_digest(papers, DAY, _digest(papers))
+        assert "PATCH /v1/pages/{id}" not in notion.calls
+
+
+class TestIncrementalAppend:
+    def test_new_paper_is_appended_without_rewriting(self, notion, writer):
+        papers = [_make_paper(i) for i in range(3)]
+        writer.write_digest(papers, DAY, _digest(papers).replace("# digest", "# digest\n## 今日论文（Top 3）"))
+        digest_id = notion.children[notion.DIGEST_PARENT][0]
+        before = list(notion.children[digest_id])
+
+        page = writer.read_digest(DAY)
+        assert page.keys == [p.notion_key for p in papers]
+        assert page.sections == 3
+
+        notion.calls.clear()
+        new = _make_paper(3)
+        writer.append_to_digest(page, [new], f"### 4. {new.title}\nsummary")
+        assert "DELETE /v1/blocks/{id}" not in notion.calls
+        assert notion.calls["PATCH /v1/blocks/{id}/children"] == 1
+        assert notion.children[digest_id][: len(before)] == before
+        assert notion.blocks[page.top_heading["id"]]["heading_2"]["rich_text"][0]["text"]["content"] == "今日论文（Top 4）"
+        assert writer.read_digest(DAY).keys == [p.notion_key for p in papers + [new]]
+
+    def test_no_page_yet(self, writer):
+        assert writer.read_digest(DAY) is None
+
+
+class _Summarizer:
+    """One note per paper, shared by every profile, as Summarizer.note_for."""
+
+    structured = False
+
+    def __init__(self):
+        self.http = SimpleNamespace(deadline=None)
+
+    def note_for(self, paper: PaperCandidate) -> str:
+        return "- shared note"
+
+    def summarize_for_digest(self, papers, digest_date, keywords) -> str:
+        return _digest(papers)
+
+
+class TestSharedNotes:
+    def test_paper_picked_by_two_profiles_gets_one_note_write(self, notion, tmp_path):
+        paper = _make_paper(1)
+        paper.matched_keywords = ["humanoid", "robotics"]
+        args = SimpleNamespace(top_k=1, incremental=False, dry_run=False)
+        summarizer = _Summarizer()
+        profiles = [Profile("manip", ["humanoid"]), Profile("general", ["robotics"])]
+
+        calls = []
+        for prof in profiles:
+            writer = _writer(notion, tmp_path)
+            writer.label = prof.name
+            notion.calls.clear()
+            _run_profile(prof, args, DAY, [paper], set(), summarizer, writer, None)
+            calls.append(dict(notion.calls))
+
+        notes = [p for p in notion.pages.values() if "database_id" in p["parent"]]
+        assert len(notes) == 1
+        assert [t["name"] for t in notes[0]["properties"]["Tags"]["multi_select"]] == ["humanoid", "robotics"]
+        assert calls[0]["POST /v1/pages"] == 2  # digest page + the note
+        # Second profile: its own digest page; the note is unchanged, so skipped
+        assert calls[1]["POST /v1/pages"] == 1
+        assert "PATCH /v1/pages/{id}" not in calls[1]
+        assert "DELETE /v1/blocks/{id}" not in calls[1]
+
@@ -0,0 +1,37 @@
+import tracemalloc
+
+from app.services import telemetry
+from app.services.profiling import StageProfiler
+
+
+def _work(n: int) -> list[str]:
+    return [str(i) * 10 for i in range(n)]
+
+
+class TestStageProfiler:
+    def test_selected_stages_get_stats_and_allocations(self, tmp_path):
+        profiler = StageProfiler(tmp_path, ("merge", "rank"))
+        telemetry.start_run("test")
+        telemetry.set_profiler(profiler)
+        try:
+            with telemetry.span("run"):
+                with telemetry.span("merge"):
+                    kept = _work(5000)
+                with telemetry.span("fetch.arxiv"):
+                    _work(100)
+        finally:
+            telemetry.set_profiler(None)
+        profiler.write()
+
+        assert dict(profiler.calls) == {"merge": 1}
+        assert (tmp_path / "merge.pstats").exists()
+        assert "_work" in (tmp_path / "summary.txt").read_text()
+        assert "test_profiling.py" in (tmp_path / "merge.alloc.txt").read_text()
+        assert not tracemalloc.is_tracing()
+        assert len(kept) == 5000
+
+    def test_prefix_selects_nested_names(self, tmp_path):
+        profiler = StageProfiler(tmp_path, ("notion.build",))
+        assert profiler.selects("notion.build.note")
+        assert not profiler.selects("notion.builder")
+        assert StageProfiler(tmp_path, None).selects("anything")
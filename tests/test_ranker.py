@@ -1,8 +1,9 @@
 import math
+import random
 from datetime import datetime, timedelta, timezone
 
 from app.models import PaperCandidate
-from app.services.ranker import rank_papers, score_paper
+from app.services.ranker import rank_papers, score_paper, sweep_weights, weight_grid
 
 
 def _make_paper(**kwargs) -> PaperCandidate:
@@ -102,3 +103,37 @@ class TestRankPapers:
             weights={"hf_likes": 0.1, "recency": 0.8, "keyword_match": 0.1},
         )
         assert result_recency[0].title == "Recent"
+
+
+class TestSweepWeights:
+    def _pool(self, n=300):
+        rng = random.Random(7)
+        now = datetime.now(timezone.utc)
+        return [
+            _make_paper(
+                title=f"P{i}",
+                # Coarse values so ties are common and tie-breaking is exercised
+                hf_likes=rng.choice([0, 0, 1, 5, 20, 100]),
+                published=now - timedelta(days=rng.choice([0, 1, 3, 6, 9])),
+                matched_keywords=rng.sample(KEYWORDS, rng.randint(1, 3)),
+            )
+            for i in range(n)
+        ]
+
+    def test_grid_size(self):
+        grid = weight_grid(10)
+        assert len(grid) == 999
+        assert {"hf_likes": 0.0, "recency": 0.0, "keyword_match": 0.0} not in grid
+
+    def test_matches_rank_papers(self):
+        papers = self._pool()
+        grid = weight_grid(4)
+        tops = sweep_weights(papers, KEYWORDS, grid, top_k=5)
+        for weights, top in zip(grid, tops):
+            expected = rank_papers(list(papers), KEYWORDS, top_k=5, weights=weights)
+            assert [papers[i].title for i in top] == [p.title for p in expected]
+
+    def test_small_pool(self):
+        papers = self._pool(3)
+        [top] = sweep_weights(papers, KEYWORDS, [{"hf_likes": 1.0}], top_k=5)
+        assert sorted(top) == [0, 1, 2]
@@ -0,0 +1,93 @@
+import re
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import PaperCandidate
+from app.services.reranker import LLMReranker
+from app.services.summarizer import Summarizer
+
+KEYWORDS = ["humanoid"]
+
+
+def _make_paper(i: int, likes: int = 0, abstract: str = "We study humanoid control.") -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Humanoid Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        abstract=abstract,
+        published=datetime.now(timezone.utc),
+        hf_likes=likes,
+        matched_keywords=["humanoid"],
+    )
+
+
+class _FakeScoreMessages:
+    """Scores 10 for papers whose abstract mentions "breakthrough", else 1."""
+
+    def __init__(self):
+        self.prompts: list[str] = []
+        self._lock = threading.Lock()
+
+    def create(self, model, timeout, max_tokens, system, messages, tools, tool_choice, temperature):
+        prompt = messages[0]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+        entries = re.findall(r"^\[(\d+)\] .*\n(.*)$", prompt, re.M)
+        scores = [{"paper": int(n), "score": 10 if "breakthrough" in text else 1} for n, text in entries]
+        scores += [{"paper": 999, "score": 10}, {"paper": 1, "score": "high"}]  # ignored
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="tool_use", name=tool_choice["name"], input={"scores": scores})],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=10),
+            stop_reason="tool_use",
+        )
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    s = Summarizer()
+    s.client = SimpleNamespace(messages=_FakeScoreMessages())
+    return s
+
+
+def _pool() -> list[PaperCandidate]:
+    papers = [_make_paper(i, likes=100 - i) for i in range(40)]
+    papers.append(_make_paper(99, likes=0, abstract="A breakthrough in humanoid whole-body control."))
+    return papers
+
+
+class TestLLMReranker:
+    def test_relevant_paper_without_likes_gets_in(self, summarizer, tmp_path):
+        reranker = LLMReranker(summarizer, tmp_path / "scores.json", candidates=50, batch_size=10)
+        top = reranker.rerank(_pool(), KEYWORDS, top_k=3)
+        assert top[0].arxiv_id == "2401.00099"
+        assert len(summarizer.client.messages.prompts) == 5  # ceil(41 / 10)
+
+    def test_shortlist_bounds_calls(self, summarizer):
+        reranker = LLMReranker(summarizer, candidates=20, batch_size=10)
+        papers = [_make_paper(i, likes=i) for i in range(500)]
+        assert len(reranker.rerank(papers, KEYWORDS, top_k=3)) == 3
+        assert len(summarizer.client.messages.prompts) == 2
+
+    def test_scores_are_cached_per_keyword_set(self, summarizer, tmp_path):
+        LLMReranker(summarizer, tmp_path / "scores.json", batch_size=10).rerank(_pool(), KEYWORDS, top_k=3)
+        summarizer.client.messages.prompts.clear()
+
+        top = LLMReranker(summarizer, tmp_path / "scores.json", batch_size=10).rerank(_pool(), KEYWORDS, top_k=3)
+        assert summarizer.client.messages.prompts == []
+        assert top[0].arxiv_id == "2401.00099"
+
+        LLMReranker(summarizer, tmp_path / "scores.json", batch_size=10).rerank(_pool(), ["robotics"], top_k=3)
+        assert len(summarizer.client.messages.prompts) == 5
+
+
+class TestScoreRelevance:
+    def test_batch_prompt_is_compact_and_scores_are_validated(self, summarizer):
+        papers = [_make_paper(1, abstract="x" * 5000), _make_paper(2, abstract="breakthrough")]
+        assert summarizer.score_relevance(papers, KEYWORDS, abstract_chars=100) == [1.0, 10.0]
+        prompt = summarizer.client.messages.prompts[0]
+        assert prompt.startswith("keywords: humanoid") and "x" * 101 not in prompt
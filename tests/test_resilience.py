@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.providers.hf_provider import HuggingFaceProvider
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    RateLimiter,
+    ResilientCaller,
+    RetryPolicy,
+)
+
+
+class _FaultInjectingHandler(BaseHTTPRequestHandler):
+    """Pops the next scripted fault for the request path; 200 once the script runs out.
+
+    Script entries: an int status, (status, headers), "drop" to close the
+    connection without a response, or ("sleep", seconds) before a 200.
+    """
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.server.hits[path] = self.server.hits.get(path, 0) + 1
+        script = self.server.scripts.get(path, [])
+        action = script.pop(0) if script else 200
+
+        if action == "drop":
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        headers = {}
+        if isinstance(action, tuple) and action[0] == "sleep":
+            time.sleep(action[1])
+            action = 200
+        elif isinstance(action, tuple):
+            action, headers = action
+
+        body = json.dumps(self.server.payloads.get(path, {"ok": True})).encode()
+        self.send_response(action)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FaultInjectingHandler)
+    server.daemon_threads = True
+    server.scripts, server.hits, server.payloads = {}, {}, {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _caller(policy: RetryPolicy | None = None, **kwargs) -> ResilientCaller:
+    policy = policy or RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=1.0, call_timeout=2.0)
+    return ResilientCaller("stub", policy, breaker=kwargs.pop("breaker", CircuitBreaker("stub")), **kwargs)
+
+
+def _get(caller: ResilientCaller, url: str) -> requests.Response:
+    def attempt():
+        resp = requests.get(url, timeout=caller.attempt_timeout())
+        resp.raise_for_status()
+        return resp
+
+    return caller.call(attempt)
+
+
+class TestRetries:
+    def test_retries_transient_status_until_success(self, stub):
+        stub.scripts["/x"] = [503, 502, 500]
+        resp = _get(_caller(), stub.url + "/x")
+        assert resp.status_code == 200
+        assert stub.hits["/x"] == 4
+
+    def test_gives_up_after_max_attempts(self, stub):
+        stub.scripts["/x"] = [503] * 10
+        with pytest.raises(requests.HTTPError):
+            _get(_caller(), stub.url + "/x")
+        assert stub.hits["/x"] == 4
+
+    def test_client_error_not_retried(self, stub):
+        stub.scripts["/x"] = [404]
+        with pytest.raises(requests.HTTPError):
+            _get(_caller(), stub.url + "/x")
+        assert stub.hits["/x"] == 1
+
+    def test_honours_retry_after(self, stub):
+        stub.scripts["/x"] = [(429, {"Retry-After": "0.3"})]
+        policy = RetryPolicy(max_attempts=2, base_delay=0.0, max_delay=5.0, call_timeout=2.0)
+        t0 = time.monotonic()
+        _get(_caller(policy), stub.url + "/x")
+        assert time.monotonic() - t0 >= 0.3
+        assert stub.hits["/x"] == 2
+
+    def test_dropped_connection_is_retried(self, stub):
+        stub.scripts["/x"] = ["drop"]
+        assert _get(_caller(), stub.url + "/x").status_code == 200
+        assert stub.hits["/x"] == 2
+
+    def test_slow_response_times_out_and_retries(self, stub):
+        stub.scripts["/x"] = [("sleep", 1.0)]
+        policy = RetryPolicy(max_attempts=2, base_delay=0.01, call_timeout=0.2)
+        t0 = time.monotonic()
+        assert _get(_caller(policy), stub.url + "/x").status_code == 200
+        assert time.monotonic() - t0 < 1.0
+
+
+class TestDeadline:
+    def test_stage_deadline_stops_retrying(self, stub):
+        stub.scripts["/x"] = [503] * 10
+        policy = RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=1.0)
+        caller = _caller(policy, deadline=Deadline(0.3))
+        t0 = time.monotonic()
+        with pytest.raises((DeadlineExceeded, requests.HTTPError)):
+            _get(caller, stub.url + "/x")
+        assert time.monotonic() - t0 < 1.0
+
+    def test_attempt_timeout_shrinks_to_deadline(self):
+        caller = _caller(RetryPolicy(call_timeout=30.0), deadline=Deadline(2.0))
+        assert caller.attempt_timeout() <= 2.0
+        assert _caller(RetryPolicy(call_timeout=30.0)).attempt_timeout() == 30.0
+
+
+class TestCircuitBreaker:
+    def test_opens_then_fails_fast_then_recovers(self, stub):
+        stub.scripts["/x"] = [503, 503]
+        breaker = CircuitBreaker("stub", failure_threshold=2, reset_timeout=0.2)
+        caller = _caller(RetryPolicy(max_attempts=1), breaker=breaker)
+
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                _get(caller, stub.url + "/x")
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            _get(caller, stub.url + "/x")
+        assert stub.hits["/x"] == 2
+
+        time.sleep(0.25)
+        assert _get(caller, stub.url + "/x").status_code == 200
+        assert not breaker.is_open
+
+    def test_rate_limit_does_not_trip_breaker(self, stub):
+        stub.scripts["/x"] = [429, 429]
+        breaker = CircuitBreaker("stub", failure_threshold=1)
+        caller = _caller(RetryPolicy(max_attempts=3, base_delay=0.01), breaker=breaker)
+        _get(caller, stub.url + "/x")
+        assert not breaker.is_open
+
+
+class TestRateLimiter:
+    def test_spaces_calls_across_threads(self):
+        limiter = RateLimiter(0.05)
+        starts: list[float] = []
+
+        def call():
+            limiter.wait()
+            starts.append(time.monotonic())
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        starts.sort()
+        assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
+
+
+class TestProviderIntegration:
+    def test_hf_provider_retries_api(self, stub):
+        stub.scripts["/api/daily_papers"] = [503]
+        stub.payloads["/api/daily_papers"] = [
+            {"paper": {"id": "2401.00001", "title": "Humanoid walking", "summary": ""}, "numLikes": 3}
+        ]
+        provider = HuggingFaceProvider(
+            window_days=1,
+            policy=RetryPolicy(max_attempts=3, base_delay=0.01, call_timeout=2.0),
+            base_url=stub.url,
+        )
+        provider.http.breaker = CircuitBreaker("stub")
+        papers = provider.fetch(["humanoid"])
+        assert [p.arxiv_id for p in papers] == ["2401.00001"]
+        assert stub.hits["/api/daily_papers"] == 2
+
+    def test_notion_writer_queries_through_caller(self, monkeypatch):
+        pytest.importorskip("notion_client")
+        from app.services.notion_writer import NotionWriter
+
+        monkeypatch.setenv("NOTION_API_KEY", "secret")
+        monkeypatch.setenv("DIGEST_PARENT_PAGE_ID", "parent")
+        monkeypatch.setenv("NOTES_DB_ID", "notes")
+        pages = [{"id": "p1", "properties": {"Key": {"rich_text": [{"text": {"content": "arxiv:2401.00001"}}]}}}]
+        calls = []
+
+        def request(path, method, body):
+            calls.append((path, method))
+            if len(calls) == 1:
+                raise requests.ConnectionError("reset")
+            return {"results": pages, "has_more": False}
+
+        writer = NotionWriter(policy=RetryPolicy(max_attempts=3, base_delay=0.01))
+        writer.http.breaker = CircuitBreaker("stub")
+        writer.client = type("_Client", (), {"request": staticmethod(request)})()
+        assert writer.get_existing_keys() == {"arxiv:2401.00001"}
+        assert calls == [("databases/notes/query", "POST")] * 2
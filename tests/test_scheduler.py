@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from app.services import telemetry
+from app.services.resilience import Deadline
+from app.services.scheduler import RunSchedule, degrade
+
+
+class TestStageBudgets:
+    def test_without_publish_deadline_stages_get_their_caps(self):
+        schedule = RunSchedule(caps={"fetch": 900})
+        assert schedule.remaining() is None
+        assert schedule.stage("fetch").remaining() == pytest.approx(900, abs=1)
+        assert schedule.stage("write").remaining() is None
+
+    def test_time_left_is_split_over_the_stages_to_come(self):
+        schedule = RunSchedule(1000, shares={"fetch": 0.2, "summarize": 0.6, "write": 0.2})
+        assert schedule.stage("fetch").remaining() == pytest.approx(200, abs=1)
+        assert schedule.stage("summarize").remaining() == pytest.approx(750, abs=1)
+        assert schedule.stage("write").remaining() == pytest.approx(1000, abs=1)
+
+    def test_unused_time_passes_on(self):
+        schedule = RunSchedule(0.4, shares={"fetch": 0.5, "summarize": 0.5, "write": 0.0})
+        schedule.stage("fetch")
+        time.sleep(0.1)  # fetch finished early
+        assert schedule.stage("summarize").remaining() == pytest.approx(0.3, abs=0.05)
+
+    def test_caps_still_apply(self):
+        schedule = RunSchedule(10_000, caps={"fetch": 60})
+        assert schedule.stage("fetch").remaining() == pytest.approx(60, abs=1)
+
+    def test_from_config_ignores_a_deadline_already_passed(self):
+        schedule = RunSchedule.from_config({"schedule": {"publish_by": "00:00", "write_reserve_s": 30}})
+        assert schedule.remaining() is None and schedule.write_reserve == 30
+
+    def test_malformed_publish_by_is_a_config_error(self):
+        # 630: YAML's reading of an unquoted 10:30
+        for value in ("8am", "8", "25:00", 630):
+            with pytest.raises(ValueError, match="schedule.publish_by"):
+                RunSchedule.from_config({"schedule": {"publish_by": value}})
+
+
+class TestEstimates:
+    def test_default_until_observed(self):
+        schedule = RunSchedule(estimates={"note": 5.0})
+        assert schedule.estimate("note") == 5.0
+        with schedule.timed("note"):
+            pass
+        assert schedule.estimate("note") < 1.0
+
+    def test_fits(self):
+        schedule = RunSchedule(estimates={"note": 10.0, "digest": 30.0})
+        assert schedule.fits(None, "note", reserve=1e9)
+        assert schedule.fits(Deadline(50), "note", reserve=schedule.estimate("digest"))
+        assert not schedule.fits(Deadline(35), "note", reserve=schedule.estimate("digest"))
+
+
+class TestDegrade:
+    def test_recorded_and_counted(self):
+        tracer = telemetry.start_run("test")
+        schedule = RunSchedule()
+        schedule.activate()
+        with telemetry.span("summarize"):
+            degrade("summarize.notes", "3 of 5 notes left abstract-only")
+        assert schedule.degradations == ["summarize.notes: 3 of 5 notes left abstract-only"]
+        assert tracer.report()["totals"]["degradations"] == 1
@@ -0,0 +1,125 @@
+import re
+import threading
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import PaperCandidate
+from app.services.notion_writer import _render_layout
+from app.services.structured import collect_sections, digest_layout, layout_to_markdown, papers_layout
+from app.services.summarizer import Summarizer
+
+KEYWORDS = ["humanoid"]
+DAY = date(2026, 1, 1)
+
+
+def _make_paper(i: int) -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Humanoid Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        abstract="We study humanoid control. " * 20,
+        matched_keywords=["humanoid"],
+    )
+
+
+def _section(n: int) -> dict:
+    return {"paper": n, "summary": f"summary {n}", "innovations": [f"idea {n}"]}
+
+
+class _FakeToolMessages:
+    """Answers each forced tool call with sections for the papers in the prompt."""
+
+    def __init__(self, answer: bool = True):
+        self.calls: list[str] = []
+        self.answer = answer
+        self._lock = threading.Lock()
+
+    def create(self, model, timeout, max_tokens, system, messages, tools, tool_choice, temperature):
+        prompt = messages[0]["content"]
+        name = tool_choice["name"]
+        with self._lock:
+            self.calls.append(name)
+        numbers = [int(n) for n in re.findall(r"^--- paper (\d+) ---$", prompt, re.M)]
+        data = {"commentary": "ok", "takeaways": ["a", "b"]}
+        if name != "write_overview":
+            data["papers"] = [_section(n) for n in numbers]
+        content = [SimpleNamespace(type="tool_use", name=name, input=data)] if self.answer \
+            else [SimpleNamespace(type="text", text="no tool")]
+        return SimpleNamespace(
+            content=content,
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=100),
+            stop_reason="tool_use",
+        )
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    s = Summarizer(digest_input_budget=4000, digest_max_tokens=4000, tokens_per_paper=900, structured=True)
+    s.client = SimpleNamespace(messages=_FakeToolMessages())
+    return s
+
+
+class TestCollectSections:
+    def test_indexes_by_number_and_drops_bad_entries(self):
+        sections = collect_sections(
+            [{"papers": [_section(2), _section(9), {"paper": "1"}]}, {"papers": [_section(2) | {"summary": "dup"}]}],
+            3,
+        )
+        assert sections[0] is None and sections[2] is None
+        assert sections[1]["summary"] == "summary 2"
+
+
+class TestStructuredDigest:
+    def test_single_call(self, summarizer):
+        papers = [_make_paper(i) for i in range(2)]
+        data = summarizer.summarize_for_digest_structured(papers, DAY, KEYWORDS)
+        assert summarizer.client.messages.calls == ["write_digest"]
+        assert [s["summary"] for s in data["papers"]] == ["summary 1", "summary 2"]
+
+    def test_map_reduce_keeps_input_order(self, summarizer):
+        papers = [_make_paper(i) for i in range(10)]
+        data = summarizer.summarize_for_digest_structured(papers, DAY, KEYWORDS)
+        calls = summarizer.client.messages.calls
+        assert calls.count("write_overview") == 1 and "write_digest" not in calls
+        assert [s["summary"] for s in data["papers"]] == [f"summary {n}" for n in range(1, 11)]
+        assert data["takeaways"] == ["a", "b"]
+
+    def test_no_tool_call_returns_none(self, summarizer):
+        summarizer.client.messages.answer = False
+        assert summarizer.summarize_for_digest_structured([_make_paper(1)], DAY, KEYWORDS) is None
+
+
+class TestLayout:
+    def test_note_link_follows_its_paper(self):
+        papers = [_make_paper(1), _make_paper(2)]
+        data = {"commentary": "ok", "takeaways": ["a"], "papers": [_section(1), None]}
+        items = digest_layout(data, papers, DAY, KEYWORDS)
+
+        blocks = _render_layout(items, {papers[0].dedup_key: "note-1", papers[1].dedup_key: "note-2"})
+        mentions = [
+            i for i, b in enumerate(blocks)
+            if b["type"] == "paragraph" and any(r["type"] == "mention" for r in b["paragraph"]["rich_text"])
+        ]
+        headings = [
+            i for i, b in enumerate(blocks)
+            if b["type"] == "heading_3" and b["heading_3"]["rich_text"][0]["text"]["content"].startswith(("1.", "2."))
+        ]
+        assert len(mentions) == 2
+        assert headings[0] < mentions[0] < headings[1] < mentions[1]
+        ids = [blocks[i]["paragraph"]["rich_text"][1]["mention"]["page"]["id"] for i in mentions]
+        assert ids == ["note-1", "note-2"]
+
+    def test_markdown_render_falls_back_to_abstract(self):
+        papers = [_make_paper(1), _make_paper(2)]
+        md = layout_to_markdown(digest_layout({"papers": [_section(1)]}, papers, DAY, KEYWORDS))
+        assert "### 1. Humanoid Paper 1" in md and "summary 1" in md
+        assert "We study humanoid control." in md.split("### 2.")[1]
+
+    def test_appended_papers_continue_numbering(self):
+        items = papers_layout([_section(1), None], [_make_paper(7), _make_paper(8)], start=4)
+        assert [i.text for i in items if i.kind == "h3"] == ["4. Humanoid Paper 7", "5. Humanoid Paper 8"]
+        assert [i.text for i in items if i.kind == "note"] == [_make_paper(7).dedup_key, _make_paper(8).dedup_key]
@@ -0,0 +1,145 @@
+import threading
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import PaperCandidate
+from app.services import telemetry
+from app.services.summarizer import Summarizer, estimate_tokens
+
+KEYWORDS = ["humanoid", "robotics"]
+
+
+def _make_paper(i: int, note: str = "") -> PaperCandidate:
+    p = PaperCandidate(
+        title=f"Humanoid Paper {i}",
+        url=f"https://arxiv.org/abs/2401.{i:05d}",
+        source="arxiv",
+        arxiv_id=f"2401.{i:05d}",
+        abstract="We study humanoid control. " * 20,
+        matched_keywords=["humanoid"],
+    )
+    p.note_markdown = note
+    return p
+
+
+class _FakeMessages:
+    def __init__(self, fail_on: str | None = None):
+        self.prompts: list[str] = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def create(self, model, timeout, max_tokens, system, messages, temperature):
+        prompt = messages[0]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+        if self.fail_on and self.fail_on in prompt:
+            raise ValueError("boom")
+        if prompt.startswith("mode: papers_only"):
+            text = "\n".join(line.replace("title: ", "### ") for line in prompt.splitlines() if line.startswith("title: "))
+        elif prompt.startswith("mode: overview_only"):
+            text = "# overview\n## 今日锐评\nok\n## 今日论文（Top 99）\nshould be dropped"
+        else:
+            text = "# single call digest"
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(text) // 4),
+            stop_reason="end_turn",
+        )
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    s = Summarizer(digest_input_budget=4000, digest_max_tokens=4000, tokens_per_paper=900)
+    s.client = SimpleNamespace(messages=_FakeMessages())
+    return s
+
+
+class TestTokenEstimate:
+    def test_cjk_counts_per_character(self):
+        assert estimate_tokens("今日锐评") == 4
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("方法 method") == 2 + 2
+
+
+class TestDigestPlanning:
+    def test_small_digest_is_one_call(self, summarizer):
+        papers = [_make_paper(i) for i in range(2)]
+        assert summarizer.plan_digest(papers, date(2026, 1, 1), KEYWORDS) == [[0, 1]]
+
+    def test_large_digest_is_split_by_output_budget(self, summarizer):
+        papers = [_make_paper(i) for i in range(10)]
+        groups = summarizer.plan_digest(papers, date(2026, 1, 1), KEYWORDS)
+        assert [i for g in groups for i in g] == list(range(10))
+        assert all(len(g) <= 4 for g in groups)
+
+    def test_large_notes_are_split_by_input_budget(self, summarizer):
+        papers = [_make_paper(i, note="笔记" * 800) for i in range(3)]
+        groups = summarizer.plan_digest(papers, date(2026, 1, 1), KEYWORDS)
+        assert len(groups) >= 2
+
+    def test_notes_replace_abstracts(self):
+        msg = Summarizer._build_digest_user_message(
+            [_make_paper(1, note="# Note body"), _make_paper(2)], date(2026, 1, 1), KEYWORDS
+        )
+        first, second = msg.split("--- paper 2 ---")
+        assert "note:\n# Note body" in first and "abstract:" not in first
+        assert "abstract: We study" in second
+
+
+class TestMapReduceDigest:
+    def test_single_call_when_within_budget(self, summarizer):
+        out = summarizer.summarize_for_digest([_make_paper(1)], date(2026, 1, 1), KEYWORDS)
+        assert out == "# single call digest"
+        assert len(summarizer.client.messages.prompts) == 1
+
+    def test_sections_in_order_under_one_overview(self, summarizer):
+        tracer = telemetry.start_run("test")
+        papers = [_make_paper(i) for i in range(10)]
+        with telemetry.span("summarize.digest"):
+            out = summarizer.summarize_for_digest(papers, date(2026, 1, 1), KEYWORDS)
+
+        groups = summarizer.plan_digest(papers, date(2026, 1, 1), KEYWORDS)
+        assert len(summarizer.client.messages.prompts) == len(groups) + 1
+        assert out.startswith("# overview")
+        assert out.count("## 今日论文") == 1 and "Top 10" in out
+        positions = [out.index(f"### Humanoid Paper {i}") for i in range(10)]
+        assert positions == sorted(positions)
+
+        calls = [s for s in tracer.report()["spans"] if s["name"] == "llm.call"]
+        assert {c["attrs"]["kind"] for c in calls} == {"digest.map", "digest.reduce"}
+        assert all(c["attrs"]["prompt_tokens_est"] > 0 and "output_tokens" in c["attrs"] for c in calls)
+
+    def test_failed_group_falls_back_to_abstracts(self, summarizer):
+        summarizer.client.messages.fail_on = "title: Humanoid Paper 0\n"
+        summarizer.http.policy.max_attempts = 1
+        out = summarizer.summarize_for_digest(
+            [_make_paper(i) for i in range(10)], date(2026, 1, 1), KEYWORDS
+        )
+        assert "### 1. Humanoid Paper 0" in out
+        assert "We study humanoid control." in out
+
+
+class TestIncrementalSections:
+    def test_sections_only_numbered_from_start(self, summarizer):
+        summarizer.client.messages.fail_on = "title: Humanoid Paper 1\n"
+        summarizer.http.policy.max_attempts = 1
+        out = summarizer.summarize_sections([_make_paper(1)], date(2026, 1, 1), KEYWORDS, start=4)
+        prompts = summarizer.client.messages.prompts
+        assert len(prompts) == 1 and prompts[0].startswith("mode: papers_only")
+        assert "--- paper 4 ---" in prompts[0]
+        assert out.startswith("### 4. Humanoid Paper 1")
+
+
+class TestNoteCache:
+    def test_note_is_generated_once_per_paper(self, summarizer):
+        tracer = telemetry.start_run("test")
+        paper = _make_paper(1)
+        with telemetry.span("summarize.note"):
+            first = summarizer.note_for(paper)
+            second = summarizer.note_for(_make_paper(1))
+        assert first == second
+        assert len(summarizer.client.messages.prompts) == 1
+        assert tracer.report()["totals"]["note_cache_hits"] == 1
@@ -0,0 +1,61 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import telemetry
+
+
+class TestTelemetry:
+    def test_nested_spans_and_counters(self):
+        tracer = telemetry.start_run("test")
+        with telemetry.span("run"):
+            with telemetry.span("fetch.arxiv"):
+                telemetry.count("requests", 3)
+                telemetry.count("bytes", 1024)
+            with telemetry.span("summarize.digest"):
+                telemetry.count("tokens_in", 100)
+                telemetry.count("tokens_out", 20)
+
+        report = tracer.report()
+        spans = {s["name"]: s for s in report["spans"]}
+        assert spans["fetch.arxiv"]["parent"] == "run"
+        assert spans["fetch.arxiv"]["counters"] == {"requests": 3, "bytes": 1024}
+        assert report["totals"]["tokens_in"] == 100
+        assert report["duration_s"] >= spans["fetch.arxiv"]["duration_s"]
+
+    def test_count_outside_span_is_noop(self):
+        tracer = telemetry.start_run("test")
+        telemetry.count("requests")
+        assert tracer.report()["totals"] == {}
+
+    def test_propagate_into_thread_pool(self):
+        tracer = telemetry.start_run("test")
+        with telemetry.span("fetch.huggingface"):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(telemetry.propagate(lambda _: telemetry.count("requests")), range(8)))
+        assert tracer.report()["totals"]["requests"] == 8
+
+    def test_error_status(self):
+        tracer = telemetry.start_run("test")
+        with pytest.raises(ValueError):
+            with telemetry.span("merge"):
+                raise ValueError("boom")
+        assert tracer.report()["spans"][0]["status"] == "error"
+
+    def test_exports(self, tmp_path):
+        tracer = telemetry.start_run("test")
+        with telemetry.span("run"):
+            with telemetry.span("rank"):
+                telemetry.count("papers", 5)
+        tracer.write_report(tmp_path / "report.json")
+        tracer.write_spans(tmp_path / "spans.jsonl")
+
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert [s["name"] for s in report["spans"]] == ["run", "rank"]
+        lines = [json.loads(l) for l in (tmp_path / "spans.jsonl").read_text().splitlines()]
+        root, rank = lines
+        assert rank["parentSpanId"] == root["spanId"]
+        assert rank["traceId"] == root["traceId"]
+        assert rank["attributes"]["count.papers"] == 5
+        assert rank["endTimeUnixNano"] >= rank["startTimeUnixNano"]
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timezone
+
+from app.daily_digest import _with_section
+from app.models import PaperCandidate
+from app.services.structured import Item
+from app.services.trends import TrendIndex, trend_section
+
+
+def _make_paper(i: int, keywords: list[str], likes: int = 0, day: int = 5, source: str = "arxiv") -> PaperCandidate:
+    return PaperCandidate(
+        title=f"Paper {i}",
+        url=f"https://arxiv.org/abs/2603.{i:05d}",
+        source=source,
+        arxiv_id=f"2603.{i:05d}",
+        published=datetime(2026, 3, day, tzinfo=timezone.utc),
+        hf_likes=likes,
+        matched_keywords=keywords,
+    )
+
+
+class TestTrendIndex:
+    def test_repeat_sightings_are_counted_once(self, tmp_path):
+        index = TrendIndex(tmp_path / "trends.json")
+        papers = [_make_paper(1, ["humanoid"], likes=2), _make_paper(2, ["humanoid", "world model"], likes=4)]
+        assert index.update(papers, date(2026, 3, 6)) == 2
+        assert index.update(papers, date(2026, 3, 7)) == 0
+        assert index.counts["2026-03-05"] == {"humanoid": {"arxiv": [2, 6]}, "world model": {"arxiv": [1, 4]}}
+
+    def test_changes_replace_the_earlier_contribution(self, tmp_path):
+        index = TrendIndex(tmp_path / "trends.json")
+        index.update([_make_paper(1, ["humanoid"], likes=2)], date(2026, 3, 6))
+        # Reloaded from disk: more likes and a second keyword the next day
+        index = TrendIndex(tmp_path / "trends.json")
+        assert index.update([_make_paper(1, ["humanoid", "robotics"], likes=10)], date(2026, 3, 7)) == 1
+        assert index.counts["2026-03-05"] == {"humanoid": {"arxiv": [1, 10]}, "robotics": {"arxiv": [1, 10]}}
+
+    def test_old_papers_leave_recent_but_keep_their_counts(self, tmp_path):
+        index = TrendIndex(tmp_path / "trends.json", keep_days=10)
+        index.update([_make_paper(1, ["humanoid"], day=1)], date(2026, 3, 6))
+        index.update([_make_paper(2, ["humanoid"], day=20)], date(2026, 3, 20))
+        assert list(index.recent) == ["arxiv:2603.00002"]
+        assert index.counts["2026-03-01"]["humanoid"]["arxiv"] == [1, 0]
+
+    def test_weekly(self, tmp_path):
+        index = TrendIndex(tmp_path / "trends.json")
+        index.update([
+            _make_paper(1, ["humanoid"], likes=3, day=2),
+            _make_paper(2, ["humanoid"], likes=1, day=9),
+            _make_paper(3, ["humanoid"], likes=5, day=10, source="huggingface"),
+            _make_paper(4, ["robotics"], day=10),
+        ], date(2026, 3, 10))
+        weekly = index.weekly(date(2026, 3, 10), weeks=2, keywords=["humanoid"])
+        assert weekly == {"humanoid": [(date(2026, 2, 25), 1, 3.0), (date(2026, 3, 4), 2, 3.0)]}
+        assert index.weekly(date(2026, 3, 10), weeks=1, source="arxiv") == {
+            "humanoid": [(date(2026, 3, 4), 1, 1.0)], "robotics": [(date(2026, 3, 4), 1, 0.0)],
+        }
+
+
+class TestTrendSection:
+    def test_section_before_the_paper_list(self, tmp_path):
+        index = TrendIndex(tmp_path / "trends.json")
+        index.update([_make_paper(1, ["humanoid"], likes=3, day=2), _make_paper(2, ["humanoid"], likes=1, day=9),
+                      _make_paper(3, ["humanoid"], likes=5, day=10)], date(2026, 3, 10))
+        section = trend_section(index, date(2026, 3, 10), ["humanoid", "robotics"])
+        assert [i.text for i in section[1:]] == [
+            "**humanoid**: 近 7 天 2 篇（前 7 天 1，+100%），平均 HF likes 3.0",
+            "**robotics**: 近 7 天 0 篇（前 7 天 0，—），平均 HF likes 0.0",
+        ]
+
+        md, layout = _with_section("# 2026-03-10\n\n## 今日锐评\nx\n\n## 今日论文（Top 1）\n### 1. A", None, section)
+        assert md.index("## 关键词趋势") < md.index("## 今日论文") and layout is None
+        items = [Item("h1", "t"), Item("h2", "今日论文（Top 1）"), Item("h3", "1. A")]
+        md, layout = _with_section("", items, section)
+        assert [i.kind for i in layout] == ["h1", "h2", "li", "li", "h2", "h3"]
+        assert md.startswith("# t\n## 关键词趋势")